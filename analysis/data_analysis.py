@@ -3,44 +3,120 @@
 Скрипт для анализа данных ASR/TTS систем
 """
 
+import json
+import time
+import queue
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from sqlalchemy import text
-from database_config import get_session
+from sqlalchemy.orm import Session
+from database_config import get_session, read_snapshot
 from models import System, SystemMetric, BenchmarkResult, Benchmark
+from analysis_cache import AnalysisResultCache, data_version
+from leaderboard_analysis import pareto_frontier, top_k_by_dataset, leaderboard_as_of, rank_movement
 import logging
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 
+# Столбцы systems для однопроходного анализа и их типы в кадре: текстовые
+# столбцы - категории (группировка по кодам), числа - с поддержкой NULL
+SYSTEM_FRAME_DTYPES = {
+    'разработчик': 'category',
+    'год_первого_релиза': 'Int64',
+    'архитектура': 'category',
+    'тип_лицензии': 'category',
+    'количество_скачиваний': 'Int64'
+}
+
+def _optional_int(value):
+    return None if pd.isna(value) else int(value)
+
+def _mean_or_zero(value) -> float:
+    # Как float(AVG(...)) if AVG(...) else 0 в SQL-режиме
+    return float(value) if not pd.isna(value) and value else 0
+
+# Разделы результата run_full_analysis и методы, которые их считают
+ANALYSIS_SECTIONS = [
+    ('overview', 'get_systems_overview'),
+    ('top_developers', 'get_top_developers'),
+    ('architecture_distribution', 'get_architecture_distribution'),
+    ('wer_vs_year', 'get_wer_vs_year_analysis'),
+    ('mos_vs_year', 'get_mos_vs_year_analysis'),
+    ('benchmark_analysis', 'get_benchmark_analysis'),
+    ('language_distribution', 'get_language_distribution'),
+    ('license_distribution', 'get_license_distribution'),
+    ('dataset_analysis', 'get_dataset_analysis'),
+    ('yearly_trends', 'get_yearly_trends')
+]
+
+def cached_query(method):
+    """
+    Берет результат метода анализа из кэша analysis_cache, если он посчитан
+    для текущей версии данных, иначе выполняет запрос и сохраняет результат
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache is None:
+            return method(self, *args, **kwargs)
+        name = method.__name__
+        if args or kwargs:
+            name += json.dumps([args, kwargs], sort_keys=True, default=str)
+        result = self.cached_result(name)
+        if result is None:
+            result = method(self, *args, **kwargs)
+            self.cache.put(name, self.data_version or data_version(self.session), result)
+        return result
+    return wrapper
+
 class DataAnalyzer:
-    def __init__(self):
-        self.session = get_session()
+    def __init__(self, use_cache=True, session=None):
+        # Анализатор только читает данные: таблицы создает и сводные
+        # таблицы заполняет init_database()
+        self.session = session or get_session()
+        # Кэш результатов между запусками (таблица analysis_cache)
+        self.cache = AnalysisResultCache(self.session) if use_cache else None
+        # Версия данных, закрепленная на время run_full_analysis
+        self.data_version = None
+        # Время выполнения запросов последнего run_full_analysis, с
+        self.query_timings = {}
     
+    def cached_result(self, name):
+        """
+        Результат запроса name из кэша для текущей версии данных или None
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(name, self.data_version or data_version(self.session))
+    
+    @cached_query
     def get_systems_overview(self):
         """
-        Получает общий обзор систем
+        Получает общий обзор систем (по сводной таблице год-разработчик)
         """
         query = text("""
             SELECT 
-                COUNT(*) as total_systems,
+                SUM(количество_систем) as total_systems,
                 COUNT(DISTINCT разработчик) as unique_developers,
-                AVG(количество_скачиваний) as avg_downloads,
+                SUM(сумма_скачиваний) * 1.0 / NULLIF(SUM(количество_со_скачиваниями), 0) as avg_downloads,
                 MIN(год_первого_релиза) as earliest_year,
                 MAX(год_первого_релиза) as latest_year
-            FROM systems
+            FROM summary_year_developer
             WHERE год_первого_релиза IS NOT NULL
         """)
         
         result = self.session.execute(query).fetchone()
         return {
-            'total_systems': result[0],
+            'total_systems': result[0] or 0,
             'unique_developers': result[1],
             'avg_downloads': float(result[2]) if result[2] else 0,
             'earliest_year': result[3],
             'latest_year': result[4]
         }
     
+    @cached_query
     def get_top_developers(self, limit=10):
         """
         Получает топ разработчиков по количеству систем
@@ -48,10 +124,10 @@ class DataAnalyzer:
         query = text("""
             SELECT 
                 разработчик,
-                COUNT(*) as system_count,
-                AVG(количество_скачиваний) as avg_downloads,
-                SUM(количество_скачиваний) as total_downloads
-            FROM systems
+                SUM(количество_систем) as system_count,
+                SUM(сумма_скачиваний) * 1.0 / NULLIF(SUM(количество_со_скачиваниями), 0) as avg_downloads,
+                CASE WHEN SUM(количество_со_скачиваниями) > 0 THEN SUM(сумма_скачиваний) END as total_downloads
+            FROM summary_year_developer
             WHERE разработчик IS NOT NULL AND разработчик != ''
             GROUP BY разработчик
             ORDER BY system_count DESC, total_downloads DESC
@@ -69,6 +145,7 @@ class DataAnalyzer:
             for row in result
         ]
     
+    @cached_query
     def get_architecture_distribution(self):
         """
         Получает распределение архитектур
@@ -76,11 +153,10 @@ class DataAnalyzer:
         query = text("""
             SELECT 
                 архитектура,
-                COUNT(*) as count,
-                AVG(количество_скачиваний) as avg_downloads
-            FROM systems
+                количество_систем as count,
+                сумма_скачиваний * 1.0 / NULLIF(количество_со_скачиваниями, 0) as avg_downloads
+            FROM summary_architecture
             WHERE архитектура IS NOT NULL AND архитектура != 'unknown'
-            GROUP BY архитектура
             ORDER BY count DESC
         """)
         
@@ -94,6 +170,7 @@ class DataAnalyzer:
             for row in result
         ]
     
+    @cached_query
     def get_wer_vs_year_analysis(self):
         """
         Анализ зависимости WER от года публикации для ASR систем
@@ -126,6 +203,7 @@ class DataAnalyzer:
             for row in result
         ]
     
+    @cached_query
     def get_mos_vs_year_analysis(self):
         """
         Анализ зависимости MOS от года публикации для TTS систем
@@ -158,6 +236,7 @@ class DataAnalyzer:
             for row in result
         ]
     
+    @cached_query
     def get_benchmark_analysis(self):
         """
         Анализ результатов бенчмарков
@@ -194,30 +273,91 @@ class DataAnalyzer:
             for row in result
         ]
     
+    @cached_query
+    def get_leaderboard_frontier(self, dataset_split='average', benchmark=None, license=None, as_of=None):
+        """
+        Фронт Парето лидербордов по WER раздела dataset_split и RTFx
+        с необязательными фильтрами по бенчмарку и лицензии; as_of -
+        дата снимка (по умолчанию последний)
+        """
+        return pareto_frontier(self.session, dataset_split, benchmark, license, as_of)
+    
+    @cached_query
+    def get_leaderboard_top_k(self, k=5, dataset_split=None, benchmark=None, license=None, as_of=None):
+        """
+        Топ-k систем по WER для каждого бенчмарка и раздела датасета
+        на дату снимка as_of (по умолчанию последний)
+        """
+        return top_k_by_dataset(self.session, k, dataset_split, benchmark, license, as_of)
+    
+    @cached_query
+    def get_leaderboard_as_of(self, as_of, benchmark=None):
+        """
+        Лидерборд на дату as_of ('2025-03-01' или datetime) по истории снимков
+        """
+        return leaderboard_as_of(self.session, as_of, benchmark)
+    
+    @cached_query
+    def get_rank_movement(self, model_name, benchmark=None, since=None, until=None):
+        """
+        Изменения ранга системы в лидерборде по истории снимков
+        """
+        return rank_movement(self.session, model_name, benchmark, since, until)
+    
+    @cached_query
     def get_language_distribution(self):
         """
-        Получает распределение поддерживаемых языков
+        Получает распределение поддерживаемых языков: число систем
+        для каждого языка (система с несколькими языками учитывается в каждом)
         """
         query = text("""
             SELECT 
-                поддерживаемые_языки,
+                язык,
                 COUNT(*) as count
-            FROM systems
-            WHERE поддерживаемые_языки IS NOT NULL 
-                AND поддерживаемые_языки != ''
-            GROUP BY поддерживаемые_языки
+            FROM system_languages
+            GROUP BY язык
             ORDER BY count DESC
         """)
         
         result = self.session.execute(query).fetchall()
         return [
             {
-                'languages': row[0],
+                'language': row[0],
                 'count': row[1]
             }
             for row in result
         ]
     
+    @cached_query
+    def get_systems_by_language(self, language, limit=100):
+        """
+        Системы с поддержкой языка (код, например 'ru'), по убыванию скачиваний
+        """
+        query = text("""
+            SELECT 
+                s.название,
+                s.разработчик,
+                s.архитектура,
+                s.количество_скачиваний
+            FROM system_languages sl
+            JOIN systems s ON s.id = sl.system_id
+            WHERE sl.язык = :language
+            ORDER BY s.количество_скачиваний DESC
+            LIMIT :limit
+        """)
+        
+        result = self.session.execute(query, {'language': language.strip().lower(), 'limit': limit}).fetchall()
+        return [
+            {
+                'model_name': row[0],
+                'developer': row[1],
+                'architecture': row[2],
+                'downloads': row[3]
+            }
+            for row in result
+        ]
+    
+    @cached_query
     def get_license_distribution(self):
         """
         Получает распределение лицензий
@@ -225,11 +365,10 @@ class DataAnalyzer:
         query = text("""
             SELECT 
                 тип_лицензии,
-                COUNT(*) as count,
-                AVG(количество_скачиваний) as avg_downloads
-            FROM systems
+                количество_систем as count,
+                сумма_скачиваний * 1.0 / NULLIF(количество_со_скачиваниями, 0) as avg_downloads
+            FROM summary_license
             WHERE тип_лицензии IS NOT NULL AND тип_лицензии != ''
-            GROUP BY тип_лицензии
             ORDER BY count DESC
         """)
         
@@ -243,6 +382,7 @@ class DataAnalyzer:
             for row in result
         ]
     
+    @cached_query
     def get_dataset_analysis(self):
         """
         Анализ датасетов
@@ -272,6 +412,7 @@ class DataAnalyzer:
             for row in result
         ]
     
+    @cached_query
     def get_yearly_trends(self):
         """
         Получает тренды по годам
@@ -279,10 +420,10 @@ class DataAnalyzer:
         query = text("""
             SELECT 
                 год_первого_релиза,
-                COUNT(*) as systems_count,
-                AVG(количество_скачиваний) as avg_downloads,
-                COUNT(DISTINCT разработчик) as unique_developers
-            FROM systems
+                SUM(количество_систем) as systems_count,
+                SUM(сумма_скачиваний) * 1.0 / NULLIF(SUM(количество_со_скачиваниями), 0) as avg_downloads,
+                COUNT(разработчик) as unique_developers
+            FROM summary_year_developer
             WHERE год_первого_релиза IS NOT NULL
                 AND год_первого_релиза >= 2010
             GROUP BY год_первого_релиза
@@ -300,27 +441,175 @@ class DataAnalyzer:
             for row in result
         ]
     
-    def run_full_analysis(self):
+    def load_systems_frame(self) -> pd.DataFrame:
         """
-        Запускает полный анализ данных
+        Читает нужные анализу столбцы systems одним запросом в кадр pandas
         """
-        logging.info("Начинаем полный анализ данных")
+        columns = ', '.join(SYSTEM_FRAME_DTYPES)
+        frame = pd.read_sql(text(f"SELECT {columns} FROM systems"), self.session.connection())
+        return frame.astype(SYSTEM_FRAME_DTYPES)
+    
+    @cached_query
+    def get_system_aggregates(self, limit=10):
+        """
+        Все агрегаты по systems (обзор, разработчики, архитектуры, лицензии,
+        тренды по годам) за один просмотр таблицы: группировки
+        считаются в pandas по кадру load_systems_frame. Результаты совпадают
+        с соответствующими методами get_*
+        """
+        frame = self.load_systems_frame()
+        downloads = frame['количество_скачиваний']
+        developer = frame['разработчик']
+        year = frame['год_первого_релиза']
+        
+        with_year = frame[year.notna()]
+        overview = {
+            'total_systems': len(with_year),
+            'unique_developers': int(with_year['разработчик'].nunique()),
+            'avg_downloads': _mean_or_zero(with_year['количество_скачиваний'].mean()),
+            'earliest_year': _optional_int(with_year['год_первого_релиза'].min()),
+            'latest_year': _optional_int(with_year['год_первого_релиза'].max())
+        }
+        
+        def grouped(mask, column):
+            return (downloads[mask].groupby(frame.loc[mask, column], observed=True)
+                    .agg(['size', 'mean', lambda values: values.sum(min_count=1)])
+                    .set_axis(['count', 'mean', 'sum'], axis=1))
+        
+        developers = grouped(developer.notna() & (developer != ''), 'разработчик')
+        developers = developers.sort_values(['count', 'sum'], ascending=False, kind='stable').head(limit)
         
-        analysis_results = {
-            'overview': self.get_systems_overview(),
-            'top_developers': self.get_top_developers(),
-            'architecture_distribution': self.get_architecture_distribution(),
-            'wer_vs_year': self.get_wer_vs_year_analysis(),
-            'mos_vs_year': self.get_mos_vs_year_analysis(),
-            'benchmark_analysis': self.get_benchmark_analysis(),
-            'language_distribution': self.get_language_distribution(),
-            'license_distribution': self.get_license_distribution(),
-            'dataset_analysis': self.get_dataset_analysis(),
-            'yearly_trends': self.get_yearly_trends()
+        architecture = frame['архитектура']
+        architectures = grouped(architecture.notna() & (architecture != 'unknown'), 'архитектура')
+        architectures = architectures.sort_values('count', ascending=False, kind='stable')
+        
+        license_type = frame['тип_лицензии']
+        licenses = grouped(license_type.notna() & (license_type != ''), 'тип_лицензии')
+        licenses = licenses.sort_values('count', ascending=False, kind='stable')
+        
+        recent = year.notna() & (year >= 2010)
+        yearly = grouped(recent, 'год_первого_релиза').sort_index()
+        yearly_developers = developer[recent].groupby(year[recent]).nunique()
+        
+        return {
+            'overview': overview,
+            'top_developers': [
+                {
+                    'developer': name,
+                    'system_count': int(row['count']),
+                    'avg_downloads': _mean_or_zero(row['mean']),
+                    'total_downloads': _optional_int(row['sum'])
+                }
+                for name, row in developers.iterrows()
+            ],
+            'architecture_distribution': [
+                {
+                    'architecture': name,
+                    'count': int(row['count']),
+                    'avg_downloads': _mean_or_zero(row['mean'])
+                }
+                for name, row in architectures.iterrows()
+            ],
+            'license_distribution': [
+                {
+                    'license': name,
+                    'count': int(row['count']),
+                    'avg_downloads': _mean_or_zero(row['mean'])
+                }
+                for name, row in licenses.iterrows()
+            ],
+            'yearly_trends': [
+                {
+                    'year': int(name),
+                    'systems_count': int(row['count']),
+                    'avg_downloads': _mean_or_zero(row['mean']),
+                    'unique_developers': int(yearly_developers[name])
+                }
+                for name, row in yearly.iterrows()
+            ]
         }
+    
+    def _timed(self, name, query):
+        started = time.perf_counter()
+        result = query()
+        self.query_timings[name] = time.perf_counter() - started
+        logging.info(f"Запрос {name}: {self.query_timings[name] * 1000:.1f} мс")
+        return result
+    
+    def run_full_analysis(self, mode='sql', workers=4):
+        """
+        Запускает полный анализ данных. mode='sql' - отдельный запрос на
+        каждый раздел, mode='single_pass' - агрегаты по systems за один
+        просмотр таблицы (get_system_aggregates), остальные разделы - запросами,
+        mode='parallel' - запросы разделов одновременно в пуле из workers потоков
+        """
+        logging.info("Начинаем полный анализ данных")
+        
+        self.query_timings = {}
+        if self.cache is not None:
+            self.data_version = data_version(self.session)
+        try:
+            if mode == 'parallel':
+                analysis_results = self._run_parallel(workers)
+            elif mode == 'single_pass':
+                system_aggregates = self._timed('get_system_aggregates', self.get_system_aggregates)
+                analysis_results = {
+                    key: system_aggregates[key] if key in system_aggregates
+                    else self._timed(method, getattr(self, method))
+                    for key, method in ANALYSIS_SECTIONS
+                }
+            elif mode == 'sql':
+                analysis_results = {
+                    key: self._timed(method, getattr(self, method))
+                    for key, method in ANALYSIS_SECTIONS
+                }
+            else:
+                raise ValueError(f"Неизвестный режим анализа: {mode}")
+        finally:
+            self.data_version = None
         
         logging.info("Анализ данных завершен")
         return analysis_results
+    
+    def _run_parallel(self, workers):
+        """
+        Выполняет запросы разделов, которых нет в кэше, в пуле потоков: у каждого
+        потока свое соединение из пула, все соединения читают один снимок данных
+        (read_snapshot). Результаты кэшируются после выполнения всех запросов
+        """
+        results = {}
+        pending = []
+        for key, method in ANALYSIS_SECTIONS:
+            results[key] = self.cached_result(method)
+            if results[key] is None:
+                pending.append((key, method))
+        if not pending:
+            return results
+        
+        with read_snapshot(min(workers, len(pending)), self.session.get_bind()) as connections:
+            # Свободные анализаторы: каждый работает со своим соединением снимка
+            idle = queue.Queue()
+            for connection in connections:
+                idle.put(DataAnalyzer(use_cache=False, session=Session(bind=connection)))
+            
+            def run(method):
+                analyzer = idle.get()
+                try:
+                    started = time.perf_counter()
+                    return getattr(analyzer, method)(), time.perf_counter() - started
+                finally:
+                    idle.put(analyzer)
+            
+            with ThreadPoolExecutor(max_workers=len(connections)) as pool:
+                futures = [(key, method, pool.submit(run, method)) for key, method in pending]
+                for key, method, future in futures:
+                    results[key], self.query_timings[method] = future.result()
+                    logging.info(f"Запрос {method}: {self.query_timings[method] * 1000:.1f} мс")
+        
+        if self.cache is not None:
+            for key, method in pending:
+                self.cache.put(method, self.data_version, results[key])
+        return results
 
 def main():
     """
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Анализ лидербордов ASR по истории снимков (leaderboard_history): фронт
+Парето по WER (меньше - лучше) и RTFx (больше - лучше), топ-k систем по
+каждому разделу датасета, лидерборд на дату и движение системы в рейтинге.
+Все запросы читают состояние истории на момент as_of (по умолчанию -
+последний снимок). Ранги фронта и топа считаются оконными функциями SQL
+для выбранных фильтров (лицензия, раздел WER), а не берутся из снимка
+"""
+
+import logging
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import TIMESTAMP, bindparam, text
+from sqlalchemy.orm import Session
+
+from models import normalize_system_name
+from leaderboard_history import RANK_METRIC
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Метрики лидерборда Hugging Face (benchmarks_scraper.py): средний WER и
+# RTFx пишутся с разделом 'average', WER отдельных датасетов - с разделом датасета
+AVERAGE_SPLIT = 'average'
+AVERAGE_WER_METRIC = 'Average WER'
+SPLIT_WER_METRIC = 'WER'
+RTFX_METRIC = 'RTFx'
+
+def _filters(benchmark: Optional[str], license: Optional[str], params: Dict) -> str:
+    """
+    Условия WHERE для необязательных фильтров (лицензия - License модели
+    в снимке лидерборда); значения добавляются в params
+    """
+    conditions = []
+    if benchmark is not None:
+        conditions.append('b.название = :benchmark')
+        params['benchmark'] = benchmark
+    if license is not None:
+        conditions.append('st.лицензия = :license')
+        params['license'] = license
+    return ''.join(f' AND {condition}' for condition in conditions)
+
+def _moment(value: Union[str, date, datetime, None], end_of_day: bool = True) -> Optional[datetime]:
+    """
+    Момент времени из datetime, date или строки ISO; дата без времени -
+    конец дня (end_of_day=True) или его начало
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        if len(value) > 10:
+            return datetime.fromisoformat(value)
+        value = date.fromisoformat(value)
+    return datetime.combine(value, time.max if end_of_day else time.min)
+
+def _history_state(metrics_condition: str, as_of: Union[str, date, datetime, None], params: Dict) -> str:
+    """
+    Подзапрос состояния истории: последняя строка каждого ключа (бенчмарк,
+    система, метрика, раздел) из metrics_condition не позже as_of (None -
+    последний снимок). Метрики, пропавшие из лидерборда, отбрасываются
+    """
+    as_of_condition = ''
+    if as_of is not None:
+        as_of_condition = ' AND дата_начала <= :as_of'
+        params['as_of'] = _moment(as_of)
+    return f"""
+        SELECT h.benchmark_id, h.system_id, h.метрика_тип, h.датасет_раздел, h.значение, h.лицензия, h.дата_начала
+        FROM (
+            SELECT benchmark_id, system_id, метрика_тип, датасет_раздел, MAX(дата_начала) as дата_начала
+            FROM leaderboard_history
+            WHERE {metrics_condition}{as_of_condition}
+            GROUP BY benchmark_id, system_id, метрика_тип, датасет_раздел
+        ) latest
+        JOIN leaderboard_history h
+            ON h.benchmark_id = latest.benchmark_id
+            AND h.system_id = latest.system_id
+            AND h.метрика_тип = latest.метрика_тип
+            AND h.датасет_раздел = latest.датасет_раздел
+            AND h.дата_начала = latest.дата_начала
+        WHERE h.значение IS NOT NULL
+    """
+
+def _state_text(query: str, params: Dict):
+    statement = text(query)
+    if 'as_of' in params:
+        statement = statement.bindparams(bindparam('as_of', type_=TIMESTAMP))
+    return statement
+
+def load_leaderboard_frame(session: Session, dataset_split: str = AVERAGE_SPLIT,
+                           benchmark: str = None, license: str = None,
+                           as_of: Union[str, date, datetime] = None) -> pd.DataFrame:
+    """
+    Кадр систем лидербордов на момент as_of с WER раздела dataset_split и RTFx:
+    строка на (бенчмарк, система), у которой есть обе метрики. Ранги по WER
+    и по RTFx внутри бенчмарка считаются оконными функциями для выбранных фильтров
+    """
+    params = {
+        'wer_metric': AVERAGE_WER_METRIC if dataset_split == AVERAGE_SPLIT else SPLIT_WER_METRIC,
+        'split': dataset_split,
+        'rtfx_metric': RTFX_METRIC,
+        'average': AVERAGE_SPLIT
+    }
+    state = _history_state('метрика_тип IN (:wer_metric, :rtfx_metric) AND датасет_раздел IN (:split, :average)',
+                           as_of, params)
+    filters = _filters(benchmark, license, params)
+    query = _state_text(f"""
+        SELECT
+            benchmark,
+            model_name,
+            license,
+            architecture,
+            wer,
+            rtfx,
+            RANK() OVER (PARTITION BY benchmark ORDER BY wer) as wer_rank,
+            RANK() OVER (PARTITION BY benchmark ORDER BY rtfx DESC) as rtfx_rank
+        FROM (
+            SELECT
+                b.название as benchmark,
+                s.название as model_name,
+                MAX(st.лицензия) as license,
+                s.архитектура as architecture,
+                MAX(CASE WHEN st.метрика_тип = :wer_metric AND st.датасет_раздел = :split
+                         THEN st.значение END) as wer,
+                MAX(CASE WHEN st.метрика_тип = :rtfx_metric AND st.датасет_раздел = :average
+                         THEN st.значение END) as rtfx
+            FROM ({state}) st
+            JOIN benchmarks b ON b.id = st.benchmark_id
+            JOIN systems s ON s.id = st.system_id
+            WHERE st.значение > 0{filters}
+            GROUP BY b.id, b.название, s.id, s.название, s.архитектура
+        ) pairs
+        WHERE wer IS NOT NULL AND rtfx IS NOT NULL
+        ORDER BY benchmark, wer
+    """, params)
+    frame = pd.read_sql(query, session.connection(), params=params)
+    return frame.astype({'wer': 'float64', 'rtfx': 'float64'})
+
+def pareto_mask(frame: pd.DataFrame) -> pd.Series:
+    """
+    Маска строк фронта Парето внутри каждого бенчмарка: сортировка по
+    (бенчмарк, WER, -RTFx) и один проход с накопленным максимумом RTFx.
+    Строка на фронте, если ее RTFx больше, чем у всех строк с меньшим WER
+    (при полном совпадении метрик на фронт попадает одна строка). O(n log n)
+    """
+    ordered = frame.sort_values(['benchmark', 'wer', 'rtfx'], ascending=[True, True, False], kind='stable')
+    by_benchmark = ordered['benchmark']
+    previous_max = (ordered.groupby(by_benchmark, sort=False)['rtfx'].cummax()
+                    .groupby(by_benchmark, sort=False).shift(fill_value=-np.inf))
+    return (ordered['rtfx'] > previous_max).reindex(frame.index)
+
+def pareto_frontier(session: Session, dataset_split: str = AVERAGE_SPLIT,
+                    benchmark: str = None, license: str = None,
+                    as_of: Union[str, date, datetime] = None) -> List[Dict]:
+    """
+    Фронт Парето WER/RTFx для каждого бенчмарка на момент as_of: системы,
+    которые не уступают другой системе того же бенчмарка сразу по обеим
+    метрикам. По возрастанию WER
+    """
+    frame = load_leaderboard_frame(session, dataset_split, benchmark, license, as_of)
+    frontier = frame[pareto_mask(frame)]
+    return [
+        {
+            'benchmark_name': row.benchmark,
+            'model_name': row.model_name,
+            'license': row.license,
+            'architecture': row.architecture,
+            'wer': float(row.wer),
+            'rtfx': float(row.rtfx),
+            'wer_rank': int(row.wer_rank),
+            'rtfx_rank': int(row.rtfx_rank)
+        }
+        for row in frontier.itertuples(index=False)
+    ]
+
+def top_k_by_dataset(session: Session, k: int = 5, dataset_split: str = None,
+                     benchmark: str = None, license: str = None,
+                     as_of: Union[str, date, datetime] = None) -> List[Dict]:
+    """
+    Топ-k систем по WER в каждом (бенчмарк, раздел датасета) на момент as_of.
+    Ранг - RANK() по возрастанию WER среди отфильтрованных систем, поэтому
+    при равных значениях в топ попадают все системы с рангом не больше k
+    """
+    params = {'k': k, 'average_wer': AVERAGE_WER_METRIC, 'split_wer': SPLIT_WER_METRIC}
+    metrics_condition = 'метрика_тип IN (:average_wer, :split_wer)'
+    if dataset_split is not None:
+        metrics_condition += ' AND датасет_раздел = :split'
+        params['split'] = dataset_split
+    state = _history_state(metrics_condition, as_of, params)
+    filters = _filters(benchmark, license, params)
+    query = _state_text(f"""
+        SELECT
+            benchmark_name,
+            dataset_split,
+            model_name,
+            license,
+            wer,
+            wer_rank
+        FROM (
+            SELECT
+                b.название as benchmark_name,
+                st.датасет_раздел as dataset_split,
+                s.название as model_name,
+                st.лицензия as license,
+                st.значение as wer,
+                RANK() OVER (PARTITION BY st.benchmark_id, st.датасет_раздел
+                             ORDER BY st.значение) as wer_rank
+            FROM ({state}) st
+            JOIN benchmarks b ON b.id = st.benchmark_id
+            JOIN systems s ON s.id = st.system_id
+            WHERE st.значение > 0{filters}
+        ) ranked
+        WHERE wer_rank <= :k
+        ORDER BY benchmark_name, dataset_split, wer_rank, model_name
+    """, params)
+    result = session.execute(query, params).fetchall()
+    return [
+        {
+            'benchmark_name': row[0],
+            'dataset_split': row[1],
+            'model_name': row[2],
+            'license': row[3],
+            'wer': float(row[4]),
+            'rank': row[5]
+        }
+        for row in result
+    ]
+
+def leaderboard_as_of(session: Session, as_of: Union[str, date, datetime],
+                      benchmark: str = None) -> List[Dict]:
+    """
+    Лидерборд на момент as_of по истории снимков: для каждой системы
+    последние значения ранга, среднего WER и RTFx не позже as_of
+    (системы, пропавшие из лидерборда к этому моменту, не выводятся)
+    """
+    params = {
+        'rank_metric': RANK_METRIC,
+        'average_wer': AVERAGE_WER_METRIC,
+        'rtfx_metric': RTFX_METRIC,
+        'average': AVERAGE_SPLIT
+    }
+    state = _history_state('метрика_тип IN (:rank_metric, :average_wer, :rtfx_metric) AND датасет_раздел = :average',
+                           as_of, params)
+    filters = _filters(benchmark, None, params)
+    query = _state_text(f"""
+        SELECT
+            b.название as benchmark_name,
+            s.название as model_name,
+            MAX(CASE WHEN st.метрика_тип = :rank_metric THEN st.значение END) as rank,
+            MAX(CASE WHEN st.метрика_тип = :average_wer THEN st.значение END) as average_wer,
+            MAX(CASE WHEN st.метрика_тип = :rtfx_metric THEN st.значение END) as rtfx,
+            MAX(st.дата_начала) as changed_at
+        FROM ({state}) st
+        JOIN benchmarks b ON b.id = st.benchmark_id
+        JOIN systems s ON s.id = st.system_id
+        WHERE st.значение IS NOT NULL{filters}
+        GROUP BY b.id, b.название, s.id, s.название
+        ORDER BY b.название, rank IS NULL, rank, s.название
+    """, params)
+    result = session.execute(query, params).fetchall()
+    return [
+        {
+            'benchmark_name': row[0],
+            'model_name': row[1],
+            'rank': int(row[2]) if row[2] is not None else None,
+            'average_wer': float(row[3]) if row[3] is not None else None,
+            'rtfx': float(row[4]) if row[4] is not None else None,
+            'changed_at': pd.Timestamp(row[5]).to_pydatetime()
+        }
+        for row in result
+    ]
+
+def rank_movement(session: Session, model_name: str, benchmark: str = None,
+                  since: Union[str, date, datetime] = None,
+                  until: Union[str, date, datetime] = None) -> List[Dict]:
+    """
+    Движение системы в рейтинге: моменты изменения ранга по истории снимков
+    с предыдущим рангом и сдвигом (положительный - подъем). rank None -
+    система пропала из лидерборда. Читается по индексу (system_id, дата_начала)
+    """
+    params = {'name': normalize_system_name(model_name), 'rank_metric': RANK_METRIC, 'average': AVERAGE_SPLIT}
+    filters = _filters(benchmark, None, params)
+    query = text(f"""
+        SELECT
+            b.название as benchmark_name,
+            h.дата_начала,
+            h.значение as rank,
+            LAG(h.значение) OVER (PARTITION BY h.benchmark_id ORDER BY h.дата_начала) as previous_rank
+        FROM systems s
+        JOIN leaderboard_history h ON h.system_id = s.id
+        JOIN benchmarks b ON b.id = h.benchmark_id
+        WHERE s.нормализованное_название = :name
+            AND h.метрика_тип = :rank_metric
+            AND h.датасет_раздел = :average{filters}
+        ORDER BY b.название, h.дата_начала
+    """)
+    since, until = _moment(since, end_of_day=False), _moment(until)
+    movement = []
+    for row in session.execute(query, params).fetchall():
+        changed_at = pd.Timestamp(row[1]).to_pydatetime()
+        if (since is not None and changed_at < since) or (until is not None and changed_at > until):
+            continue
+        rank = int(row[2]) if row[2] is not None else None
+        previous_rank = int(row[3]) if row[3] is not None else None
+        movement.append({
+            'benchmark_name': row[0],
+            'date': changed_at,
+            'rank': rank,
+            'previous_rank': previous_rank,
+            'movement': previous_rank - rank if rank is not None and previous_rank is not None else None
+        })
+    return movement
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Проверка планов запросов DataAnalyzer: каждый запрос run_full_analysis
+выполняется с перехватом SQL, затем для него строится EXPLAIN QUERY PLAN.
+Запрос считается индексным, если в плане нет полного просмотра таблицы
+(строки SCAN без индекса), кроме таблиц FULL_SCAN_TABLES. Перед проверкой
+обновляется статистика планировщика (ANALYZE). Работает с SQLite
+"""
+
+import os
+import sys
+import logging
+from typing import Dict, List
+
+from sqlalchemy import event, text
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database_tools'))
+
+from database_config import get_engine, init_database
+from data_analysis import DataAnalyzer
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Сводные таблицы (строка на группу): запросы обзора читают их целиком по построению
+FULL_SCAN_TABLES = {'summary_year_developer', 'summary_license', 'summary_architecture'}
+
+def scanned_tables(plan: List[str]) -> List[str]:
+    """
+    Таблицы, которые план просматривает целиком (строки SCAN без индекса)
+    """
+    return [line.split()[1] for line in plan if line.startswith('SCAN ') and 'INDEX' not in line]
+
+def capture_analysis_queries(analyzer: DataAnalyzer) -> List[tuple]:
+    """
+    Выполняет полный анализ и возвращает выполненные запросы с параметрами
+    """
+    engine = analyzer.session.get_bind()
+    statements = []
+
+    def on_execute(connection, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        analyzer.run_full_analysis()
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+    return statements
+
+def explain_query_plans(analyzer: DataAnalyzer = None) -> List[Dict]:
+    """
+    Планы всех запросов анализа: текст запроса, строки плана и полные
+    просмотры таблиц (пустой список - запрос идет по индексам)
+    """
+    # Без кэша: иначе вместо запросов анализа попадут запросы к analysis_cache
+    analyzer = analyzer or DataAnalyzer(use_cache=False)
+    engine = analyzer.session.get_bind()
+    if engine.dialect.name != 'sqlite':
+        raise RuntimeError("Проверка планов поддерживается только для SQLite")
+
+    plans = []
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for statement, parameters in capture_analysis_queries(analyzer):
+            plan = [row[3] for row in cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            plans.append({
+                'query': ' '.join(statement.split()),
+                'plan': plan,
+                'full_scans': [table for table in scanned_tables(plan) if table not in FULL_SCAN_TABLES]
+            })
+    finally:
+        connection.close()
+    return plans
+
+def main():
+    """
+    Печатает планы запросов; код возврата 1, если какой-то запрос
+    просматривает таблицу целиком
+    """
+    init_database()
+    # Без статистики планировщик SQLite выбирает планы как для пустых таблиц
+    with get_engine().begin() as connection:
+        connection.execute(text('ANALYZE'))
+    plans = explain_query_plans()
+    for entry in plans:
+        status = 'полный просмотр' if entry['full_scans'] else 'по индексу'
+        print(f"[{status}] {entry['query'][:100]}")
+        for line in entry['plan']:
+            print(f"    {line}")
+
+    failed = [entry for entry in plans if entry['full_scans']]
+    print(f"\nЗапросов: {len(plans)}, с полным просмотром таблиц: {len(failed)}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк режимов DataAnalyzer.run_full_analysis на синтетической базе
+SQLite (папка сбора данных из bench_sqlite_profile). Для каждого режима
+печатается лучшее время из нескольких запусков без кэша результатов и
+проверяется, что результаты совпадают с режимом 'sql'. Отдельно замеряется
+повторный запуск с кэшем analysis_cache ('sql+cache')
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database_tools'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis'))
+
+from bench_sqlite_profile import build_data_dir, SYSTEMS
+
+MODES = ['sql', 'single_pass', 'parallel']
+RUNS = 5
+
+def _comparable(results: dict) -> dict:
+    """
+    Результаты без порядка строк с равными счетчиками (в SQL он не определен)
+    """
+    return {
+        key: sorted(value, key=lambda row: json.dumps(row, sort_keys=True, default=str))
+        if isinstance(value, list) else value
+        for key, value in results.items()
+    }
+
+def run_modes(data_dir: str):
+    """
+    Загружает папку в пустую базу и замеряет режимы анализа; печатает JSON
+    """
+    logging.disable(logging.INFO)
+    from data_loader import DataLoader
+    from data_analysis import DataAnalyzer
+
+    DataLoader(workers=1).load_all_data(data_dir)
+    analyzer = DataAnalyzer(use_cache=False)
+    reference = _comparable(analyzer.run_full_analysis(mode='sql'))
+
+    timings = {}
+    for mode in MODES:
+        best = None
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            results = analyzer.run_full_analysis(mode=mode)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[mode] = {'seconds': best, 'same_results': _comparable(results) == reference}
+
+    # Первый запуск заполняет кэш, дальше результаты берутся из него
+    DataAnalyzer().run_full_analysis()
+    best = None
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        results = DataAnalyzer().run_full_analysis()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    timings['sql+cache'] = {'seconds': best, 'same_results': _comparable(results) == reference}
+    print(json.dumps(timings))
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = os.path.join(tmp_dir, 'data_collection')
+        build_data_dir(data_dir)
+        env = dict(os.environ, DB_TYPE='sqlite', SQLITE_DB=os.path.join(tmp_dir, 'analysis.db'))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), data_dir],
+                                capture_output=True, text=True, check=True, env=env).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Систем: {SYSTEMS}, лучший из {RUNS} запусков")
+    for mode, result in timings.items():
+        same = 'совпадают' if result['same_results'] else 'ОТЛИЧАЮТСЯ'
+        print(f"{mode:14} {result['seconds'] * 1000:8.1f} мс, результаты с 'sql': {same}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_modes(sys.argv[1])
+    else:
+        main()
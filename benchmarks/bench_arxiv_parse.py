@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк разбора Atom-ленты arXiv: прежний парсер (тело ответа целиком,
+ET.fromstring + поиск .//) и потоковый PapersScraper._query_arxiv (разбор
+response.raw по мере чтения из сокета) на синтетической ленте из 10 000 статей,
+которую отдает локальный HTTP-сервер. Каждый режим запускается в отдельном
+процессе, чтобы честно измерить пиковый RSS
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import threading
+import subprocess
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'data_collection', 'group3_papers'))
+
+ENTRIES = 10000
+
+def build_feed(entries: int) -> bytes:
+    """
+    Синтетическая лента в формате ответа arXiv API
+    """
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" '
+        'xmlns:arxiv="http://arxiv.org/schemas/atom">'
+        f'<title>ArXiv Query</title><opensearch:totalResults>{entries}</opensearch:totalResults>'
+    ]
+    summary = ("We propose an end-to-end speech recognition model based on the conformer architecture. "
+               "It reaches a WER of 2.1% on LibriSpeech test-clean and a CER of 4.5 on Common Voice. ") * 4
+    for i in range(entries):
+        parts.append(
+            f'<entry><id>http://arxiv.org/abs/2401.{i:05d}v1</id>'
+            f'<updated>2024-01-02T00:00:00Z</updated><published>2024-01-01T00:00:00Z</published>'
+            f'<title>Conformer speech recognition study {i}</title><summary>{summary}</summary>'
+            f'<author><name>First Author</name></author><author><name>Second Author</name></author>'
+            f'<arxiv:primary_category term="eess.AS"/>'
+            f'<link href="http://arxiv.org/abs/2401.{i:05d}v1" rel="alternate" type="text/html"/>'
+            f'<link title="pdf" href="http://arxiv.org/pdf/2401.{i:05d}v1" rel="related" type="application/pdf"/>'
+            f'</entry>'
+        )
+    parts.append('</feed>')
+    return ''.join(parts).encode('utf-8')
+
+def legacy_parse(scraper, xml_content: str):
+    """
+    Прежний способ: полное дерево документа и поиск записей через .//
+    """
+    root = ET.fromstring(xml_content)
+    return [scraper.extract_paper_data(entry)
+            for entry in root.findall('.//{http://www.w3.org/2005/Atom}entry')]
+
+def serve_feed(content: bytes) -> ThreadingHTTPServer:
+    """
+    Локальный сервер, который отдает ленту порциями по 16 КБ
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/atom+xml')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            for offset in range(0, len(content), 16384):
+                self.wfile.write(content[offset:offset + 16384])
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_mode(mode: str):
+    """
+    Загружает и разбирает ленту в текущем процессе и печатает результат в JSON
+    """
+    from papers_scraper import PapersScraper
+
+    logging.getLogger().setLevel(logging.WARNING)
+    scraper = PapersScraper(cache_path=None)
+    scraper.http.rate_limiter = None
+    server = serve_feed(build_feed(ENTRIES))
+    scraper.arxiv_base_url = f'http://127.0.0.1:{server.server_address[1]}/api/query'
+
+    started = time.perf_counter()
+    if mode == 'legacy':
+        response = scraper.http.get(scraper.arxiv_base_url)
+        count = len(legacy_parse(scraper, response.content.decode('utf-8')))
+    else:
+        papers, _ = scraper._query_arxiv({}, 'бенчмарк')
+        count = sum(1 for _ in papers)
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    print(json.dumps({
+        'entries': count,
+        'entries_per_second': count / elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+def main():
+    results = {}
+    for mode in ('legacy', 'stream'):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), mode],
+                                capture_output=True, text=True, check=True).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Статей в ленте: {ENTRIES}")
+    for mode, title in (('legacy', 'ET.fromstring + .//'), ('stream', 'iterparse(raw)')):
+        result = results[mode]
+        print(f"{title:20} {result['entries_per_second']:8.0f} статей/с, "
+              f"пиковый RSS {result['peak_rss_mb']:.1f} МБ")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_mode(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк загрузки систем в БД: прежний построчный путь через ORM (flush на
+каждую запись) и пакетный DataLoader (Core executemany) на синтетическом
+файле моделей. Каждый режим работает в отдельном процессе со своей базой SQLite
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import subprocess
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database_tools'))
+
+SYSTEMS = 100000
+
+def build_models_file(path: str, count: int):
+    """
+    Синтетический models_data_*.jsonl в формате группы 1
+    """
+    architectures = ['whisper', 'wav2vec2', 'conformer', 'fastspeech2', 'tacotron2']
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            is_tts = i % 3 == 0
+            record = {
+                'model_name': f'org{i % 500}/model-{i}',
+                'author_organization': f'org{i % 500}',
+                'description': 'Synthetic speech model for the loading benchmark',
+                'model_url': f'https://huggingface.co/org{i % 500}/model-{i}',
+                'license': 'apache-2.0',
+                'architecture': architectures[i % len(architectures)],
+                'languages': ['en', 'ru'] if i % 2 else ['en'],
+                'downloads': i * 7,
+                'created_date': f'20{18 + i % 7}-01-01T00:00:00Z',
+                'system_type': 'TTS' if is_tts else 'ASR',
+                'pipeline_tags': ['text-to-speech'] if is_tts else ['automatic-speech-recognition'],
+                'papers': [{'arxiv_link': f'https://arxiv.org/abs/2401.{i % 10000:05d}'}] if i % 4 == 0 else []
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+def run_mode(mode: str, models_file: str):
+    """
+    Загружает файл в пустую базу и печатает результат в JSON
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    from sqlalchemy import func
+    from database_config import init_database
+    from data_loader import DataLoader
+    from models import System, SystemPaper
+
+    init_database()
+    loader = DataLoader(bulk=(mode == 'bulk'))
+    loader.load_vocabulary_types()
+    loader.load_functional_purposes()
+
+    started = time.perf_counter()
+    loader.load_systems_from_json(models_file)
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        'systems': loader.session.query(func.count(System.id)).scalar(),
+        'papers': loader.session.query(func.count(SystemPaper.id)).scalar(),
+        'rows_per_second': SYSTEMS / elapsed,
+        'seconds': elapsed
+    }))
+
+def main():
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        models_file = os.path.join(tmp_dir, 'models_data_bench.jsonl')
+        build_models_file(models_file, SYSTEMS)
+        for mode in ('legacy', 'bulk'):
+            env = dict(os.environ, DB_TYPE='sqlite', SQLITE_DB=os.path.join(tmp_dir, f'{mode}.db'))
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), mode, models_file],
+                                    capture_output=True, text=True, check=True, env=env).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Систем в файле: {SYSTEMS}")
+    for mode, title in (('legacy', 'ORM + flush'), ('bulk', 'Core executemany')):
+        result = results[mode]
+        print(f"{title:18} {result['rows_per_second']:8.0f} систем/с, {result['seconds']:6.1f} с, "
+              f"в БД систем: {result['systems']}, статей: {result['papers']}")
+    print(f"Ускорение: {results['bulk']['rows_per_second'] / results['legacy']['rows_per_second']:.1f}x")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        run_mode(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк сбора моделей HuggingFaceScraper: последовательный и асинхронный режимы
+на локальном stub HTTP-сервере, имитирующем Hugging Face API
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'data_collection', 'group1_huggingface_models'))
+
+from huggingface_scraper import HuggingFaceScraper
+
+MODELS_PER_PIPELINE = 50
+LATENCY = 0.05  # Задержка ответа сервера на запрос деталей модели, секунды
+
+class StubHuggingFaceHandler(BaseHTTPRequestHandler):
+    """
+    Отдает список моделей по pipeline_tag и детали модели по ID
+    """
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path[len('/api/models'):].strip('/')
+        
+        if not path:
+            pipeline_tag = parse_qs(parsed.query).get('pipeline_tag', ['unknown'])[0]
+            body = [{'id': f'stub/{pipeline_tag}-{i}'} for i in range(MODELS_PER_PIPELINE)]
+        else:
+            time.sleep(LATENCY)
+            pipeline_tag = path.split('/')[-1].rsplit('-', 1)[0]
+            body = {
+                'id': path,
+                'author': 'stub',
+                'downloads': 1,
+                'pipeline_tag': pipeline_tag,
+                'tags': ['en', 'whisper'],
+                'cardData': {'description': ''}
+            }
+        
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    # Очередь по умолчанию (5) переполняется при параллельных подключениях,
+    # и часть из них ждет повторного SYN около секунды
+    request_queue_size = 128
+
+def run_mode(base_url: str, async_mode: bool) -> float:
+    """
+    Выполняет сбор в заданном режиме и возвращает скорость (моделей в секунду)
+    """
+    # Без кэша ответов и сохраненного состояния: оба режима должны ходить в сеть
+    scraper = HuggingFaceScraper(base_url=base_url, requests_per_second=1000, concurrency=20,
+                                 cache_path=None, state_path=None)
+    started = time.perf_counter()
+    if async_mode:
+        import asyncio
+        asyncio.run(scraper._collect_data_async())
+    else:
+        scraper._collect_data_sequential()
+    elapsed = time.perf_counter() - started
+    return scraper.crawl_stats['fetched_models'] / elapsed
+
+def main():
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    server = StubServer(('127.0.0.1', 0), StubHuggingFaceHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/models"
+    
+    try:
+        sequential = run_mode(base_url, async_mode=False)
+        concurrent = run_mode(base_url, async_mode=True)
+    finally:
+        server.shutdown()
+    
+    print(f"Моделей: {MODELS_PER_PIPELINE * 3}, задержка сервера: {LATENCY * 1000:.0f} мс")
+    print(f"Последовательный режим: {sequential:.1f} моделей/с")
+    print(f"Асинхронный режим:      {concurrent:.1f} моделей/с ({concurrent / sequential:.1f}x)")
+
+if __name__ == "__main__":
+    main()
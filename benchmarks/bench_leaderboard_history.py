@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк истории лидербордов: синтетические ежедневные снимки
+huggingface_leaderboard_*.json (в каждом небольшая доля систем меняет
+метрики, добавляются новые системы) загружаются DataLoader.load_leaderboard_history.
+Печатаются число строк истории против числа значений во всех снимках,
+время загрузки и время запросов "лидерборд на дату" и "движение в рейтинге".
+Загрузка работает в отдельном процессе со своей базой SQLite
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database_tools'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis'))
+
+SNAPSHOTS = 180
+MODELS = 300
+NEW_MODELS_PER_DAY = 1
+CHANGED_SHARE = 0.02
+DATASETS = ['ami', 'earnings22', 'gigaspeech', 'ls_clean', 'ls_other', 'spgispeech', 'tedlium', 'voxpopuli']
+QUERY_RUNS = 20
+
+def _result(model_name: str, wer: dict, rtfx: float) -> dict:
+    metrics = [{'type': 'Average WER', 'value': round(sum(wer.values()) / len(wer), 2), 'dataset_split': 'average'},
+               {'type': 'RTFx', 'value': rtfx, 'dataset_split': 'average'}]
+    metrics += [{'type': 'WER', 'value': value, 'dataset_split': dataset} for dataset, value in wer.items()]
+    return {'model_name': model_name, 'metrics': metrics}
+
+def build_snapshots(snapshots_dir: str) -> int:
+    """
+    Пишет SNAPSHOTS ежедневных снимков и возвращает общее число значений в них
+    """
+    rng = random.Random(0)
+    models = {}
+
+    def add_model(i):
+        models[f'org{i % 40}/asr-model-{i}'] = (
+            {dataset: round(rng.uniform(2, 30), 2) for dataset in DATASETS}, round(rng.uniform(10, 3000), 1))
+
+    for i in range(MODELS):
+        add_model(i)
+    started = datetime(2025, 1, 1, 6, 0, 0)
+    total_values = 0
+    for day in range(SNAPSHOTS):
+        for name in rng.sample(sorted(models), int(len(models) * CHANGED_SHARE)):
+            wer, rtfx = models[name]
+            dataset = rng.choice(DATASETS)
+            models[name] = (dict(wer, **{dataset: round(wer[dataset] * rng.uniform(0.9, 1.0), 2)}), rtfx)
+        for i in range(NEW_MODELS_PER_DAY):
+            add_model(MODELS + day * NEW_MODELS_PER_DAY + i)
+
+        results = [_result(name, wer, rtfx) for name, (wer, rtfx) in models.items()]
+        total_values += sum(len(result['metrics']) + 1 for result in results)
+        taken_at = (started + timedelta(days=day)).strftime('%Y%m%d_%H%M%S')
+        with open(os.path.join(snapshots_dir, f'huggingface_leaderboard_{taken_at}.json'), 'w', encoding='utf-8') as f:
+            json.dump([{'benchmark_name': 'Hugging Face ASR Leaderboard', 'source': 'huggingface',
+                        'results': results}], f)
+    return total_values
+
+def run_history(snapshots_dir: str):
+    """
+    Загружает снимки в пустую базу, замеряет запросы и печатает JSON
+    """
+    logging.disable(logging.INFO)
+    from database_config import init_database
+    from data_loader import DataLoader
+    from data_analysis import DataAnalyzer
+    from models import LeaderboardHistory
+
+    init_database()
+    loader = DataLoader()
+    started = time.perf_counter()
+    loader.load_leaderboard_history(snapshots_dir)
+    load_seconds = time.perf_counter() - started
+    history_rows = loader.session.query(LeaderboardHistory).count()
+
+    analyzer = DataAnalyzer(use_cache=False)
+    as_of_date = datetime(2025, 1, 1) + timedelta(days=SNAPSHOTS // 2)
+    timings = {}
+    for name, query in [('as_of', lambda: analyzer.get_leaderboard_as_of(as_of_date)),
+                        ('rank_movement', lambda: analyzer.get_rank_movement('org5/asr-model-5'))]:
+        best = None
+        for _ in range(QUERY_RUNS):
+            started = time.perf_counter()
+            rows = query()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = {'seconds': best, 'rows': len(rows)}
+    print(json.dumps({'load': load_seconds, 'history_rows': history_rows, 'queries': timings}))
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshots_dir = os.path.join(tmp_dir, 'group4_benchmarks')
+        os.makedirs(snapshots_dir)
+        total_values = build_snapshots(snapshots_dir)
+        env = dict(os.environ, DB_TYPE='sqlite', SQLITE_DB=os.path.join(tmp_dir, 'history.db'))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), snapshots_dir],
+                                capture_output=True, text=True, check=True, env=env).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Снимков: {SNAPSHOTS}, систем: {MODELS} + {NEW_MODELS_PER_DAY} в день, "
+          f"меняется в день: {CHANGED_SHARE:.0%}")
+    print(f"Значений во всех снимках: {total_values}, строк истории: {result['history_rows']} "
+          f"({total_values / result['history_rows']:.1f}x меньше)")
+    print(f"Загрузка снимков: {result['load']:.2f} с ({result['load'] / SNAPSHOTS * 1000:.1f} мс на снимок)")
+    for name, timing in result['queries'].items():
+        print(f"{name:14} {timing['seconds'] * 1000:8.1f} мс, строк: {timing['rows']}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_history(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк памяти при загрузке файла моделей в БД: прежнее чтение JSON
+целиком (json.load) и потоковое чтение DataLoader (по одному элементу массива)
+на файлах разного размера. Каждый запуск идет в отдельном процессе со своей
+базой SQLite, чтобы честно измерить пиковый RSS
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCH_DIR, '..', 'database_tools'))
+sys.path.append(BENCH_DIR)
+
+from bench_db_load import build_models_file
+
+SIZES = (50000, 200000)
+
+def build_json_file(jsonl_path: str, json_path: str):
+    """
+    Переписывает синтетический JSONL в один JSON-массив, не держа его в памяти
+    """
+    with open(jsonl_path, 'r', encoding='utf-8') as source, open(json_path, 'w', encoding='utf-8') as target:
+        target.write('[')
+        for i, line in enumerate(source):
+            target.write((',\n' if i else '\n') + line.strip())
+        target.write('\n]')
+
+def run_mode(mode: str, models_file: str):
+    """
+    Загружает файл в пустую базу и печатает результат в JSON
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    from database_config import init_database
+    from data_loader import DataLoader
+
+    if mode == 'legacy':
+        def load_whole(self, file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return iter(json.load(f))
+        DataLoader._iter_records = load_whole
+
+    init_database()
+    loader = DataLoader()
+    loader.load_vocabulary_types()
+    loader.load_functional_purposes()
+
+    started = time.perf_counter()
+    count = loader.load_systems_from_json(models_file)
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        'records': count,
+        'seconds': elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+def main():
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in SIZES:
+            jsonl_path = os.path.join(tmp_dir, f'models_{size}.jsonl')
+            json_path = os.path.join(tmp_dir, f'models_data_{size}.json')
+            build_models_file(jsonl_path, size)
+            build_json_file(jsonl_path, json_path)
+            file_mb = os.path.getsize(json_path) / 1e6
+            for mode in ('legacy', 'stream'):
+                env = dict(os.environ, DB_TYPE='sqlite', SQLITE_DB=os.path.join(tmp_dir, f'{mode}_{size}.db'))
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), mode, json_path],
+                                        capture_output=True, text=True, check=True, env=env).stdout
+                results[(mode, size)] = dict(json.loads(output.strip().splitlines()[-1]), file_mb=file_mb)
+
+    for size in SIZES:
+        print(f"Записей: {size} (JSON {results[('legacy', size)]['file_mb']:.0f} МБ)")
+        for mode, title in (('legacy', 'json.load целиком'), ('stream', 'потоковое чтение')):
+            result = results[(mode, size)]
+            print(f"  {title:18} пиковый RSS {result['peak_rss_mb']:7.1f} МБ, {result['seconds']:5.1f} с")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        run_mode(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк извлечения метрик из текстов статей: прежний перебор шаблонов
+и однопроходный metric_extraction.extract_metrics на сохраненных papers_data_*.
+В аннотациях arXiv числовых результатов почти нет, поэтому к каждой статье
+добавляется фиксированное предложение с результатами (RESULT_SENTENCES)
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import random
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_collection', 'group3_papers')
+sys.path.append(DATA_DIR)
+sys.path.append(os.path.join(DATA_DIR, '..'))
+
+from metric_extraction import extract_metrics
+from jsonl_io import iter_jsonl, is_jsonl
+
+REPEAT = 200  # Сохраненных статей немного, поэтому проходим по ним несколько раз
+
+# Предложения с результатами в формулировках, которые понимают оба варианта;
+# часть статей остается без метрик, как в реальных данных
+RESULT_SENTENCES = [
+    "On LibriSpeech test-clean the model reaches WER 2.7, and 6.4% WER on test-other.",
+    "Evaluated on Common Voice and Switchboard, it obtains CER: 3.9 and word error rate 11.2.",
+    "Listening tests give mos 4.21 against 4.05 for the baseline on VoxForge prompts.",
+    "The speech translation cascade achieves bleu score 27.3 on TED-LIUM talks.",
+    "Trained on WSJ, the recognizer attains character error rate 4.8 on eval92.",
+    ""
+]
+
+def legacy_extract_metrics(text: str):
+    """
+    Прежняя реализация: каждый шаблон отдельно, поиск датасета
+    заново для каждого найденного значения
+    """
+    metrics = []
+    text_lower = text.lower()
+    metric_patterns = {
+        'WER': [r'wer[:\s]*(\d+\.?\d*)\s*%?', r'word error rate[:\s]*(\d+\.?\d*)\s*%?', r'(\d+\.?\d*)\s*%?\s*wer'],
+        'CER': [r'cer[:\s]*(\d+\.?\d*)\s*%?', r'character error rate[:\s]*(\d+\.?\d*)\s*%?'],
+        'MOS': [r'mos[:\s]*(\d+\.?\d*)', r'mean opinion score[:\s]*(\d+\.?\d*)'],
+        'BLEU': [r'bleu[:\s]*(\d+\.?\d*)', r'bleu score[:\s]*(\d+\.?\d*)']
+    }
+    dataset_patterns = [r'librispeech', r'common voice', r'voxforge', r'ted-lium', r'wsj', r'switchboard']
+    for metric_type, patterns in metric_patterns.items():
+        for pattern in patterns:
+            for match in re.finditer(pattern, text_lower):
+                dataset = "unknown"
+                for dataset_pattern in dataset_patterns:
+                    if re.search(dataset_pattern, text_lower):
+                        dataset = dataset_pattern.replace('-', ' ').title()
+                        break
+                metrics.append({"type": metric_type, "value": float(match.group(1)),
+                                "dataset": dataset, "language": "en"})
+    return metrics
+
+def load_texts():
+    texts = []
+    for file_path in sorted(glob.glob(os.path.join(DATA_DIR, 'papers_data_*.json*'))):
+        if is_jsonl(file_path):
+            papers = iter_jsonl(file_path)
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                papers = json.load(f)
+        texts.extend(paper.get('summary', '') + " " + paper.get('paper_title', '') for paper in papers)
+    rng = random.Random(0)
+    return [text + " " + rng.choice(RESULT_SENTENCES) for text in texts]
+
+def measure(extract, texts):
+    found = 0
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        for text in texts:
+            found += len(extract(text))
+    elapsed = time.perf_counter() - started
+    return len(texts) * REPEAT / elapsed, found // REPEAT
+
+def main():
+    texts = load_texts()
+    if not texts:
+        print(f"Нет файлов papers_data_* в {DATA_DIR}")
+        return
+    size_mb = sum(len(text) for text in texts) / 1e6
+
+    legacy_rate, legacy_found = measure(legacy_extract_metrics, texts)
+    rate, found = measure(extract_metrics, texts)
+
+    with_metrics = sum(1 for text in texts if extract_metrics(text))
+    print(f"Статей: {len(texts)} ({size_mb:.2f} МБ текста), с метриками: {with_metrics}, проходов: {REPEAT}")
+    print(f"Прежний перебор шаблонов: {legacy_rate:8.0f} статей/с, найдено метрик: {legacy_found}")
+    print(f"Однопроходный движок:     {rate:8.0f} статей/с, найдено метрик: {found} ({rate / legacy_rate:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк профилей SQLite: стандартные настройки против профиля 'performance'
+(WAL, synchronous=NORMAL, кэш страниц, mmap) с профилем массовой загрузки.
+Замеряются DataLoader.load_all_data на синтетической папке сбора данных и
+DataAnalyzer.run_full_analysis, а также цена одной небольшой транзакции
+(так пишутся манифест и построчный путь загрузки). Каждый режим работает в отдельном процессе
+со своей базой SQLite
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database_tools'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis'))
+
+from bench_db_load import build_models_file
+
+SYSTEMS = 50000
+PAPERS = 20000
+BENCHMARK_RESULTS = 5000
+ANALYSIS_RUNS = 3
+COMMITS = 500
+
+MODES = {
+    'stock': {'SQLITE_PROFILE': 'default', 'SQLITE_BULK_LOAD': '0'},
+    'performance': {'SQLITE_PROFILE': 'performance', 'SQLITE_BULK_LOAD': '1'}
+}
+
+def build_data_dir(data_dir: str):
+    """
+    Синтетическая папка сбора данных со всеми четырьмя группами
+    """
+    groups = ['group1_huggingface_models', 'group2_datasets', 'group3_papers', 'group4_benchmarks']
+    for group in groups:
+        os.makedirs(os.path.join(data_dir, group), exist_ok=True)
+
+    build_models_file(os.path.join(data_dir, groups[0], 'models_data_bench.jsonl'), SYSTEMS)
+
+    with open(os.path.join(data_dir, groups[1], 'datasets_data_bench.json'), 'w', encoding='utf-8') as f:
+        json.dump([{'dataset_name': f'dataset-{i}', 'source': 'huggingface', 'language': 'en',
+                    'size_hours': i, 'license': 'cc-by-4.0'} for i in range(1000)], f)
+
+    with open(os.path.join(data_dir, groups[2], 'papers_data_bench.jsonl'), 'w', encoding='utf-8') as f:
+        for i in range(PAPERS):
+            metric_type = 'MOS' if i % 3 == 0 else 'WER'
+            record = {
+                'model_name': f'org{i % 500}/model-{i}',
+                'paper_title': f'Paper {i}',
+                'arxiv_link': f'https://arxiv.org/abs/2402.{i:05d}',
+                'publication_year': 2018 + i % 7,
+                'authors': ['A. Author', 'B. Author'],
+                'metrics': [{'type': metric_type, 'value': 1 + i % 40 / 10, 'dataset': dataset,
+                             'language': 'en'} for dataset in ('LibriSpeech', 'CommonVoice')]
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    with open(os.path.join(data_dir, groups[3], 'benchmarks_data_bench.json'), 'w', encoding='utf-8') as f:
+        json.dump([{
+            'benchmark_name': f'Leaderboard {b}',
+            'source': 'huggingface',
+            'results': [{'model_name': f'org{i % 500}/model-{i}', 'rank': i + 1,
+                         'metrics': [{'type': 'WER', 'value': 2 + i / 1000, 'dataset_split': 'test'}]}
+                        for i in range(BENCHMARK_RESULTS)]
+        } for b in range(2)], f)
+
+def run_mode(data_dir: str):
+    """
+    Загружает папку в пустую базу, выполняет анализ и печатает замеры в JSON
+    """
+    logging.disable(logging.INFO)
+    from data_loader import DataLoader
+    from data_analysis import DataAnalyzer
+
+    started = time.perf_counter()
+    DataLoader(workers=1).load_all_data(data_dir)
+    load_seconds = time.perf_counter() - started
+
+    analysis_seconds = []
+    for _ in range(ANALYSIS_RUNS):
+        started = time.perf_counter()
+        DataAnalyzer(use_cache=False).run_full_analysis()
+        analysis_seconds.append(time.perf_counter() - started)
+
+    from sqlalchemy import text
+    from database_config import get_engine
+    engine = get_engine()
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE bench_commits (value INTEGER)'))
+    started = time.perf_counter()
+    for i in range(COMMITS):
+        with engine.begin() as connection:
+            connection.execute(text('INSERT INTO bench_commits VALUES (:value)'), {'value': i})
+    commit_ms = (time.perf_counter() - started) / COMMITS * 1000
+
+    print(json.dumps({'load': load_seconds, 'analysis': min(analysis_seconds), 'commit_ms': commit_ms}))
+
+def main():
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = os.path.join(tmp_dir, 'data_collection')
+        build_data_dir(data_dir)
+        for mode, settings in MODES.items():
+            env = dict(os.environ, DB_TYPE='sqlite', SQLITE_DB=os.path.join(tmp_dir, f'{mode}.db'), **settings)
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), data_dir],
+                                    capture_output=True, text=True, check=True, env=env).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Систем: {SYSTEMS}, статей: {PAPERS}, результатов лидербордов: {2 * BENCHMARK_RESULTS}")
+    print(f"{'Профиль':14} {'load_all_data, с':>18} {'run_full_analysis, с':>22} {'транзакция, мс':>16}")
+    for mode, result in results.items():
+        print(f"{mode:14} {result['load']:18.2f} {result['analysis']:22.3f} {result['commit_ms']:16.3f}")
+    print(f"Ускорение загрузки: {results['stock']['load'] / results['performance']['load']:.1f}x, "
+          f"анализа: {results['stock']['analysis'] / results['performance']['analysis']:.1f}x, "
+          f"транзакции: {results['stock']['commit_ms'] / results['performance']['commit_ms']:.1f}x")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_mode(sys.argv[1])
+    else:
+        main()
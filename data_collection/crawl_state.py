@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Контрольные точки постраничного обхода API в SQLite:
+позиция (URL следующей страницы) по каждому потоку обхода,
+дата последнего изменения и сырая запись (ответ API) по каждому объекту
+"""
+
+import json
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Optional
+
+class CrawlState:
+    """
+    Состояние обхода, переживающее перезапуск скрипта.
+    Прерванный обход продолжается с последней сохраненной страницы;
+    завершенный обход начинается заново, но детали запрашиваются только
+    для объектов, у которых изменилась дата last_modified.
+    path=None хранит состояние в памяти (без возобновления).
+    Обход начинается вызовом begin_run(); без него run_id указывает
+    на последний обход, и его записи можно перечитать без сети.
+    """
+    def __init__(self, path: Optional[str]):
+        self.path = path or ':memory:'
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawl_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS crawl_streams (
+                stream TEXT PRIMARY KEY,
+                next_url TEXT,
+                done INTEGER NOT NULL DEFAULT 0,
+                pages INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS crawl_items (
+                item_id TEXT PRIMARY KEY,
+                last_modified TEXT,
+                record TEXT,
+                seen_run INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_crawl_items_run ON crawl_items(seen_run);
+        """)
+        self._conn.commit()
+        self.run_id = int(self._get_meta('run_id') or 0)
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM crawl_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Any):
+        self._conn.execute("INSERT OR REPLACE INTO crawl_meta (key, value) VALUES (?, ?)",
+                           (key, None if value is None else str(value)))
+
+    def begin_run(self) -> int:
+        """
+        Продолжает незавершенный обход или начинает новый
+        """
+        with self._lock:
+            run_id = self._get_meta('run_id')
+            if run_id is not None and self._get_meta('run_finished') is None:
+                logging.info(f"Возобновляем прерванный обход #{run_id}")
+                self.run_id = int(run_id)
+                return self.run_id
+
+            self.run_id = int(run_id or 0) + 1
+            self._set_meta('run_id', self.run_id)
+            self._set_meta('run_started', datetime.now().isoformat())
+            self._conn.execute("DELETE FROM crawl_meta WHERE key = 'run_finished'")
+            self._conn.execute("DELETE FROM crawl_streams")
+            self._conn.commit()
+            return self.run_id
+
+    def get_position(self, stream: str) -> Dict[str, Any]:
+        """
+        Возвращает {'next_url', 'done', 'pages'} потока; для нового потока next_url=None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT next_url, done, pages FROM crawl_streams WHERE stream = ?", (stream,)
+            ).fetchone()
+        if row is None:
+            return {'next_url': None, 'done': False, 'pages': 0}
+        return {'next_url': row[0], 'done': bool(row[1]), 'pages': row[2]}
+
+    def last_modified(self, item_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Известные даты изменения объектов, у которых сохранена запись
+        """
+        if not item_ids:
+            return {}
+        with self._lock:
+            placeholders = ','.join('?' * len(item_ids))
+            rows = self._conn.execute(
+                f"SELECT item_id, last_modified FROM crawl_items "
+                f"WHERE record IS NOT NULL AND item_id IN ({placeholders})",
+                item_ids
+            ).fetchall()
+        return dict(rows)
+
+    def commit_page(self, stream: str, listed: Dict[str, Optional[str]],
+                    records: Dict[str, Dict], next_url: Optional[str]):
+        """
+        Атомарно сохраняет результат страницы: даты изменения всех
+        перечисленных объектов, новые записи и позицию следующей страницы.
+        Даты обновляются только вместе с записью, чтобы объект с неудачным
+        запросом деталей был запрошен снова при следующем обходе.
+        """
+        with self._lock:
+            for item_id in listed:
+                if item_id in records:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO crawl_items (item_id, last_modified, record, seen_run) "
+                        "VALUES (?, ?, ?, ?)",
+                        (item_id, listed[item_id], json.dumps(records[item_id], ensure_ascii=False), self.run_id)
+                    )
+                else:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO crawl_items (item_id, last_modified, record, seen_run) "
+                        "VALUES (?, NULL, NULL, ?)",
+                        (item_id, self.run_id)
+                    )
+                    self._conn.execute("UPDATE crawl_items SET seen_run = ? WHERE item_id = ?",
+                                       (self.run_id, item_id))
+            self._conn.execute(
+                "INSERT INTO crawl_streams (stream, next_url, done, pages) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(stream) DO UPDATE SET next_url = excluded.next_url, "
+                "done = excluded.done, pages = pages + 1",
+                (stream, next_url, int(next_url is None))
+            )
+            self._conn.commit()
+
+    def finish_run(self):
+        with self._lock:
+            self._set_meta('run_finished', datetime.now().isoformat())
+            self._conn.commit()
+
+    def iter_run_records(self, batch_size: int = 500) -> Iterator[Dict]:
+        """
+        Лениво перебирает записи всех объектов, встреченных в текущем обходе
+        (и перезапрошенных, и неизмененных с прошлого раза)
+        """
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, record FROM crawl_items "
+                    "WHERE seen_run = ? AND record IS NOT NULL AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (self.run_id, last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for _, record in rows:
+                yield json.loads(record)
+            last_rowid = rows[-1][0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
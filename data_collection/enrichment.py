@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Этап обогащения: обработка сырых записей (ответов API) CPU-ёмкими функциями
+извлечения в пуле процессов, порциями и с сохранением порядка записей
+"""
+
+import os
+from itertools import islice
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+def _enrich_chunk(func: Callable[[Dict], Optional[Dict]], chunk: List[Dict]) -> List[Dict]:
+    results = []
+    for record in chunk:
+        enriched = func(record)
+        if enriched:
+            results.append(enriched)
+    return results
+
+def _chunks(records: Iterable[Dict], chunk_size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def enrich_records(records: Iterable[Dict], func: Callable[[Dict], Optional[Dict]],
+                   workers: int = None, chunk_size: int = 200) -> Iterator[Dict]:
+    """
+    Применяет func к каждой записи и лениво возвращает непустые результаты
+    в исходном порядке. func должна быть функцией уровня модуля (передается
+    в дочерние процессы). Одновременно в работе не больше 2 * workers порций,
+    поэтому память не растет с объемом входа. workers=1 - без пула процессов.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in _chunks(records, chunk_size):
+            yield from _enrich_chunk(func, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(records, chunk_size):
+            pending.append(pool.submit(_enrich_chunk, func, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
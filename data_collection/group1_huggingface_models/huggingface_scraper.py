@@ -6,11 +6,25 @@
 
 import requests
 import json
-import time
+import os
+import sys
+import asyncio
 from datetime import datetime
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from http_client import HttpClient, AsyncHttpClient, TokenBucket
+from http_cache import ResponseCache, DEFAULT_CACHE_PATH
+from crawl_state import CrawlState
+from jsonl_io import JsonlWriter
+from enrichment import enrich_records
+import model_enrichment
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crawl_state.sqlite')
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -22,174 +36,290 @@ logging.basicConfig(
 )
 
 class HuggingFaceScraper:
-    def __init__(self):
-        self.base_url = "https://huggingface.co/api/models"
+    def __init__(self, base_url: str = "https://huggingface.co/api/models",
+                 requests_per_second: float = 5.0, concurrency: int = 10,
+                 cache_path: str = DEFAULT_CACHE_PATH, offline: bool = False,
+                 state_path: str = DEFAULT_STATE_PATH, page_size: int = 100,
+                 compression: str = None, enrich_workers: int = None):
+        self.base_url = base_url
         self.headers = {
             'User-Agent': 'ASR-TTS-Research/1.0'
         }
-        self.collected_data = []
+        self.compression = compression
+        # Число процессов этапа обогащения (None - по числу ядер)
+        self.enrich_workers = enrich_workers
+        self.async_metrics = None
+        self.concurrency = concurrency
+        self.rate_limiter = TokenBucket(requests_per_second)
+        # Кэш ответов: при повторном запуске неизмененные модели приходят как 304;
+        # cache_path=None отключает кэш
+        self.cache = ResponseCache(cache_path, offline=offline) if cache_path else None
+        self.http = HttpClient(headers=self.headers, rate_limiter=self.rate_limiter, cache=self.cache)
+        # Контрольные точки обхода: прерванный сбор продолжается с последней страницы,
+        # детали запрашиваются только для моделей с новым lastModified.
+        # В состоянии хранятся сырые ответы API, поля записи извлекаются при сохранении
+        self.state = CrawlState(state_path)
+        self.page_size = page_size
+        self.crawl_complete = True
+        self.crawl_stats = {'pages': 0, 'listed_models': 0, 'fetched_models': 0, 'unchanged_models': 0}
+        self.pipeline_tags = [
+            'automatic-speech-recognition',
+            'text-to-speech', 
+            'audio-to-audio'
+        ]
         
-    def get_models_by_pipeline(self, pipeline_tag: str, limit: int = 100) -> List[Dict]:
+    def get_models_page(self, pipeline_tag: str, page_url: str = None) -> Optional[Tuple[List[Dict], Optional[str]]]:
         """
-        Получает модели по типу пайплайна
+        Получает одну страницу списка моделей по типу пайплайна.
+        Возвращает (модели, URL следующей страницы из заголовка Link)
+        или None при ошибке
         """
-        params = {
-            'pipeline_tag': pipeline_tag,
-            'limit': limit,
-            'sort': 'downloads',
-            'direction': -1
-        }
+        params = None
+        if page_url is None:
+            page_url = self.base_url
+            params = {
+                'pipeline_tag': pipeline_tag,
+                'limit': self.page_size,
+                'sort': 'downloads',
+                'direction': -1,
+                # Для планирования обхода из списка нужна только дата изменения
+                'expand[]': 'lastModified'
+            }
         
         try:
-            response = requests.get(self.base_url, params=params, headers=self.headers)
+            response = self.http.get(page_url, params=params)
             response.raise_for_status()
-            return response.json()
+            return response.json(), response.links.get('next', {}).get('url')
         except requests.RequestException as e:
             logging.error(f"Ошибка при получении данных для {pipeline_tag}: {e}")
-            return []
+            return None
+    
+    def get_models_by_pipeline(self, pipeline_tag: str, limit: int = 100) -> List[Dict]:
+        """
+        Получает модели по типу пайплайна, следуя по страницам,
+        пока не наберется limit моделей (limit=None - весь каталог)
+        """
+        models = []
+        page_url = None
+        while limit is None or len(models) < limit:
+            page = self.get_models_page(pipeline_tag, page_url)
+            if page is None:
+                break
+            page_models, page_url = page
+            models.extend(page_models)
+            if not page_url:
+                break
+        return models if limit is None else models[:limit]
     
     def get_model_details(self, model_id: str) -> Dict[str, Any]:
         """
         Получает детальную информацию о модели
         """
-        url = f"https://huggingface.co/api/models/{model_id}"
+        url = f"{self.base_url}/{model_id}"
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(url)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             logging.error(f"Ошибка при получении деталей модели {model_id}: {e}")
             return {}
     
-    def extract_model_data(self, model_info: Dict) -> Dict[str, Any]:
+    async def get_model_details_async(self, http: AsyncHttpClient, model_id: str) -> Dict[str, Any]:
         """
-        Извлекает нужные данные из информации о модели
-        """
-        # Определяем тип системы на основе pipeline_tag
-        pipeline_tags = model_info.get('pipeline_tag', [])
-        system_type = "unknown"
-        if 'automatic-speech-recognition' in pipeline_tags:
-            system_type = "ASR"
-        elif 'text-to-speech' in pipeline_tags:
-            system_type = "TTS"
-        elif 'audio-to-audio' in pipeline_tags:
-            system_type = "Audio-to-Audio"
-        
-        # Извлекаем языки из тегов
-        languages = []
-        tags = model_info.get('tags', [])
-        for tag in tags:
-            if len(tag) == 2 and tag.islower():  # Код языка ISO
-                languages.append(tag)
-        
-        # Определяем архитектуру из тегов
-        architecture = "unknown"
-        for tag in tags:
-            if any(arch in tag.lower() for arch in ['transformer', 'whisper', 'wav2vec', 'tacotron', 'fastspeech']):
-                architecture = tag
-                break
+        Асинхронно получает детальную информацию о модели
+        """
+        url = f"{self.base_url}/{model_id}"
         
-        return {
-            "model_name": model_info.get('id', ''),
-            "author_organization": model_info.get('author', ''),
-            "system_type": system_type,
-            "architecture": architecture,
-            "downloads": model_info.get('downloads', 0),
-            "languages": languages,
-            "license": model_info.get('license', ''),
-            "created_date": model_info.get('created_at', ''),
-            "last_modified": model_info.get('last_modified', ''),
-            "description": model_info.get('cardData', {}).get('description', ''),
-            "pipeline_tags": pipeline_tags,
-            "tags": tags,
-            "model_url": f"https://huggingface.co/{model_info.get('id', '')}",
-            "papers": self.extract_papers(model_info)
-        }
+        try:
+            response = await http.get(url)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            logging.error(f"Ошибка при получении деталей модели {model_id}: {e}")
+            return {}
+    
+    def extract_model_data(self, model_info: Dict) -> Dict[str, Any]:
+        """
+        Извлекает нужные данные из информации о модели (см. model_enrichment)
+        """
+        return model_enrichment.extract_model_data(model_info)
     
     def extract_papers(self, model_info: Dict) -> List[Dict]:
         """
-        Извлекает информацию о научных статьях
+        Извлекает информацию о научных статьях (см. model_enrichment)
+        """
+        return model_enrichment.extract_papers(model_info)
+    
+    def collect_data(self, async_mode: bool = True):
+        """
+        Основной метод сбора данных. По умолчанию детали моделей
+        запрашиваются асинхронно; async_mode=False - последовательный сбор
         """
-        papers = []
-        card_data = model_info.get('cardData', {})
+        if async_mode:
+            asyncio.run(self._collect_data_async())
+        else:
+            self._collect_data_sequential()
         
-        # Ищем ссылки на arXiv в описании
-        description = card_data.get('description', '')
-        if 'arxiv.org' in description:
-            # Простое извлечение ссылок на arXiv
-            import re
-            arxiv_links = re.findall(r'https://arxiv\.org/abs/\d+\.\d+', description)
-            for link in arxiv_links:
-                papers.append({
-                    "arxiv_link": link,
-                    "source": "description"
-                })
+        # Сохраняем данные
+        self.save_data()
+    
+    def _iter_pages(self, pipeline_tag: str):
+        """
+        Перебирает страницы пайплайна, начиная с сохраненной позиции.
+        При ошибке обход пайплайна останавливается, а позиция остается
+        в состоянии для следующего запуска
+        """
+        position = self.state.get_position(pipeline_tag)
+        if position['done']:
+            logging.info(f"Пайплайн {pipeline_tag} уже обойден в этом запуске")
+            return
+        if position['next_url']:
+            logging.info(f"Продолжаем {pipeline_tag} со страницы {position['pages'] + 1}")
         
-        return papers
+        page_url = position['next_url']
+        while True:
+            page = self.get_models_page(pipeline_tag, page_url)
+            if page is None:
+                self.crawl_complete = False
+                return
+            models, page_url = page
+            yield models, page_url
+            if not page_url:
+                return
     
-    def collect_data(self):
+    def _plan_page(self, models: List[Dict]) -> Tuple[Dict[str, Optional[str]], List[str]]:
         """
-        Основной метод сбора данных
+        Возвращает даты изменения моделей страницы и список моделей,
+        для которых нужно запросить детали (новые или измененные)
         """
-        pipeline_tags = [
-            'automatic-speech-recognition',
-            'text-to-speech', 
-            'audio-to-audio'
+        listed = {
+            model['id']: model.get('lastModified')
+            for model in models if model.get('id')
+        }
+        known = self.state.last_modified(list(listed))
+        changed = [
+            model_id for model_id, last_modified in listed.items()
+            if model_id not in known or not last_modified or not known[model_id]
+            or last_modified > known[model_id]
         ]
-        
-        for pipeline_tag in pipeline_tags:
+        self.crawl_stats['pages'] += 1
+        self.crawl_stats['listed_models'] += len(listed)
+        self.crawl_stats['fetched_models'] += len(changed)
+        self.crawl_stats['unchanged_models'] += len(listed) - len(changed)
+        return listed, changed
+    
+    def _finish_crawl(self):
+        """
+        Фиксирует завершение обхода
+        """
+        if self.crawl_complete:
+            self.state.finish_run()
+        else:
+            logging.warning("Обход прерван ошибкой; следующий запуск продолжит его с сохраненной позиции")
+    
+    def _collect_data_sequential(self):
+        """
+        Последовательный сбор: один запрос за раз
+        """
+        self.state.begin_run()
+        for pipeline_tag in self.pipeline_tags:
             logging.info(f"Собираем данные для {pipeline_tag}")
             
-            models = self.get_models_by_pipeline(pipeline_tag, limit=50)
-            
-            for model in models:
-                model_id = model.get('id')
-                if not model_id:
-                    continue
+            for models, next_url in self._iter_pages(pipeline_tag):
+                listed, changed = self._plan_page(models)
+                records = {}
                 
-                logging.info(f"Обрабатываем модель: {model_id}")
+                for model_id in changed:
+                    logging.info(f"Обрабатываем модель: {model_id}")
+                    
+                    # Получаем детальную информацию
+                    model_details = self.get_model_details(model_id)
+                    if model_details:
+                        records[model_id] = model_details
                 
-                # Получаем детальную информацию
-                model_details = self.get_model_details(model_id)
-                if model_details:
-                    extracted_data = self.extract_model_data(model_details)
-                    self.collected_data.append(extracted_data)
+                self.state.commit_page(pipeline_tag, listed, records, next_url)
+        
+        self._finish_crawl()
+    
+    async def _collect_data_async(self):
+        """
+        Асинхронный сбор: детали моделей каждой страницы запрашиваются
+        параллельно, не более self.concurrency одновременно и в пределах
+        лимита self.rate_limiter
+        """
+        self.state.begin_run()
+        async with AsyncHttpClient(headers=self.headers, concurrency=self.concurrency,
+                                   per_host_limit=self.concurrency,
+                                   rate_limiter=self.rate_limiter, cache=self.cache) as http:
+            for pipeline_tag in self.pipeline_tags:
+                logging.info(f"Собираем данные для {pipeline_tag}")
                 
-                # Пауза между запросами
-                time.sleep(1)
+                for models, next_url in self._iter_pages(pipeline_tag):
+                    listed, changed = self._plan_page(models)
+                    logging.info(f"Асинхронно обрабатываем {len(changed)} моделей "
+                                 f"(параллельно: {self.concurrency})")
+                    
+                    tasks = [
+                        self.get_model_details_async(http, model_id)
+                        for model_id in changed
+                    ]
+                    # gather сохраняет порядок моделей как в последовательном режиме
+                    details = await asyncio.gather(*tasks)
+                    records = {
+                        model_id: model_details
+                        for model_id, model_details in zip(changed, details) if model_details
+                    }
+                    self.state.commit_page(pipeline_tag, listed, records, next_url)
+            
+            self.async_metrics = http.get_metrics_summary()
         
-        # Сохраняем данные
-        self.save_data()
+        self._finish_crawl()
     
     def save_data(self):
         """
-        Сохраняет собранные данные в файлы
+        Этап обогащения и сохранение. Сырые ответы всех моделей обхода
+        (в том числе неизмененных с прошлого раза) потоково читаются
+        из состояния обхода, обрабатываются в пуле процессов и пишутся
+        в JSONL; сводка считается по ходу записи. Не обращается к сети,
+        поэтому после правки извлечения достаточно вызвать только его
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Сохраняем в JSON
-        with open(f'models_data_{timestamp}.json', 'w', encoding='utf-8') as f:
-            json.dump(self.collected_data, f, ensure_ascii=False, indent=2)
+        # Сохраняем в JSONL
+        system_types = Counter()
+        records = enrich_records(self.state.iter_run_records(), model_enrichment.extract_model_data,
+                                 workers=self.enrich_workers)
+        with JsonlWriter(f'models_data_{timestamp}.jsonl', compression=self.compression) as writer:
+            for record in records:
+                writer.write(record)
+                system_types[record['system_type']] += 1
         
         # Сохраняем сводку
         summary = {
-            "total_models": len(self.collected_data),
-            "asr_models": len([m for m in self.collected_data if m['system_type'] == 'ASR']),
-            "tts_models": len([m for m in self.collected_data if m['system_type'] == 'TTS']),
-            "audio_to_audio_models": len([m for m in self.collected_data if m['system_type'] == 'Audio-to-Audio']),
-            "collection_date": datetime.now().isoformat()
+            "total_models": writer.count,
+            "asr_models": system_types['ASR'],
+            "tts_models": system_types['TTS'],
+            "audio_to_audio_models": system_types['Audio-to-Audio'],
+            "collection_date": datetime.now().isoformat(),
+            "crawl": dict(self.crawl_stats, run_id=self.state.run_id, complete=self.crawl_complete),
+            "http_metrics": self.http.get_metrics_summary(),
+            "async_http_metrics": self.async_metrics
         }
         
         with open(f'collection_summary_{timestamp}.json', 'w', encoding='utf-8') as f:
             json.dump(summary, f, ensure_ascii=False, indent=2)
         
-        logging.info(f"Собрано {len(self.collected_data)} моделей")
-        logging.info(f"Данные сохранены в models_data_{timestamp}.json")
+        logging.info(f"Собрано {writer.count} моделей")
+        logging.info(f"Данные сохранены в {writer.path}")
 
 def main():
-    scraper = HuggingFaceScraper()
-    scraper.collect_data()
+    scraper = HuggingFaceScraper(offline='--offline' in sys.argv)
+    if '--enrich' in sys.argv:
+        # Повторное извлечение из сохраненных ответов последнего обхода, без сети
+        scraper.save_data()
+    else:
+        scraper.collect_data()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Этап обогащения для моделей Hugging Face: извлечение полей записи
+из сырого ответа API. Функции уровня модуля, чтобы их можно было
+выполнять в пуле процессов (enrichment.enrich_records)
+"""
+
+import re
+from typing import List, Dict, Any
+
+ARXIV_LINK_REGEX = re.compile(r'https://arxiv\.org/abs/\d+\.\d+')
+
+def extract_model_data(model_info: Dict) -> Dict[str, Any]:
+    """
+    Извлекает нужные данные из информации о модели
+    """
+    # Определяем тип системы на основе pipeline_tag
+    pipeline_tags = model_info.get('pipeline_tag', [])
+    system_type = "unknown"
+    if 'automatic-speech-recognition' in pipeline_tags:
+        system_type = "ASR"
+    elif 'text-to-speech' in pipeline_tags:
+        system_type = "TTS"
+    elif 'audio-to-audio' in pipeline_tags:
+        system_type = "Audio-to-Audio"
+
+    # Извлекаем языки из тегов
+    languages = []
+    tags = model_info.get('tags', [])
+    for tag in tags:
+        if len(tag) == 2 and tag.islower():  # Код языка ISO
+            languages.append(tag)
+
+    # Определяем архитектуру из тегов
+    architecture = "unknown"
+    for tag in tags:
+        if any(arch in tag.lower() for arch in ['transformer', 'whisper', 'wav2vec', 'tacotron', 'fastspeech']):
+            architecture = tag
+            break
+
+    return {
+        "model_name": model_info.get('id', ''),
+        "author_organization": model_info.get('author', ''),
+        "system_type": system_type,
+        "architecture": architecture,
+        "downloads": model_info.get('downloads', 0),
+        "languages": languages,
+        "license": model_info.get('license', ''),
+        "created_date": model_info.get('created_at', ''),
+        "last_modified": model_info.get('last_modified', ''),
+        "description": model_info.get('cardData', {}).get('description', ''),
+        "pipeline_tags": pipeline_tags,
+        "tags": tags,
+        "model_url": f"https://huggingface.co/{model_info.get('id', '')}",
+        "papers": extract_papers(model_info)
+    }
+
+def extract_papers(model_info: Dict) -> List[Dict]:
+    """
+    Извлекает информацию о научных статьях
+    """
+    papers = []
+    card_data = model_info.get('cardData', {})
+
+    # Ищем ссылки на arXiv в описании
+    description = card_data.get('description', '')
+    if 'arxiv.org' in description:
+        # Простое извлечение ссылок на arXiv
+        arxiv_links = ARXIV_LINK_REGEX.findall(description)
+        for link in arxiv_links:
+            papers.append({
+                "arxiv_link": link,
+                "source": "description"
+            })
+
+    return papers
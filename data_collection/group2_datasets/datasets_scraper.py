@@ -6,12 +6,20 @@
 
 import requests
 import json
-import time
+import os
+import sys
 from datetime import datetime
+from collections import Counter
 from typing import List, Dict, Any
 import logging
 import re
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from http_client import HttpClient, TokenBucket
+from http_cache import ResponseCache, DEFAULT_CACHE_PATH
+from jsonl_io import JsonlWriter
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -23,13 +31,20 @@ logging.basicConfig(
 )
 
 class DatasetsScraper:
-    def __init__(self):
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, offline: bool = False,
+                 compression: str = None):
         self.hf_base_url = "https://huggingface.co/api/datasets"
         self.openslr_base_url = "https://openslr.org"
         self.headers = {
             'User-Agent': 'ASR-TTS-Research/1.0'
         }
-        self.collected_data = []
+        self.compression = compression
+        self.writer = None
+        # Счетчики сводки обновляются по мере записи датасетов
+        self.counters = Counter()
+        self.cache = ResponseCache(cache_path, offline=offline) if cache_path else None
+        # Не более одного запроса в секунду к Hugging Face
+        self.http = HttpClient(headers=self.headers, rate_limiter=TokenBucket(1.0), cache=self.cache)
         
     def get_huggingface_datasets(self, limit: int = 100) -> List[Dict]:
         """
@@ -42,7 +57,7 @@ class DatasetsScraper:
         }
         
         try:
-            response = requests.get(self.hf_base_url, params=params, headers=self.headers)
+            response = self.http.get(self.hf_base_url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -56,7 +71,7 @@ class DatasetsScraper:
         url = f"https://huggingface.co/api/datasets/{dataset_id}"
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(url)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -192,10 +207,30 @@ class DatasetsScraper:
         
         return openslr_datasets
     
+    def add_dataset(self, dataset: Dict[str, Any]):
+        """
+        Сразу дописывает датасет в выходной файл и обновляет счетчики сводки
+        """
+        self.writer.write(dataset)
+        self.counters['total_datasets'] += 1
+        self.counters[f"{dataset['source']}_datasets"] += 1
+        self.counters['total_hours'] += dataset.get('size_hours') or 0
+        self.counters['total_gb'] += dataset.get('size_gb') or 0
+    
     def collect_data(self):
         """
         Основной метод сбора данных
         """
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.writer = JsonlWriter(f'datasets_data_{self.timestamp}.jsonl', compression=self.compression)
+        
+        with self.writer:
+            self._collect_datasets()
+        
+        # Сохраняем сводку
+        self.save_data()
+    
+    def _collect_datasets(self):
         # Собираем данные с Hugging Face
         logging.info("Собираем датасеты с Hugging Face")
         hf_datasets = self.get_huggingface_datasets(limit=50)
@@ -213,47 +248,35 @@ class DatasetsScraper:
                 extracted_data = self.extract_hf_dataset_data(dataset_details)
                 # Фильтруем только речевые датасеты
                 if extracted_data.get('dataset_type') == 'speech':
-                    self.collected_data.append(extracted_data)
-            
-            # Пауза между запросами
-            time.sleep(1)
+                    self.add_dataset(extracted_data)
         
         # Добавляем данные с OpenSLR
         logging.info("Добавляем датасеты с OpenSLR")
-        openslr_datasets = self.get_openslr_datasets()
-        self.collected_data.extend(openslr_datasets)
-        
-        # Сохраняем данные
-        self.save_data()
+        for dataset in self.get_openslr_datasets():
+            self.add_dataset(dataset)
     
     def save_data(self):
         """
-        Сохраняет собранные данные в файлы
+        Сохраняет сводку по сбору (сами датасеты уже записаны в JSONL)
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Сохраняем в JSON
-        with open(f'datasets_data_{timestamp}.json', 'w', encoding='utf-8') as f:
-            json.dump(self.collected_data, f, ensure_ascii=False, indent=2)
-        
-        # Сохраняем сводку
         summary = {
-            "total_datasets": len(self.collected_data),
-            "huggingface_datasets": len([d for d in self.collected_data if d['source'] == 'huggingface']),
-            "openslr_datasets": len([d for d in self.collected_data if d['source'] == 'openslr']),
-            "total_hours": sum([d.get('size_hours', 0) for d in self.collected_data if d.get('size_hours')]),
-            "total_gb": sum([d.get('size_gb', 0) for d in self.collected_data if d.get('size_gb')]),
-            "collection_date": datetime.now().isoformat()
+            "total_datasets": self.counters['total_datasets'],
+            "huggingface_datasets": self.counters['huggingface_datasets'],
+            "openslr_datasets": self.counters['openslr_datasets'],
+            "total_hours": self.counters['total_hours'],
+            "total_gb": self.counters['total_gb'],
+            "collection_date": datetime.now().isoformat(),
+            "http_metrics": self.http.get_metrics_summary()
         }
         
-        with open(f'collection_summary_{timestamp}.json', 'w', encoding='utf-8') as f:
+        with open(f'collection_summary_{self.timestamp}.json', 'w', encoding='utf-8') as f:
             json.dump(summary, f, ensure_ascii=False, indent=2)
         
-        logging.info(f"Собрано {len(self.collected_data)} датасетов")
-        logging.info(f"Данные сохранены в datasets_data_{timestamp}.json")
+        logging.info(f"Собрано {self.writer.count} датасетов")
+        logging.info(f"Данные сохранены в {self.writer.path}")
 
 def main():
-    scraper = DatasetsScraper()
+    scraper = DatasetsScraper(offline='--offline' in sys.argv)
     scraper.collect_data()
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Извлечение метрик (WER, CER, MOS, BLEU) из текста статей за один проход:
+все ключевые слова метрик собраны в одно регулярное выражение, значение
+берется якорным совпадением рядом с найденным словом, упоминания датасетов
+находятся одним проходом по тексту (только если в нем есть метрики),
+и каждая метрика связывается с ближайшим к ней упоминанием датасета
+"""
+
+import re
+from bisect import bisect_left
+from typing import List, Dict, Tuple
+
+# Ключевые слова метрик -> тип метрики
+METRIC_KEYWORDS = {
+    'word error rate': 'WER',
+    'wer': 'WER',
+    'character error rate': 'CER',
+    'cer': 'CER',
+    'mean opinion score': 'MOS',
+    'mos': 'MOS',
+    'bleu score': 'BLEU',
+    'bleu': 'BLEU'
+}
+
+# Метрики, значение которых может стоять и перед ключевым словом ("5.2% WER")
+VALUE_BEFORE_TYPES = {'WER'}
+
+# Датасеты и их названия в результатах
+DATASET_NAMES = {
+    'librispeech': 'Librispeech',
+    'common voice': 'Common Voice',
+    'voxforge': 'Voxforge',
+    'ted-lium': 'Ted Lium',
+    'wsj': 'Wsj',
+    'switchboard': 'Switchboard'
+}
+
+def _alternation(words) -> re.Pattern:
+    # Длинные фразы первыми, чтобы "bleu score" выигрывал у "bleu"
+    return re.compile('|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True)))
+
+# Одна альтернация без групп: именованные группы на каждую метрику
+# замедляют поиск в sre в несколько раз, тип определяется по словарю
+METRIC_REGEX = _alternation(METRIC_KEYWORDS)
+DATASET_REGEX = _alternation(DATASET_NAMES)
+
+VALUE_AFTER_REGEX = re.compile(r'[:\s]*(\d+\.?\d*)')
+VALUE_BEFORE_REGEX = re.compile(r'(\d+\.?\d*)\s*%?\s*$')
+VALUE_BEFORE_WINDOW = 32
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    """
+    Ключевое слово не должно быть частью другого слова ('lower', 'most', 'cancer')
+    """
+    return ((start == 0 or not text[start - 1].isalpha())
+            and (end == len(text) or not text[end].isalpha()))
+
+def find_datasets(text_lower: str) -> Tuple[List[int], List[Tuple[int, int, str]]]:
+    """
+    Возвращает начала упоминаний датасетов (для двоичного поиска)
+    и сами упоминания (начало, конец, название) в порядке следования
+    """
+    mentions = [
+        (match.start(), match.end(), DATASET_NAMES[match.group(0)])
+        for match in DATASET_REGEX.finditer(text_lower)
+    ]
+    return [mention[0] for mention in mentions], mentions
+
+def nearest_dataset(starts: List[int], mentions: List[Tuple[int, int, str]],
+                    start: int, end: int) -> str:
+    """
+    Датасет, ближайший к фрагменту [start, end); при равенстве - предыдущий
+    """
+    position = bisect_left(starts, start)
+    best_name, best_distance = "unknown", None
+    for candidate in (position - 1, position):
+        if 0 <= candidate < len(mentions):
+            mention_start, mention_end, name = mentions[candidate]
+            distance = max(mention_start - end, start - mention_end, 0)
+            if best_distance is None or distance < best_distance:
+                best_name, best_distance = name, distance
+    return best_name
+
+def find_metric_mentions(text_lower: str) -> List[Tuple[str, float, int, int]]:
+    """
+    Находит упоминания метрик: (тип, значение, начало, конец фрагмента)
+    """
+    mentions = []
+    for match in METRIC_REGEX.finditer(text_lower):
+        start, end = match.span()
+        if not _is_word_boundary(text_lower, start, end):
+            continue
+        metric_type = METRIC_KEYWORDS[match.group(0)]
+
+        after = VALUE_AFTER_REGEX.match(text_lower, end)
+        if after:
+            mentions.append((metric_type, float(after.group(1)), start, after.end()))
+
+        if metric_type in VALUE_BEFORE_TYPES:
+            window_start = max(0, start - VALUE_BEFORE_WINDOW)
+            before = VALUE_BEFORE_REGEX.search(text_lower, window_start, start)
+            if before:
+                mentions.append((metric_type, float(before.group(1)), before.start(), end))
+    return mentions
+
+def extract_metrics(text: str) -> List[Dict]:
+    """
+    Извлекает метрики из текста статьи за один проход
+    """
+    text_lower = text.lower()
+    mentions = find_metric_mentions(text_lower)
+    if not mentions:
+        return []
+
+    starts, datasets = find_datasets(text_lower)
+    return [
+        {
+            "type": metric_type,
+            "value": value,
+            "dataset": nearest_dataset(starts, datasets, start, end),
+            "language": "en"  # По умолчанию английский
+        }
+        for metric_type, value, start, end in mentions
+    ]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Этап обогащения для статей arXiv: тип системы, название модели и метрики
+по сырым полям записи (заголовок, аннотация). Функции уровня модуля,
+чтобы их можно было выполнять в пуле процессов (enrichment.enrich_records)
+"""
+
+from typing import Dict, Any
+
+from metric_extraction import extract_metrics
+
+# Известные названия моделей
+KNOWN_MODELS = [
+    'whisper', 'wav2vec', 'tacotron', 'fastspeech', 'tacotron2',
+    'waveglow', 'melgan', 'hifigan', 'conformer', 'transformer',
+    'listen attend and spell', 'deep speech', 'jasper', 'quartznet'
+]
+
+def determine_system_type(title: str, summary: str) -> str:
+    """
+    Определяет тип системы (ASR, TTS, etc.)
+    """
+    text = (title + " " + summary).lower()
+
+    if any(term in text for term in ['speech recognition', 'asr', 'automatic speech']):
+        return 'ASR'
+    elif any(term in text for term in ['text to speech', 'tts', 'speech synthesis', 'voice synthesis']):
+        return 'TTS'
+    elif any(term in text for term in ['voice cloning', 'voice conversion']):
+        return 'Voice Cloning'
+    else:
+        return 'Unknown'
+
+def extract_model_name(title: str, summary: str) -> str:
+    """
+    Извлекает название модели из заголовка или описания
+    """
+    # Ищем названия моделей в заголовке
+    title_lower = title.lower()
+
+    for model in KNOWN_MODELS:
+        if model in title_lower:
+            return model.title()
+
+    # Если не найдено, берем первые слова заголовка
+    words = title.split()[:3]
+    return ' '.join(words)
+
+def enrich_paper(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Дополняет сырую запись статьи типом системы, метриками и названием модели
+    """
+    title = raw['paper_title']
+    summary = raw['summary']
+    return dict(
+        raw,
+        system_type=determine_system_type(title, summary),
+        metrics=extract_metrics(summary + " " + title),
+        model_name=extract_model_name(title, summary)
+    )
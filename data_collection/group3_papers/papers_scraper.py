@@ -5,13 +5,30 @@
 """
 
 import requests
+import io
+from urllib3.exceptions import HTTPError as StreamError
 import json
-import time
+import os
+import sys
 from datetime import datetime
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import logging
 import re
 from urllib.parse import quote
+import xml.etree.ElementTree as ET
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from http_client import HttpClient, TokenBucket
+from http_cache import ResponseCache, DEFAULT_CACHE_PATH
+from jsonl_io import JsonlWriter, iter_jsonl, is_jsonl
+from metric_extraction import extract_metrics
+from enrichment import enrich_records
+import paper_enrichment
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+OPENSEARCH = '{http://a9.com/-/spec/opensearch/1.1/}'
 
 # Настройка логирования
 logging.basicConfig(
@@ -24,12 +41,22 @@ logging.basicConfig(
 )
 
 class PapersScraper:
-    def __init__(self):
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, offline: bool = False,
+                 compression: str = None, enrich_workers: int = None):
         self.arxiv_base_url = "http://export.arxiv.org/api/query"
         self.headers = {
             'User-Agent': 'ASR-TTS-Research/1.0'
         }
-        self.collected_data = []
+        self.compression = compression
+        # Число процессов этапа обогащения (None - по числу ядер)
+        self.enrich_workers = enrich_workers
+        self.writer = None
+        self.timestamp = None
+        # Счетчики сводки обновляются по мере записи статей
+        self.counters = Counter()
+        self.cache = ResponseCache(cache_path, offline=offline) if cache_path else None
+        # arXiv просит не чаще одного запроса в пару секунд
+        self.http = HttpClient(headers=self.headers, rate_limiter=TokenBucket(0.5), cache=self.cache)
         
         # Ключевые слова для поиска
         self.search_terms = [
@@ -42,84 +69,173 @@ class PapersScraper:
             "end-to-end speech recognition"
         ]
     
-    def search_arxiv(self, query: str, max_results: int = 50) -> List[Dict]:
+    def _query_arxiv(self, params: Dict, description: str) -> Optional[Tuple[Iterator[Dict], Dict]]:
+        """
+        Выполняет запрос к arXiv API и возвращает (итератор статей, метаданные ленты)
+        или None при ошибке. Тело ответа читается из сокета по ходу разбора;
+        метаданные (total_results) заполняются по ходу разбора
+        """
+        try:
+            response = self.http.get(self.arxiv_base_url, params=params, stream=True)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logging.error(f"Ошибка при запросе к arXiv ({description}): {e}")
+            return None
+        feed_info = {}
+        
+        def entries():
+            try:
+                yield from self.iter_arxiv_entries(response.raw, feed_info)
+            except (StreamError, requests.RequestException) as e:
+                logging.error(f"Обрыв ответа arXiv ({description}): {e}")
+            finally:
+                response.close()
+        
+        return entries(), feed_info
+    
+    def search_arxiv(self, query: str, max_results: int = 50, start: int = 0) -> List[Dict]:
         """
         Ищет статьи на arXiv
         """
         params = {
             'search_query': f'all:{query}',
-            'start': 0,
+            'start': start,
             'max_results': max_results,
             'sortBy': 'relevance',
             'sortOrder': 'descending'
         }
         
-        try:
-            response = requests.get(self.arxiv_base_url, params=params, headers=self.headers)
-            response.raise_for_status()
-            return self.parse_arxiv_response(response.text)
-        except requests.RequestException as e:
-            logging.error(f"Ошибка при поиске на arXiv для запроса '{query}': {e}")
-            return []
+        result = self._query_arxiv(params, f"запрос '{query}'")
+        return list(result[0]) if result else []
     
-    def parse_arxiv_response(self, xml_content: str) -> List[Dict]:
+    def build_combined_query(self, terms: List[str]) -> str:
         """
-        Парсит XML ответ от arXiv
+        Объединяет поисковые фразы в один запрос через OR
+        """
+        return ' OR '.join(f'all:"{term}"' for term in terms)
+    
+    def harvest_arxiv(self, search_query: str, max_results: int = 2000,
+                      page_size: int = 500) -> Iterator[Dict]:
+        """
+        Постранично выгружает результаты поискового запроса arXiv
+        (search_query в синтаксисе API), пока не наберется max_results
+        или не закончится выдача
+        """
+        start = 0
+        while start < max_results:
+            params = {
+                'search_query': search_query,
+                'start': start,
+                'max_results': min(page_size, max_results - start),
+                'sortBy': 'submittedDate',
+                'sortOrder': 'descending'
+            }
+            result = self._query_arxiv(params, f"страница с {start}")
+            if result is None:
+                return
+            papers, feed_info = result
+            yield from papers
+            total_results = feed_info.get('total_results', 0)
+            logging.info(f"arXiv: страница с {start}, всего результатов: {total_results}")
+            start += params['max_results']
+            if start >= total_results:
+                return
+    
+    def fetch_by_ids(self, arxiv_ids: List[str], batch_size: int = 200) -> Iterator[Dict]:
+        """
+        Повторно запрашивает известные статьи пакетами через id_list
+        """
+        for offset in range(0, len(arxiv_ids), batch_size):
+            batch = arxiv_ids[offset:offset + batch_size]
+            params = {
+                'id_list': ','.join(batch),
+                'start': 0,
+                'max_results': len(batch)
+            }
+            result = self._query_arxiv(params, f"id_list, пакет с {offset}")
+            if result:
+                yield from result[0]
+    
+    def load_known_ids(self, file_path: str) -> List[str]:
+        """
+        Читает arXiv ID (без номера версии) из ранее собранного файла статей
+        """
+        if is_jsonl(file_path):
+            papers = iter_jsonl(file_path)
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                papers = json.load(f)
+        ids = {self.paper_key(paper) for paper in papers}
+        ids.discard(None)
+        return sorted(ids)
+    
+    @staticmethod
+    def paper_key(paper: Optional[Dict]) -> Optional[str]:
+        """
+        Ключ дедупликации: arXiv ID без номера версии
+        """
+        paper_id = paper.get('arxiv_id') if paper else None
+        return re.sub(r'v\d+$', '', paper_id) if paper_id else None
+    
+    def iter_arxiv_entries(self, source, feed_info: Dict = None) -> Iterator[Dict]:
+        """
+        Потоково разбирает Atom-ленту arXiv (файл, файлоподобный объект или
+        тело ответа response.raw): статья возвращается, как только закрывается
+        ее <entry>, после чего содержимое записи удаляется из дерева (в корне
+        остается пустой элемент). Разбираются только события end - события
+        start удваивали бы работу парсера. Число результатов
+        (opensearch:totalResults) записывается в feed_info
         """
-        import xml.etree.ElementTree as ET
-        
-        papers = []
         try:
-            root = ET.fromstring(xml_content)
-            
-            # Находим все записи
-            for entry in root.findall('.//{http://www.w3.org/2005/Atom}entry'):
-                paper_data = self.extract_paper_data(entry)
-                if paper_data:
-                    papers.append(paper_data)
-                    
+            for event, elem in ET.iterparse(source, events=('end',)):
+                if elem.tag == ATOM + 'entry':
+                    paper_data = self.extract_paper_data(elem)
+                    elem.clear()
+                    if paper_data:
+                        yield paper_data
+                elif elem.tag == OPENSEARCH + 'totalResults' and feed_info is not None:
+                    feed_info['total_results'] = int(elem.text or 0)
         except ET.ParseError as e:
             logging.error(f"Ошибка парсинга XML: {e}")
-        
-        return papers
+    
+    def parse_arxiv_response(self, xml_content: str) -> List[Dict]:
+        """
+        Парсит XML ответ от arXiv
+        """
+        return list(self.iter_arxiv_entries(io.BytesIO(xml_content.encode('utf-8'))))
     
     def extract_paper_data(self, entry) -> Dict[str, Any]:
         """
-        Извлекает данные о статье из XML элемента
+        Извлекает сырые данные о статье из XML элемента (этап загрузки);
+        тип системы, метрики и название модели добавляет этап обогащения
         """
         try:
             # Основная информация
-            title = entry.find('.//{http://www.w3.org/2005/Atom}title').text.strip()
-            summary = entry.find('.//{http://www.w3.org/2005/Atom}summary').text.strip()
+            title = entry.find(ATOM + 'title').text.strip()
+            summary = entry.find(ATOM + 'summary').text.strip()
             
             # Авторы
             authors = []
-            for author in entry.findall('.//{http://www.w3.org/2005/Atom}author'):
-                name = author.find('.//{http://www.w3.org/2005/Atom}name')
+            for author in entry.findall(ATOM + 'author'):
+                name = author.find(ATOM + 'name')
                 if name is not None:
                     authors.append(name.text.strip())
             
             # Дата публикации
-            published = entry.find('.//{http://www.w3.org/2005/Atom}published')
+            published = entry.find(ATOM + 'published')
             publication_year = None
             if published is not None:
                 publication_year = int(published.text[:4])
             
             # Ссылка на arXiv
             arxiv_link = None
-            for link in entry.findall('.//{http://www.w3.org/2005/Atom}link'):
+            for link in entry.findall(ATOM + 'link'):
                 if link.get('type') == 'text/html':
                     arxiv_link = link.get('href')
                     break
             
             # ID статьи
-            paper_id = entry.find('.//{http://www.w3.org/2005/Atom}id').text.split('/')[-1]
-            
-            # Извлекаем метрики из текста
-            metrics = self.extract_metrics_from_text(summary + " " + title)
-            
-            # Определяем тип системы
-            system_type = self.determine_system_type(title, summary)
+            paper_id = entry.find(ATOM + 'id').text.split('/')[-1]
             
             return {
                 "paper_title": title,
@@ -127,10 +243,7 @@ class PapersScraper:
                 "arxiv_id": paper_id,
                 "publication_year": publication_year,
                 "authors": authors,
-                "summary": summary,
-                "system_type": system_type,
-                "metrics": metrics,
-                "model_name": self.extract_model_name(title, summary)
+                "summary": summary
             }
             
         except Exception as e:
@@ -139,161 +252,126 @@ class PapersScraper:
     
     def extract_metrics_from_text(self, text: str) -> List[Dict]:
         """
-        Извлекает метрики из текста статьи
+        Извлекает метрики из текста статьи (см. metric_extraction)
         """
-        metrics = []
-        text_lower = text.lower()
-        
-        # Паттерны для поиска метрик
-        metric_patterns = {
-            'WER': [
-                r'wer[:\s]*(\d+\.?\d*)\s*%?',
-                r'word error rate[:\s]*(\d+\.?\d*)\s*%?',
-                r'(\d+\.?\d*)\s*%?\s*wer'
-            ],
-            'CER': [
-                r'cer[:\s]*(\d+\.?\d*)\s*%?',
-                r'character error rate[:\s]*(\d+\.?\d*)\s*%?'
-            ],
-            'MOS': [
-                r'mos[:\s]*(\d+\.?\d*)',
-                r'mean opinion score[:\s]*(\d+\.?\d*)'
-            ],
-            'BLEU': [
-                r'bleu[:\s]*(\d+\.?\d*)',
-                r'bleu score[:\s]*(\d+\.?\d*)'
-            ]
-        }
-        
-        # Поиск датасетов
-        dataset_patterns = [
-            r'librispeech',
-            r'common voice',
-            r'voxforge',
-            r'ted-lium',
-            r'wsj',
-            r'switchboard'
-        ]
-        
-        for metric_type, patterns in metric_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text_lower)
-                for match in matches:
-                    value = float(match.group(1))
-                    
-                    # Определяем датасет
-                    dataset = "unknown"
-                    for dataset_pattern in dataset_patterns:
-                        if re.search(dataset_pattern, text_lower):
-                            dataset = dataset_pattern.replace('-', ' ').title()
-                            break
-                    
-                    metrics.append({
-                        "type": metric_type,
-                        "value": value,
-                        "dataset": dataset,
-                        "language": "en"  # По умолчанию английский
-                    })
-        
-        return metrics
+        return extract_metrics(text)
     
     def determine_system_type(self, title: str, summary: str) -> str:
         """
-        Определяет тип системы (ASR, TTS, etc.)
+        Определяет тип системы (см. paper_enrichment)
         """
-        text = (title + " " + summary).lower()
-        
-        if any(term in text for term in ['speech recognition', 'asr', 'automatic speech']):
-            return 'ASR'
-        elif any(term in text for term in ['text to speech', 'tts', 'speech synthesis', 'voice synthesis']):
-            return 'TTS'
-        elif any(term in text for term in ['voice cloning', 'voice conversion']):
-            return 'Voice Cloning'
-        else:
-            return 'Unknown'
+        return paper_enrichment.determine_system_type(title, summary)
     
     def extract_model_name(self, title: str, summary: str) -> str:
         """
-        Извлекает название модели из заголовка или описания
+        Извлекает название модели (см. paper_enrichment)
         """
-        # Ищем названия моделей в заголовке
-        title_lower = title.lower()
-        
-        # Известные названия моделей
-        known_models = [
-            'whisper', 'wav2vec', 'tacotron', 'fastspeech', 'tacotron2',
-            'waveglow', 'melgan', 'hifigan', 'conformer', 'transformer',
-            'listen attend and spell', 'deep speech', 'jasper', 'quartznet'
-        ]
-        
-        for model in known_models:
-            if model in title_lower:
-                return model.title()
-        
-        # Если не найдено, берем первые слова заголовка
-        words = title.split()[:3]
-        return ' '.join(words)
+        return paper_enrichment.extract_model_name(title, summary)
+    
+    def add_paper(self, paper: Dict[str, Any]):
+        """
+        Сразу дописывает статью в выходной файл и обновляет счетчики сводки
+        """
+        self.writer.write(paper)
+        self.counters['total_papers'] += 1
+        self.counters[paper.get('system_type')] += 1
+        if paper.get('metrics'):
+            self.counters['papers_with_metrics'] += 1
     
-    def collect_data(self):
+    def iter_search_results(self, max_results: int, page_size: int, combined: bool) -> Iterator[Dict]:
         """
-        Основной метод сбора данных
+        Результаты по всем поисковым фразам: одним OR-запросом
+        или отдельным постраничным запросом на каждую фразу
         """
+        if combined:
+            logging.info(f"Ищем статьи по {len(self.search_terms)} фразам одним запросом")
+            yield from self.harvest_arxiv(self.build_combined_query(self.search_terms),
+                                          max_results=max_results, page_size=page_size)
+            return
+        
         for search_term in self.search_terms:
             logging.info(f"Ищем статьи по запросу: {search_term}")
-            
-            papers = self.search_arxiv(search_term, max_results=20)
-            
-            for paper in papers:
-                if paper and paper not in self.collected_data:
-                    self.collected_data.append(paper)
-            
-            # Пауза между запросами
-            time.sleep(2)
+            yield from self.harvest_arxiv(self.build_combined_query([search_term]),
+                                          max_results=max_results, page_size=page_size)
+    
+    def collect_data(self, max_results: int = 2000, page_size: int = 500,
+                     combined: bool = True, arxiv_ids: List[str] = None):
+        """
+        Основной метод сбора данных. Если передан arxiv_ids,
+        вместо поиска обновляются только эти статьи (режим id_list).
+        Этап загрузки пишет сырые записи в papers_raw_*.jsonl,
+        этап обогащения строит из них papers_data_*.jsonl
+        """
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Удаляем дубликаты по arXiv ID
-        unique_papers = []
-        seen_ids = set()
+        if arxiv_ids is not None:
+            logging.info(f"Обновляем {len(arxiv_ids)} известных статей через id_list")
+            papers = self.fetch_by_ids(arxiv_ids)
+        else:
+            papers = self.iter_search_results(max_results, page_size, combined)
         
-        for paper in self.collected_data:
-            paper_id = paper.get('arxiv_id')
-            if paper_id and paper_id not in seen_ids:
-                seen_ids.add(paper_id)
-                unique_papers.append(paper)
+        # Дубликаты по arXiv ID отбрасываются до записи
+        seen_ids = set()
         
-        self.collected_data = unique_papers
+        with JsonlWriter(f'papers_raw_{self.timestamp}.jsonl', compression=self.compression) as raw_writer:
+            for paper in papers:
+                paper_id = self.paper_key(paper)
+                if paper_id and paper_id not in seen_ids:
+                    seen_ids.add(paper_id)
+                    raw_writer.write(paper)
         
-        # Сохраняем данные
-        self.save_data()
+        logging.info(f"Загружено {raw_writer.count} статей, сырые данные в {raw_writer.path}")
+        self.enrich(raw_writer.path)
     
-    def save_data(self):
+    def enrich(self, raw_path: str):
         """
-        Сохраняет собранные данные в файлы
+        Этап обогащения: тип системы, метрики и название модели
+        вычисляются в пуле процессов по сохраненным сырым записям.
+        Не обращается к сети, поэтому после правки извлечения
+        достаточно перезапустить только его
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.timestamp = self.timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.writer = JsonlWriter(f'papers_data_{self.timestamp}.jsonl', compression=self.compression)
         
-        # Сохраняем в JSON
-        with open(f'papers_data_{timestamp}.json', 'w', encoding='utf-8') as f:
-            json.dump(self.collected_data, f, ensure_ascii=False, indent=2)
+        with self.writer:
+            for paper in enrich_records(iter_jsonl(raw_path), paper_enrichment.enrich_paper,
+                                        workers=self.enrich_workers):
+                self.add_paper(paper)
         
         # Сохраняем сводку
+        self.save_data()
+    
+    def save_data(self):
+        """
+        Сохраняет сводку по сбору (сами статьи уже записаны в JSONL)
+        """
         summary = {
-            "total_papers": len(self.collected_data),
-            "asr_papers": len([p for p in self.collected_data if p.get('system_type') == 'ASR']),
-            "tts_papers": len([p for p in self.collected_data if p.get('system_type') == 'TTS']),
-            "voice_cloning_papers": len([p for p in self.collected_data if p.get('system_type') == 'Voice Cloning']),
-            "papers_with_metrics": len([p for p in self.collected_data if p.get('metrics')]),
-            "collection_date": datetime.now().isoformat()
+            "total_papers": self.counters['total_papers'],
+            "asr_papers": self.counters['ASR'],
+            "tts_papers": self.counters['TTS'],
+            "voice_cloning_papers": self.counters['Voice Cloning'],
+            "papers_with_metrics": self.counters['papers_with_metrics'],
+            "collection_date": datetime.now().isoformat(),
+            "http_metrics": self.http.get_metrics_summary()
         }
         
-        with open(f'collection_summary_{timestamp}.json', 'w', encoding='utf-8') as f:
+        with open(f'collection_summary_{self.timestamp}.json', 'w', encoding='utf-8') as f:
             json.dump(summary, f, ensure_ascii=False, indent=2)
         
-        logging.info(f"Собрано {len(self.collected_data)} статей")
-        logging.info(f"Данные сохранены в papers_data_{timestamp}.json")
+        logging.info(f"Собрано {self.writer.count} статей")
+        logging.info(f"Данные сохранены в {self.writer.path}")
 
 def main():
-    scraper = PapersScraper()
-    scraper.collect_data()
+    scraper = PapersScraper(offline='--offline' in sys.argv)
+    if '--enrich' in sys.argv:
+        # Повторное обогащение без сети: --enrich papers_raw_*.jsonl
+        scraper.enrich(sys.argv[sys.argv.index('--enrich') + 1])
+    elif '--refresh' in sys.argv:
+        # Обновление ранее собранных статей: --refresh papers_data_*.jsonl
+        known_file = sys.argv[sys.argv.index('--refresh') + 1]
+        scraper.collect_data(arxiv_ids=scraper.load_known_ids(known_file))
+    else:
+        scraper.collect_data()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
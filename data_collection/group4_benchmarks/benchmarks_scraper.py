@@ -5,11 +5,19 @@
 """
 
 import pandas as pd
+import io
 import json
+import sys
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import logging
 import os
+from abc import ABC, abstractmethod
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from http_client import HttpClient, TokenBucket
+from http_cache import ResponseCache, DEFAULT_CACHE_PATH
 
 # Настройка логирования
 logging.basicConfig(
@@ -21,176 +29,105 @@ logging.basicConfig(
     ]
 )
 
+# Файл результатов, из которого Space лидерборда строит свою таблицу
+LEADERBOARD_RESULTS_URL = "https://huggingface.co/spaces/hf-audio/open_asr_leaderboard/resolve/main/results.csv"
+
+class LeaderboardSource(ABC):
+    """
+    Источник таблицы лидерборда: возвращает строки таблицы и заголовки
+    """
+    name = "source"
+
+    @abstractmethod
+    def fetch(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Строки таблицы (словари) и список заголовков"""
+
+    @staticmethod
+    def parse_table(content: bytes, fmt: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Разбор таблицы в формате CSV или JSON. JSON - список строк-словарей
+        либо значение Gradio Dataframe ({"headers": [...], "data": [[...], ...]})
+        """
+        if fmt == 'json':
+            parsed = json.loads(content)
+            if isinstance(parsed, dict):
+                headers = parsed.get('headers', [])
+                return [dict(zip(headers, row)) for row in parsed.get('data', [])], headers
+            headers = list(parsed[0].keys()) if parsed else []
+            return parsed, headers
+
+        df = pd.read_csv(io.BytesIO(content))
+        return df.to_dict('records'), df.columns.tolist()
+
+    @staticmethod
+    def detect_format(location: str, content_type: str = "") -> str:
+        if location.lower().endswith('.json') or 'json' in content_type:
+            return 'json'
+        return 'csv'
+
+class HttpLeaderboardSource(LeaderboardSource):
+    """
+    Загрузка файла результатов лидерборда одним HTTP-запросом
+    """
+    name = "http"
+
+    def __init__(self, url: str, http: HttpClient):
+        self.url = url
+        self.http = http
+
+    def fetch(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        logging.info(f"Загрузка результатов лидерборда: {self.url}")
+        response = self.http.get(self.url)
+        response.raise_for_status()
+        fmt = self.detect_format(self.url, response.headers.get('Content-Type', ''))
+        return self.parse_table(response.content, fmt)
+
+class FileLeaderboardSource(LeaderboardSource):
+    """
+    Чтение таблицы лидерборда из локального файла (CSV или JSON)
+    """
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        logging.info(f"Чтение результатов лидерборда из файла: {self.path}")
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        return self.parse_table(content, self.detect_format(self.path))
+
+def make_source(location: str, http: HttpClient) -> LeaderboardSource:
+    """
+    Источник по адресу: http(s)://... - загрузка по сети, иначе локальный файл
+    """
+    if location.startswith(('http://', 'https://')):
+        return HttpLeaderboardSource(location, http)
+    return FileLeaderboardSource(location)
+
 class HuggingFaceLeaderboardScraper:
-    def __init__(self):
+    def __init__(self, source: LeaderboardSource = None, cache_path: str = DEFAULT_CACHE_PATH,
+                 offline: bool = False):
         self.collected_data = []
         self.backup_csv_file = "models_benchmarks.csv"
-    
+        self.headers = {
+            'User-Agent': 'ASR-TTS-Research/1.0'
+        }
+        self.cache = ResponseCache(cache_path, offline=offline) if cache_path else None
+        self.http = HttpClient(headers=self.headers, rate_limiter=TokenBucket(1.0), cache=self.cache)
+        self.source = source or HttpLeaderboardSource(LEADERBOARD_RESULTS_URL, self.http)
+
     def extract_benchmark_data(self) -> List[Dict[str, Any]]:
         """Основной метод извлечения данных бенчмарка"""
         try:
-            # Пытаемся использовать Selenium для парсинга
-            return self._parse_with_selenium()
+            table_data, headers = self.source.fetch()
+            logging.info(f"Получено строк лидерборда: {len(table_data)}")
+            return self._convert_to_benchmark_format(table_data, headers)
         except Exception as e:
-            logging.error(f"Ошибка при парсинге через Selenium: {e}")
+            logging.error(f"Ошибка при загрузке данных лидерборда ({self.source.name}): {e}")
             logging.info(f"Пытаемся загрузить данные из резервного файла: {self.backup_csv_file}")
             return self._load_from_backup_csv()
     
-    def _parse_with_selenium(self) -> List[Dict[str, Any]]:
-        """Парсинг данных с использованием Selenium"""
-        try:
-            from selenium import webdriver
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.chrome.service import Service
-            from webdriver_manager.chrome import ChromeDriverManager
-            import time
-            
-            # Настройка Chrome options
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            # Настройка и инициализация WebDriver
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            try:
-                logging.info("Открытие страницы Hugging Face Leaderboard...")
-                driver.get("https://huggingface.co/spaces/hf-audio/open_asr_leaderboard")
-                
-                # Ожидание загрузки страницы
-                time.sleep(5)
-                
-                # Поиск и переключение на iframe
-                logging.info("Поиск iframe...")
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "iframe"))
-                )
-                
-                iframes = driver.find_elements(By.TAG_NAME, "iframe")
-                logging.info(f"Найдено iframe: {len(iframes)}")
-                
-                # Переключение на основной iframe с контентом
-                driver.switch_to.frame(iframes[0])
-                logging.info("Переключились на iframe")
-                
-                # Ожидание загрузки таблицы внутри iframe
-                logging.info("Ожидание загрузки таблицы...")
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "svelte-1xyl3gk"))
-                )
-                logging.info("Таблица найдена")
-                
-                # Дадим дополнительное время для загрузки данных
-                time.sleep(5)
-                
-                # Извлечение заголовков таблицы
-                headers = self._extract_headers_selenium(driver)
-                
-                # Извлечение данных таблицы
-                table_data = self._extract_table_content_selenium(driver, headers)
-                
-                # Преобразование в формат бенчмарков
-                benchmarks = self._convert_to_benchmark_format(table_data, headers)
-                
-                return benchmarks
-                
-            finally:
-                try:
-                    driver.switch_to.default_content()
-                except:
-                    pass
-                driver.quit()
-                
-        except Exception as e:
-            logging.error(f"Ошибка в Selenium парсере: {e}")
-            raise
-    
-    def _extract_headers_selenium(self, driver) -> List[str]:
-        """Извлечение заголовков таблицы через Selenium"""
-        headers = []
-        try:
-            header_elements = driver.find_elements(By.XPATH, "//table//thead//th")
-            
-            for header in header_elements:
-                header_text = header.text.strip()
-                if header_text:
-                    headers.append(header_text)
-            
-            logging.info(f"Найдено заголовков: {len(headers)}")
-        except Exception as e:
-            logging.error(f"Ошибка при извлечении заголовков: {e}")
-            # Используем заранее известные заголовки
-            headers = ["model", "Average WER ⬇️", "RTFx ⬆️️", "License", "AMI", "Earnings22", 
-                      "Gigaspeech", "LS Clean", "LS Other", "SPGISpeech", "Tedlium", "Voxpopuli"]
-        
-        return headers
-    
-    def _extract_table_content_selenium(self, driver, headers: List[str]) -> List[Dict[str, Any]]:
-        """Извлечение содержимого таблицы через Selenium"""
-        table_container = driver.find_element(By.CLASS_NAME, "svelte-1xyl3gk")
-        data = []
-        seen_models = set()
-        scroll_step = 100
-        max_scrolls = 100
-        scroll_count = 0
-        no_new_models_count = 0
-        
-        while scroll_count < max_scrolls and no_new_models_count < 5:
-            rows = driver.find_elements(By.XPATH, "//table//tbody//tr")
-            current_row_count = len(rows)
-            logging.info(f"Найдено строк: {current_row_count}")
-            
-            new_models_found = 0
-            for row in rows:
-                try:
-                    cols = row.find_elements(By.TAG_NAME, "td")
-                    if cols and len(cols) == len(headers):
-                        row_data = [col.text.strip() for col in cols]
-                        model_name = row_data[0]
-                        
-                        if model_name and model_name not in seen_models:
-                            row_dict = dict(zip(headers, row_data))
-                            data.append(row_dict)
-                            seen_models.add(model_name)
-                            new_models_found += 1
-                            logging.info(f"Добавлена модель {len(data)}: {model_name}")
-                except Exception as e:
-                    logging.error(f"Ошибка при обработке строки: {e}")
-            
-            if new_models_found == 0:
-                no_new_models_count += 1
-                logging.info(f"Новых моделей не найдено. Попытка {no_new_models_count}/5")
-            else:
-                no_new_models_count = 0
-            
-            if len(data) >= 60:
-                logging.info(f"Собрано достаточно данных ({len(data)} моделей), завершаем прокрутку")
-                break
-            
-            # Прокрутка таблицы
-            current_scroll_position = driver.execute_script("return arguments[0].scrollTop", table_container)
-            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollTop + arguments[1]", 
-                                 table_container, scroll_step)
-            time.sleep(0.5)
-            
-            new_scroll_position = driver.execute_script("return arguments[0].scrollTop", table_container)
-            if new_scroll_position == current_scroll_position:
-                logging.info("Достигнут конец таблицы")
-                break
-            
-            scroll_count += 1
-        
-        return data
-    
     def _load_from_backup_csv(self) -> List[Dict[str, Any]]:
         """Загрузка данных из резервного CSV-файла"""
         try:
@@ -234,14 +171,27 @@ class HuggingFaceLeaderboardScraper:
         # Преобразуем каждую строку таблицы в результат бенчмарка
         for i, row_data in enumerate(table_data):
             try:
-                result = self._create_benchmark_result(row_data, i + 1)
+                result = self._create_benchmark_result(row_data, 0)
                 if result:
                     benchmark["results"].append(result)
             except Exception as e:
                 logging.error(f"Ошибка при преобразовании строки {i}: {e}")
         
+        # Порядок строк файла результатов произвольный: ранг - место по
+        # среднему WER, как в таблице Space; модели без него - в конце
+        benchmark["results"].sort(key=self._average_wer)
+        for rank, result in enumerate(benchmark["results"], start=1):
+            result["rank"] = rank
+        
         return [benchmark]
     
+    @staticmethod
+    def _average_wer(result: Dict[str, Any]) -> float:
+        for metric in result["metrics"]:
+            if metric["type"] == "Average WER" and metric["value"] > 0:
+                return metric["value"]
+        return float('inf')
+    
     def _create_benchmark_result(self, row_data: Dict, rank: int) -> Dict[str, Any]:
         """Создание результата бенчмарка из данных строки"""
         # Определяем имя модели в зависимости от структуры данных
@@ -300,6 +250,9 @@ class HuggingFaceLeaderboardScraper:
                     "dataset_split": dataset_name.lower().replace(" ", "_")
                 })
         
+        # Лицензия модели в лидерборде (Open / Proprietary)
+        license = self._get_first_existing_value(row_data, ['License', 'license'])
+        
         # Генерируем URL модели
         model_url = self._generate_model_url(model_name)
         
@@ -307,6 +260,7 @@ class HuggingFaceLeaderboardScraper:
             "model_name": model_name,
             "rank": rank,
             "metrics": metrics,
+            "license": str(license) if license else "",
             "paper_link": "",
             "code_link": model_url,
             "submission_date": ""
@@ -399,6 +353,7 @@ class HuggingFaceLeaderboardScraper:
                     'benchmark_name': benchmark['benchmark_name'],
                     'model_name': result['model_name'],
                     'rank': result['rank'],
+                    'license': result.get('license', ''),
                     'code_link': result['code_link'],
                     'submission_date': result['submission_date']
                 }
@@ -417,7 +372,10 @@ class HuggingFaceLeaderboardScraper:
 
 def main():
     """Основная функция"""
-    scraper = HuggingFaceLeaderboardScraper()
+    scraper = HuggingFaceLeaderboardScraper(offline='--offline' in sys.argv)
+    if '--source' in sys.argv:
+        # Другой файл результатов: --source results.csv или --source https://...
+        scraper.source = make_source(sys.argv[sys.argv.index('--source') + 1], scraper.http)
     data = scraper.collect_data()
     
     if data:
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Постоянный кэш HTTP-ответов в SQLite для скриптов сбора данных:
+ключ — хэш URL с параметрами, условные запросы (ETag / Last-Modified),
+вытеснение по LRU при превышении размера и офлайн-режим
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from typing import Dict, Any, Optional
+
+import requests
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Один файл кэша на все группы сбора данных
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'http_cache.sqlite')
+
+def canonical_url(url: str, params: Dict = None) -> str:
+    """
+    Приводит URL и параметры к единому виду (параметры отсортированы),
+    чтобы одинаковые запросы получали один ключ кэша
+    """
+    if params:
+        params = sorted(params.items())
+    return requests.Request('GET', url, params=params).prepare().url
+
+class ResponseCache:
+    """
+    Кэш ответов в файле SQLite. Хранятся только успешные (200) ответы;
+    при повторном запросе клиент отправляет If-None-Match / If-Modified-Since,
+    и ответ 304 подменяется сохраненным телом.
+    В офлайн-режиме ответы отдаются только из кэша, без обращения к сети.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stored': 0,
+            'evicted': 0,
+            'bytes_saved': 0
+        }
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                content BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+        # Текущий размер кэша ведется при записи, чтобы не считать SUM(size) на каждый store
+        self._size = self._total_size()
+
+    def _total_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(url: str, params: Dict = None) -> str:
+        return hashlib.sha256(canonical_url(url, params).encode('utf-8')).hexdigest()
+
+    def get(self, url: str, params: Dict = None) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает сохраненную запись или None
+        """
+        key = self.make_key(url, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, content, etag, last_modified FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'key': key,
+            'url': row[0],
+            'status': row[1],
+            'headers': json.loads(row[2]),
+            'content': row[3],
+            'etag': row[4],
+            'last_modified': row[5]
+        }
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Заголовки условного запроса для сохраненной записи
+        """
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def hit(self, entry: Dict[str, Any], revalidated: bool = False):
+        """
+        Отмечает попадание в кэш (в том числе подтвержденное ответом 304)
+        """
+        with self._lock:
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                               (time.time(), entry['key']))
+            self._conn.commit()
+            self.stats['hits'] += 1
+            if revalidated:
+                self.stats['revalidated'] += 1
+            self.stats['bytes_saved'] += len(entry['content'])
+
+    def miss(self):
+        with self._lock:
+            self.stats['misses'] += 1
+
+    def store(self, url: str, params: Dict, response: requests.Response, content: bytes = None):
+        """
+        Сохраняет успешный ответ и при необходимости вытесняет старые записи.
+        content - уже прочитанное тело потокового ответа
+        """
+        if response.status_code != 200:
+            return
+        if content is None:
+            content = response.content
+        headers = dict(response.headers)
+        key = self.make_key(url, params)
+        now = time.time()
+        with self._lock:
+            replaced = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status, headers, content, etag, last_modified, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url or url, response.status_code,
+                 json.dumps(headers), content, headers.get('ETag') or headers.get('etag'),
+                 headers.get('Last-Modified') or headers.get('last-modified'),
+                 len(content), now, now)
+            )
+            self._size += len(content) - (replaced[0] if replaced else 0)
+            self.stats['stored'] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """
+        Удаляет давно не использованные записи, пока размер кэша
+        превышает max_bytes (вызывается под блокировкой). Перед вытеснением
+        размер пересчитывается: файл кэша могут пополнять и другие процессы
+        """
+        if self._size <= self.max_bytes:
+            return
+        total = self._size = self._total_size()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._size = total
+        self.stats['evicted'] += len(evicted)
+        logging.info(f"Кэш HTTP: вытеснено записей: {len(evicted)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Счетчики кэша и текущий размер
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return dict(self.stats, entries=entries, size_bytes=size, offline=self.offline)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Общий HTTP-клиент для скриптов сбора данных:
+пул keep-alive соединений, повторные попытки с экспоненциальной задержкой,
+ограничение параллелизма по хостам, метрики времени запросов
+и необязательный постоянный кэш ответов (http_cache.ResponseCache)
+"""
+
+import io
+import time
+import random
+import asyncio
+import threading
+import logging
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from http_cache import ResponseCache
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'ASR-TTS-Research/1.0'
+}
+
+# Статусы, при которых запрос имеет смысл повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов по алгоритму token bucket.
+    Позволяет кратковременные всплески до capacity запросов,
+    в среднем не превышая rate запросов в секунду.
+    """
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Забирает токен и возвращает время ожидания до его появления
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """
+        Блокирующее ожидание токена (последовательный режим)
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Неблокирующее ожидание токена (асинхронный режим)
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Разбирает заголовок Retry-After (секунды или HTTP-дата)
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def build_response(url: str, status_code: int, headers: Dict[str, str], content: bytes) -> requests.Response:
+    """
+    Собирает requests.Response из готовых данных, чтобы синхронный
+    и асинхронный клиенты возвращали ответы одного типа. Тело доступно
+    и как поток response.raw - как у потокового ответа сети
+    """
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.raw = io.BytesIO(content)
+    response.encoding = response.encoding or requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+class _CachingReader:
+    """
+    Поток тела ответа, который по мере чтения копирует его в память и
+    после чтения до конца передает целиком в on_complete (сохранение в кэш)
+    """
+    def __init__(self, raw, on_complete):
+        self.raw = raw
+        self.on_complete = on_complete
+        self.chunks = []
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.raw.read() if size is None or size < 0 else self.raw.read(size)
+        if chunk:
+            self.chunks.append(chunk)
+        elif self.chunks is not None:
+            self.on_complete(b''.join(self.chunks))
+            self.chunks = None
+        return chunk
+
+    def close(self):
+        self.raw.close()
+
+class _BaseHttpClient:
+    """
+    Общая логика повторов и сбора метрик
+    """
+    def __init__(self, headers: Dict[str, str] = None, max_retries: int = 5,
+                 backoff_factor: float = 0.5, max_backoff: float = 60.0,
+                 timeout: float = 30.0, per_host_limit: int = 4,
+                 rate_limiter: TokenBucket = None, cache: ResponseCache = None):
+        self.headers = dict(DEFAULT_HEADERS)
+        if headers:
+            self.headers.update(headers)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.per_host_limit = per_host_limit
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = []
+        self._metrics_lock = threading.Lock()
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Экспоненциальная задержка с full jitter; Retry-After имеет приоритет
+        """
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return server_delay
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def _record(self, url: str, status: Optional[int], attempts: int, elapsed: float, error: str = None):
+        """
+        Сохраняет метрику одного логического запроса (со всеми повторами)
+        """
+        with self._metrics_lock:
+            self.metrics.append({
+                'url': url,
+                'host': urlparse(url).netloc,
+                'status': status,
+                'attempts': attempts,
+                'elapsed': elapsed,
+                'error': error
+            })
+
+    def _cache_lookup(self, url: str, params: Dict, headers: Dict):
+        """
+        Ищет ответ в кэше и добавляет заголовки условного запроса.
+        Возвращает (запись кэша, заголовки запроса).
+        В офлайн-режиме отсутствие записи - сетевая ошибка.
+        """
+        if not self.cache:
+            return None, headers
+        entry = self.cache.get(url, params)
+        if self.cache.offline:
+            if entry is None:
+                self.cache.miss()
+                raise requests.ConnectionError(f"Офлайн-режим: ответа нет в кэше для {url}")
+            return entry, headers
+        conditional = self.cache.conditional_headers(entry)
+        if conditional:
+            headers = dict(headers or {}, **conditional)
+        return entry, headers
+
+    def _cached_response(self, entry: Dict[str, Any], revalidated: bool = False) -> requests.Response:
+        self.cache.hit(entry, revalidated=revalidated)
+        return build_response(entry['url'], entry['status'], entry['headers'], entry['content'])
+
+    def _cache_update(self, url: str, params: Dict, entry: Optional[Dict[str, Any]],
+                      response: requests.Response, stream: bool = False) -> requests.Response:
+        """
+        Обрабатывает ответ сервера: 304 подменяется телом из кэша,
+        новый успешный ответ сохраняется. Потоковый ответ сохраняется,
+        когда вызывающий код дочитает response.raw до конца
+        """
+        if not self.cache:
+            return response
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            return self._cached_response(entry, revalidated=True)
+        self.cache.miss()
+        if stream:
+            if response.status_code == 200:
+                response.raw = _CachingReader(
+                    response.raw, lambda content: self.cache.store(url, params, response, content))
+        else:
+            self.cache.store(url, params, response)
+        return response
+
+    def get_metrics_summary(self) -> Dict[str, Any]:
+        """
+        Возвращает сводку метрик запросов по хостам
+        """
+        by_host = defaultdict(list)
+        for metric in self.metrics:
+            by_host[metric['host']].append(metric)
+
+        hosts = {}
+        for host, metrics in by_host.items():
+            timings = sorted(m['elapsed'] for m in metrics)
+            hosts[host] = {
+                'requests': len(metrics),
+                'retries': sum(m['attempts'] - 1 for m in metrics),
+                'errors': sum(1 for m in metrics if m['error'] or (m['status'] or 0) >= 400),
+                'avg_seconds': round(sum(timings) / len(timings), 4),
+                'p95_seconds': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+                'max_seconds': round(timings[-1], 4)
+            }
+
+        return {
+            'total_requests': len(self.metrics),
+            'hosts': hosts,
+            'cache': self.cache.get_stats() if self.cache else None
+        }
+
+class HttpClient(_BaseHttpClient):
+    """
+    Синхронный клиент на requests.Session с пулом соединений
+    """
+    def __init__(self, pool_size: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._host_semaphores = defaultdict(lambda: threading.BoundedSemaphore(self.per_host_limit))
+        self._host_lock = threading.Lock()
+
+    def _host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._host_lock:
+            return self._host_semaphores[host]
+
+    def get(self, url: str, params: Dict = None, headers: Dict = None,
+            stream: bool = False) -> requests.Response:
+        """
+        Выполняет GET с повторами при сетевых ошибках, 429 и 5xx.
+        Если попытки исчерпаны, возвращает последний ответ
+        или пробрасывает последнее сетевое исключение.
+        stream=True - тело не читается заранее: его читают из response.raw
+        (сжатие снимается), а ответ закрывает вызывающий код
+        """
+        entry, headers = self._cache_lookup(url, params, headers)
+        if self.cache and self.cache.offline:
+            return self._cached_response(entry)
+
+        semaphore = self._host_semaphore(urlparse(url).netloc)
+        started = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            try:
+                with semaphore:
+                    response = self.session.get(url, params=params, headers=headers,
+                                                timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    self._record(url, None, attempt + 1, time.perf_counter() - started, str(e))
+                    raise
+                delay = self._retry_delay(attempt)
+                logging.warning(f"Сетевая ошибка для {url}: {e}. Повтор через {delay:.1f} с")
+                time.sleep(delay)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                logging.warning(f"HTTP {response.status_code} для {url}. Повтор через {delay:.1f} с")
+                response.close()
+                time.sleep(delay)
+                continue
+
+            self._record(url, response.status_code, attempt + 1, time.perf_counter() - started)
+            if stream:
+                response.raw.decode_content = True
+            return self._cache_update(url, params, entry, response, stream)
+
+    def close(self):
+        self.session.close()
+
+class AsyncHttpClient(_BaseHttpClient):
+    """
+    Асинхронный клиент на aiohttp с той же политикой повторов.
+    Используется как асинхронный контекстный менеджер.
+    """
+    def __init__(self, concurrency: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.concurrency = concurrency
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host_limit)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+
+    async def get(self, url: str, params: Dict = None, headers: Dict = None) -> requests.Response:
+        """
+        Асинхронный аналог HttpClient.get; возвращает requests.Response
+        """
+        import aiohttp
+
+        entry, headers = self._cache_lookup(url, params, headers)
+        if self.cache and self.cache.offline:
+            return self._cached_response(entry)
+
+        started = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+
+            try:
+                async with self._semaphore:
+                    async with self._session.get(url, params=params, headers=headers) as raw:
+                        content = await raw.read()
+                        response = build_response(str(raw.url), raw.status, dict(raw.headers), content)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    self._record(url, None, attempt + 1, time.perf_counter() - started, str(e))
+                    raise requests.ConnectionError(str(e)) from e
+                delay = self._retry_delay(attempt)
+                logging.warning(f"Сетевая ошибка для {url}: {e}. Повтор через {delay:.1f} с")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                logging.warning(f"HTTP {response.status_code} для {url}. Повтор через {delay:.1f} с")
+                await asyncio.sleep(delay)
+                continue
+
+            self._record(url, response.status_code, attempt + 1, time.perf_counter() - started)
+            return self._cache_update(url, params, entry, response)
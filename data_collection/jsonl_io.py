@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Потоковая запись и чтение собранных данных в формате JSONL
+(одна запись - одна строка JSON) с необязательным сжатием gzip/zstd,
+а также потоковое чтение JSON-массивов по одному элементу
+"""
+
+import os
+import io
+import gzip
+import json
+from typing import Any, Dict, Iterator, Optional
+
+COMPRESSION_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst'
+}
+
+def _import_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Для сжатия zstd установите пакет zstandard: pip install zstandard")
+    return zstandard
+
+class JsonlWriter:
+    """
+    Дописывает записи в JSONL-файл сразу после извлечения.
+    Данные пишутся во временный файл .<имя>.part рядом с итоговым;
+    каждые fsync_every записей буфер сбрасывается на диск, а при close()
+    файл атомарно переименовывается в итоговый. Если сбор прерван,
+    уже записанные строки остаются во временном файле.
+    """
+    def __init__(self, path: str, compression: Optional[str] = None, fsync_every: int = 100):
+        if compression and compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Неизвестное сжатие: {compression}")
+        self.path = path + COMPRESSION_SUFFIXES.get(compression, '')
+        directory, name = os.path.split(os.path.abspath(self.path))
+        self.tmp_path = os.path.join(directory, f'.{name}.part')
+        self.compression = compression
+        self.fsync_every = fsync_every
+        self.count = 0
+        self._raw = open(self.tmp_path, 'wb')
+        self._stream = self._open_stream()
+
+    def _open_stream(self):
+        if self.compression == 'gzip':
+            return gzip.GzipFile(fileobj=self._raw, mode='wb')
+        if self.compression == 'zstd':
+            return _import_zstd().ZstdCompressor().stream_writer(self._raw, closefd=False)
+        return self._raw
+
+    def write(self, record: Dict):
+        self._stream.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+        self.count += 1
+        if self.fsync_every and self.count % self.fsync_every == 0:
+            self.sync()
+
+    def sync(self):
+        """
+        Сбрасывает сжатый поток и буферы ОС на диск
+        """
+        if self.compression == 'zstd':
+            self._stream.flush(_import_zstd().FLUSH_BLOCK)
+        elif self._stream is not self._raw:
+            self._stream.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+
+    def _close_file(self):
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+
+    def close(self):
+        """
+        Завершает запись и публикует итоговый файл
+        """
+        self._close_file()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """
+        Закрывает временный файл, не публикуя его
+        """
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def is_jsonl(path: str) -> bool:
+    name = os.path.basename(path)
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name.endswith('.jsonl')
+
+def open_text(path: str) -> io.TextIOBase:
+    """
+    Открывает файл на чтение как текст, распаковывая .gz и .zst
+    """
+    if path.endswith(COMPRESSION_SUFFIXES['gzip']):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith(COMPRESSION_SUFFIXES['zstd']):
+        raw = open(path, 'rb')
+        return io.TextIOWrapper(_import_zstd().ZstdDecompressor().stream_reader(raw, closefd=True),
+                                encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """
+    Лениво читает записи из JSONL-файла (в том числе сжатого)
+    """
+    with open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+class _JsonArrayReader:
+    """
+    Читает JSON-массив верхнего уровня по одному элементу: в памяти
+    держится только текущий элемент и непрочитанный хвост буфера
+    """
+    WHITESPACE = ' \t\n\r'
+    SEPARATORS = WHITESPACE + ',]'
+    decoder = json.JSONDecoder()
+
+    def __init__(self, stream: io.TextIOBase, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = None) -> bool:
+        """
+        Дочитывает порцию в буфер, отбрасывая уже разобранную часть
+        """
+        if self.eof:
+            return False
+        chunk = self.stream.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """
+        Следующий непробельный символ ('' в конце файла)
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if not char or char not in chars:
+            raise ValueError(f"Ожидался один из символов {chars!r} в JSON-массиве, получено {char!r}")
+        self.pos += 1
+        return char
+
+    def _value(self) -> Any:
+        if not self._peek():
+            raise ValueError("Неожиданный конец JSON-массива")
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # Значение у конца буфера могло быть обрезано (число "2." из "2.5"),
+                # поэтому за ним должен быть уже прочитан разделитель
+                if self.eof or (end < len(self.buffer) and self.buffer[end] in self.SEPARATORS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Элемент не поместился в буфер: дочитываем порцию не меньше буфера,
+            # чтобы крупные элементы разбирались за логарифмическое число попыток
+            self._fill(max(self.chunk_size, len(self.buffer)))
+
+    def __iter__(self) -> Iterator[Any]:
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Лениво читает элементы JSON-массива верхнего уровня (в том числе из .gz/.zst)
+    """
+    with open_text(path) as f:
+        yield from _JsonArrayReader(f, chunk_size)
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """
+    Потоковое чтение записей файла сбора данных: JSONL построчно,
+    JSON-массив - по одному элементу
+    """
+    if is_jsonl(path):
+        return iter_jsonl(path)
+    return iter_json_array(path)
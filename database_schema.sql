@@ -23,6 +23,7 @@ CREATE TABLE functional_purposes (
 CREATE TABLE systems (
     id INT AUTO_INCREMENT PRIMARY KEY,
     название VARCHAR(255) NOT NULL,
+    нормализованное_название VARCHAR(255), -- нижний регистр, без лишних пробелов
     разработчик VARCHAR(255),
     год_первого_релиза INT,
     описание TEXT,
@@ -55,6 +56,15 @@ CREATE TABLE system_functional_purposes (
     UNIQUE KEY unique_system_purpose (system_id, functional_purpose_id)
 );
 
+-- Таблица связи систем и поддерживаемых языков (по одной строке на язык)
+CREATE TABLE system_languages (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    system_id INT,
+    язык VARCHAR(50) NOT NULL, -- код языка в нижнем регистре: 'en', 'ru'
+    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE CASCADE,
+    UNIQUE KEY ux_system_languages_natural (system_id, язык)
+);
+
 -- Таблица метрик систем
 CREATE TABLE system_metrics (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -64,7 +74,8 @@ CREATE TABLE system_metrics (
     датасет VARCHAR(255),
     язык VARCHAR(50),
     дата_измерения DATE,
-    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE CASCADE
+    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE CASCADE,
+    UNIQUE KEY ux_system_metrics_natural (system_id, метрика_тип, датасет, язык)
 );
 
 -- Таблица научных статей
@@ -75,7 +86,8 @@ CREATE TABLE system_papers (
     ссылка_arxiv VARCHAR(500),
     год_публикации INT,
     авторы TEXT,
-    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE CASCADE
+    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE CASCADE,
+    UNIQUE KEY ux_system_papers_natural (system_id, название_статьи, ссылка_arxiv)
 );
 
 -- Таблица датасетов
@@ -89,7 +101,8 @@ CREATE TABLE datasets (
     лицензия VARCHAR(100),
     источник VARCHAR(100), -- 'huggingface' или 'openslr'
     ссылка VARCHAR(500),
-    дата_создания TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    дата_создания TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY ux_datasets_natural (название, источник)
 );
 
 -- Таблица бенчмарков
@@ -101,7 +114,8 @@ CREATE TABLE benchmarks (
     описание TEXT,
     ссылка VARCHAR(500),
     источник VARCHAR(100), -- 'paperswithcode', 'superbbenchmark', 'allenai', etc.
-    дата_создания TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    дата_создания TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY ux_benchmarks_natural (название, источник)
 );
 
 -- Таблица результатов бенчмарков
@@ -117,7 +131,94 @@ CREATE TABLE benchmark_results (
     ссылка_на_код VARCHAR(500),
     дата_отправки DATE,
     FOREIGN KEY (benchmark_id) REFERENCES benchmarks(id) ON DELETE CASCADE,
-    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE CASCADE
+    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE CASCADE,
+    UNIQUE KEY ux_benchmark_results_natural (benchmark_id, system_id, метрика_тип, датасет_раздел)
+);
+
+-- Манифест загрузки: какие файлы сбора данных уже загружены и в каком виде
+CREATE TABLE load_manifest (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    путь_файла VARCHAR(500) NOT NULL UNIQUE,
+    хэш_содержимого VARCHAR(64) NOT NULL, -- SHA-256
+    размер_байты BIGINT,
+    время_изменения DOUBLE,
+    количество_записей INT,
+    дата_загрузки TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Снимки лидербордов, просмотренные при загрузке истории метрик;
+-- количество_изменений NULL - снимок пропущен (пустой или старее истории)
+CREATE TABLE leaderboard_snapshots (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    путь_файла VARCHAR(500) NOT NULL UNIQUE,
+    дата_снимка TIMESTAMP NOT NULL,
+    хэш_содержимого VARCHAR(64),
+    количество_результатов INT,
+    количество_изменений INT,
+    дата_загрузки TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- История метрик лидербордов: только изменившиеся значения, строка
+-- действует до следующей строки того же ключа; NULL - метрика пропала
+CREATE TABLE leaderboard_history (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    benchmark_id INT NOT NULL,
+    system_id INT NOT NULL,
+    метрика_тип VARCHAR(50) NOT NULL,
+    датасет_раздел VARCHAR(50) NOT NULL,
+    дата_начала TIMESTAMP NOT NULL,
+    значение DECIMAL(10,4),
+    лицензия VARCHAR(50), -- License модели в лидерборде (Open / Proprietary)
+    FOREIGN KEY (benchmark_id) REFERENCES benchmarks(id) ON DELETE CASCADE,
+    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE CASCADE,
+    UNIQUE KEY ux_leaderboard_history_natural (benchmark_id, system_id, метрика_тип, датасет_раздел, дата_начала)
+);
+
+-- Сводные таблицы по systems (поддерживает DataLoader, пересборка -
+-- python database_tools/summary_tables.py). ключ - JSON значений группы
+CREATE TABLE summary_year_developer (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    ключ VARCHAR(600) NOT NULL UNIQUE,
+    год_первого_релиза INT,
+    разработчик VARCHAR(255),
+    количество_систем INT NOT NULL DEFAULT 0,
+    количество_со_скачиваниями INT NOT NULL DEFAULT 0,
+    сумма_скачиваний BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE summary_license (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    ключ VARCHAR(600) NOT NULL UNIQUE,
+    тип_лицензии VARCHAR(100),
+    количество_систем INT NOT NULL DEFAULT 0,
+    количество_со_скачиваниями INT NOT NULL DEFAULT 0,
+    сумма_скачиваний BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE summary_architecture (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    ключ VARCHAR(600) NOT NULL UNIQUE,
+    архитектура VARCHAR(100),
+    количество_систем INT NOT NULL DEFAULT 0,
+    количество_со_скачиваниями INT NOT NULL DEFAULT 0,
+    сумма_скачиваний BIGINT NOT NULL DEFAULT 0
+);
+
+-- Кэш результатов анализа: последний результат каждого запроса DataAnalyzer
+-- и версия данных, для которой он посчитан
+CREATE TABLE analysis_cache (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    название_запроса VARCHAR(200) NOT NULL UNIQUE,
+    версия_данных VARCHAR(64) NOT NULL,
+    результат LONGBLOB NOT NULL, -- JSON, сжатый zlib
+    дата_расчета TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Счетчик версии данных: DataLoader увеличивает его в транзакции каждой записи
+CREATE TABLE data_versions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    название VARCHAR(50) NOT NULL UNIQUE,
+    версия BIGINT NOT NULL DEFAULT 0
 );
 
 -- Вставка базовых данных для типов словарей
@@ -134,12 +235,22 @@ INSERT INTO functional_purposes (назначение, описание) VALUES
 ('диалоговая', 'Диалоговые системы и чат-боты');
 
 -- Создание индексов для оптимизации запросов
-CREATE INDEX idx_systems_developer ON systems(разработчик);
-CREATE INDEX idx_systems_year ON systems(год_первого_релиза);
-CREATE INDEX idx_systems_license ON systems(тип_лицензии);
-CREATE INDEX idx_metrics_type ON system_metrics(метрика_тип);
+CREATE UNIQUE INDEX ux_systems_normalized_name ON systems(нормализованное_название);
+-- Покрывающие индексы под запросы анализа (совпадают с индексами в models.py)
+CREATE INDEX idx_systems_year_covering ON systems(год_первого_релиза, разработчик, количество_скачиваний);
+CREATE INDEX idx_systems_developer_covering ON systems(разработчик, количество_скачиваний);
+CREATE INDEX idx_systems_architecture_covering ON systems(архитектура, количество_скачиваний);
+CREATE INDEX idx_systems_license_covering ON systems(тип_лицензии, количество_скачиваний);
+CREATE INDEX idx_system_metrics_type_covering ON system_metrics(метрика_тип, system_id, значение, датасет);
+CREATE INDEX idx_benchmark_results_rank_covering ON benchmark_results(benchmark_id, ранг, system_id, метрика_тип, значение);
+CREATE INDEX idx_datasets_hours ON datasets(объем_часы);
+CREATE INDEX idx_system_languages_language ON system_languages(язык, system_id);
 CREATE INDEX idx_metrics_dataset ON system_metrics(датасет);
 CREATE INDEX idx_papers_year ON system_papers(год_публикации);
 CREATE INDEX idx_benchmarks_source ON benchmarks(источник);
-CREATE INDEX idx_benchmark_results_rank ON benchmark_results(ранг);
-CREATE INDEX idx_benchmark_results_metric ON benchmark_results(метрика_тип);
+CREATE INDEX idx_leaderboard_history_system_time ON leaderboard_history(system_id, дата_начала);
+
+-- Индексы внешних ключей, которые не покрыты уникальными ключами
+CREATE INDEX idx_benchmark_results_system ON benchmark_results(system_id);
+CREATE INDEX idx_system_vocabulary_types_type ON system_vocabulary_types(vocabulary_type_id);
+CREATE INDEX idx_system_functional_purposes_purpose ON system_functional_purposes(functional_purpose_id);
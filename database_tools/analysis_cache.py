@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Кэш результатов анализа в таблице analysis_cache: для каждого запроса
+DataAnalyzer хранится последний результат (JSON, сжатый zlib) и версия
+данных, для которой он посчитан. Версия - счетчик data_versions, который
+DataLoader увеличивает в транзакции каждой записи вместе с очисткой кэша,
+поэтому результат, посчитанный до записи, не попадет в кэш новой версии
+"""
+
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from models import AnalysisCache, DataVersion
+from bulk_insert import increment_rows, upsert_rows
+
+# Строка счетчика data_versions для таблиц данных
+DATA_VERSION_NAME = 'data'
+
+def data_version(session: Session) -> str:
+    """
+    Версия данных - значение счетчика data_versions (0 для базы без записей).
+    Читается одной строкой по уникальному ключу
+    """
+    version = session.execute(
+        select(DataVersion.версия).where(DataVersion.название == DATA_VERSION_NAME)
+    ).scalar()
+    return str(version or 0)
+
+def _encode_value(value):
+    """
+    Значения результатов анализа, которых нет в JSON: даты - с пометкой типа,
+    чтобы восстановиться при чтении, числа numpy - как числа Python
+    """
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Значение типа {type(value).__name__} не сохраняется в кэше анализа")
+
+def _decode_value(obj: dict):
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return date.fromisoformat(obj['__date__'])
+    return obj
+
+def encode_result(result: Any) -> bytes:
+    return zlib.compress(json.dumps(result, ensure_ascii=False, default=_encode_value).encode('utf-8'))
+
+def decode_result(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload).decode('utf-8'), object_hook=_decode_value)
+
+class AnalysisResultCache:
+    """
+    Чтение и запись результатов запросов анализа по имени запроса и версии данных
+    """
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get(self, name: str, version: str) -> Optional[Any]:
+        """
+        Результат запроса name для версии version или None, если его нет
+        """
+        payload = self.session.execute(
+            select(AnalysisCache.результат)
+            .where(AnalysisCache.название_запроса == name, AnalysisCache.версия_данных == version)
+        ).scalar()
+        if payload is None:
+            return None
+        return decode_result(payload)
+
+    def put(self, name: str, version: str, result: Any):
+        """
+        Сохраняет результат запроса, заменяя результат для прежней версии
+        """
+        upsert_rows(self.session, AnalysisCache.__table__, [{
+            'название_запроса': name,
+            'версия_данных': version,
+            'результат': encode_result(result),
+            'дата_расчета': datetime.now().replace(microsecond=0)
+        }])
+        self.session.commit()
+
+def invalidate_analysis_cache(session: Session):
+    """
+    Удаляет все результаты анализа и увеличивает версию данных
+    в текущей транзакции сессии
+    """
+    session.execute(delete(AnalysisCache))
+    increment_rows(session, DataVersion.__table__, [{'название': DATA_VERSION_NAME, 'версия': 1}], ['версия'])
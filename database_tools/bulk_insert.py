@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Пакетная вставка строк через SQLAlchemy Core: выделение идентификаторов
+порциями, executemany для SQLite и COPY для PostgreSQL, идемпотентная
+вставка по естественному ключу (INSERT ... ON CONFLICT)
+"""
+
+import io
+from typing import Dict, List, Sequence
+
+from sqlalchemy import Table, UniqueConstraint, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Столбцы, которые не перезаписываются при обновлении существующей строки
+PRESERVED_COLUMNS = {'id', 'дата_создания'}
+
+def dialect_name(session: Session) -> str:
+    return session.get_bind().dialect.name
+
+def reserve_ids(session: Session, table: Table, count: int) -> List[int]:
+    """
+    Выделяет count идентификаторов для новых строк таблицы. В PostgreSQL
+    значения берутся из последовательности одним запросом, в SQLite -
+    следующие после MAX(id): строки нужно вставить до следующего вызова
+    """
+    if count <= 0:
+        return []
+    if dialect_name(session) == 'postgresql':
+        rows = session.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+            {'table': table.name, 'count': count}
+        )
+        return [row[0] for row in rows]
+    last_id = session.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+    return list(range(last_id + 1, last_id + 1 + count))
+
+def _copy_value(value) -> str:
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def copy_rows(session: Session, table: Table, rows: Sequence[Dict]):
+    """
+    Вставка строк в PostgreSQL командой COPY ... FROM STDIN (текстовый формат)
+    """
+    columns = list(rows[0].keys())
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(row.get(column)) for column in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "{table.name}" ({column_list}) FROM STDIN', buffer)
+    finally:
+        cursor.close()
+
+def insert_rows(session: Session, table: Table, rows: Sequence[Dict], batch_size: int = 1000):
+    """
+    Вставляет строки порциями по batch_size: COPY в PostgreSQL,
+    executemany (один INSERT на порцию) в остальных СУБД.
+    Все строки должны иметь одинаковый набор ключей
+    """
+    use_copy = dialect_name(session) == 'postgresql'
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if use_copy:
+            copy_rows(session, table, batch)
+        else:
+            session.execute(table.insert(), batch)
+
+def natural_key(table: Table) -> List[str]:
+    """
+    Естественный ключ таблицы - столбцы индекса ux_<таблица>_natural, а без него -
+    единственного уникального индекса или ограничения. Если уникальных ключей
+    несколько, цель ON CONFLICT неоднозначна - это ошибка схемы
+    """
+    for index in table.indexes:
+        if index.name == f'ux_{table.name}_natural':
+            return [column.name for column in index.columns]
+
+    keys = {tuple(column.name for column in index.columns) for index in table.indexes if index.unique}
+    keys.update(tuple(column.name for column in constraint.columns) for constraint in table.constraints
+                if isinstance(constraint, UniqueConstraint))
+    if not keys:
+        raise ValueError(f"У таблицы {table.name} нет уникального ключа")
+    if len(keys) > 1:
+        raise ValueError(f"У таблицы {table.name} несколько уникальных ключей {sorted(keys)}, "
+                         f"естественный ключ задается индексом ux_{table.name}_natural")
+    return list(keys.pop())
+
+def upsert_rows(session: Session, table: Table, rows: Sequence[Dict], batch_size: int = 1000,
+                update: bool = True):
+    """
+    INSERT ... ON CONFLICT по естественному ключу таблицы: существующие строки
+    обновляются (update=True) или остаются как есть (update=False).
+    Повторы ключа внутри порции схлопываются - побеждает последняя строка
+    """
+    if not rows:
+        return
+    insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[dialect_name(session)]
+    key_columns = natural_key(table)
+
+    for start in range(0, len(rows), batch_size):
+        unique_rows = {}
+        for row in rows[start:start + batch_size]:
+            unique_rows[tuple(row.get(column) for column in key_columns)] = row
+        batch = list(unique_rows.values())
+
+        statement = insert(table)
+        update_columns = [column for column in batch[0]
+                          if column not in key_columns and column not in PRESERVED_COLUMNS]
+        if update and update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={column: statement.excluded[column] for column in update_columns}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+        session.execute(statement, batch)
+
+def increment_rows(session: Session, table: Table, rows: Sequence[Dict], counters: List[str],
+                   batch_size: int = 1000):
+    """
+    INSERT ... ON CONFLICT по естественному ключу, при конфликте столбцы
+    counters увеличиваются на значения строки. Ключи строк не должны повторяться
+    """
+    if not rows:
+        return
+    insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[dialect_name(session)]
+    key_columns = natural_key(table)
+
+    for start in range(0, len(rows), batch_size):
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={column: table.c[column] + statement.excluded[column] for column in counters}
+        )
+        session.execute(statement, rows[start:start + batch_size])
@@ -3,18 +3,36 @@
 Скрипт для загрузки собранных данных в базу данных
 """
 
-import json
 import os
+import sys
+import glob
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator
 import logging
 from tqdm import tqdm
+from sqlalchemy import select, update, delete, bindparam, func
 
-from database_config import get_session, init_database
+from database_config import get_session, init_database, bulk_load
 from models import (
     System, VocabularyType, FunctionalPurpose, SystemMetric, 
-    SystemPaper, Dataset, Benchmark, BenchmarkResult
+    SystemPaper, Dataset, Benchmark, BenchmarkResult, LoadManifest, LeaderboardSnapshot, LeaderboardHistory,
+    system_vocabulary_types, system_functional_purposes, system_languages, normalize_system_name
 )
+from bulk_insert import reserve_ids, insert_rows, upsert_rows
+from analysis_cache import invalidate_analysis_cache
+from summary_tables import SummaryDelta, summary_values, SUMMARY_COLUMNS
+from leaderboard_history import find_snapshots, read_snapshot_file, snapshot_values, diff_snapshot, history_state
+from row_builders import (
+    iter_record_batches, parse_file_to_queue, iter_queue_batches, system_row, system_record, model_paper_rows,
+    benchmark_record, vocabulary_type_name, functional_purpose_names, language_codes
+)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_collection'))
+
+from jsonl_io import iter_records
 
 # Настройка логирования
 logging.basicConfig(
@@ -23,10 +41,24 @@ logging.basicConfig(
 )
 
 class DataLoader:
-    def __init__(self):
+    def __init__(self, bulk: bool = True, batch_size: int = 1000, workers: int = None,
+                 queue_size: int = 4):
         self.session = get_session()
         self.vocabulary_types = {}
         self.functional_purposes = {}
+        # Пакетная загрузка систем через Core (executemany / COPY) вместо
+        # ORM-объекта и flush на каждую запись
+        self.bulk = bulk
+        self.batch_size = batch_size
+        # Нормализованное название -> id системы: загружается одним запросом
+        # и пополняется по мере создания систем
+        self.system_ids = None
+        # Процессы разбора файлов в load_all_data (по умолчанию по числу ядер)
+        # и число порций, которые каждый из них может разобрать наперед
+        self.workers = workers
+        self.queue_size = queue_size
+        # Изменения сводных таблиц, которые применяются вместе с порцией записи
+        self.summary_delta = SummaryDelta()
         
     def load_vocabulary_types(self):
         """
@@ -73,42 +105,137 @@ class DataLoader:
         
         logging.info(f"Загружено {len(self.functional_purposes)} функциональных назначений")
     
-    def load_systems_from_json(self, file_path: str):
+    def _iter_records(self, file_path: str) -> Iterator[Dict]:
+        """
+        Перебирает записи файла сбора данных лениво: JSONL (.jsonl, .jsonl.gz,
+        .jsonl.zst) построчно, JSON-массив - по одному элементу, не разбирая
+        документ целиком
+        """
+        return iter_records(file_path)
+    
+    def _get_system_index(self) -> Dict[str, int]:
+        """
+        Индекс систем по нормализованному названию. Строится одним запросом;
+        системам, загруженным до появления столбца, название проставляется
+        здесь же (при повторах - только первой из них)
+        """
+        if self.system_ids is not None:
+            return self.system_ids
+        
+        rows = self.session.execute(
+            select(System.id, System.название, System.нормализованное_название).order_by(System.id)
+        ).all()
+        self.system_ids = {normalized: system_id for system_id, _, normalized in rows if normalized}
+        
+        backfill = []
+        for system_id, name, normalized in rows:
+            key = normalize_system_name(name)
+            if normalized is None and key and key not in self.system_ids:
+                self.system_ids[key] = system_id
+                backfill.append({'system_key': system_id, 'normalized': key})
+        if backfill:
+            table = System.__table__
+            self.session.execute(
+                update(table).where(table.c.id == bindparam('system_key'))
+                .values(нормализованное_название=bindparam('normalized')),
+                backfill
+            )
+            self.session.commit()
+        
+        logging.info(f"Индекс систем: {len(self.system_ids)} названий")
+        return self.system_ids
+    
+    def _remember_system(self, system: System):
+        if system.нормализованное_название:
+            self._get_system_index()[system.нормализованное_название] = system.id
+    
+    def _resolve_system(self, model_name: str, description: str) -> int:
+        """
+        Возвращает id системы по названию, создавая ее при отсутствии
+        """
+        normalized = normalize_system_name(model_name)
+        if normalized is None:
+            raise ValueError("Система без названия не создается")
+        system_id = self._get_system_index().get(normalized)
+        if system_id is not None:
+            return system_id
+        
+        system_data = {
+            'название': model_name,
+            'нормализованное_название': normalized,
+            'разработчик': 'Unknown',
+            'описание': description
+        }
+        system = System(**system_data)
+        self.session.add(system)
+        self.session.flush()
+        self._remember_system(system)
+        self.summary_delta.add(summary_values(system))
+        return system.id
+    
+    def _load_file(self, kind: str, file_path: str, desc: str):
         """
-        Загружает системы из JSON файла
+        Загружает файл в текущем процессе: записи преобразуются в строки
+        порциями по batch_size и сразу пишутся в БД одной транзакцией
         """
         if not os.path.exists(file_path):
             logging.error(f"Файл не найден: {file_path}")
             return
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        loaded = 0
+        with tqdm(desc=desc) as progress:
+            for batch in iter_record_batches(kind, self._iter_records(file_path), self.batch_size):
+                self._write_batch(kind, batch)
+                loaded += len(batch)
+                progress.update(len(batch))
         
+        self.session.commit()
+        logging.info(f"Загружено записей ({kind}): {loaded} из файла {file_path}")
+        return loaded
+    
+    def _write_batch(self, kind: str, batch: List[Dict]):
+        # Результаты анализа устаревают в той же транзакции, что и данные
+        invalidate_analysis_cache(self.session)
+        writers = {
+            'systems': self._write_systems,
+            'datasets': self._write_datasets,
+            'papers': self._write_papers,
+            'benchmarks': self._write_benchmarks
+        }
+        writers[kind](batch)
+        # Сводные таблицы обновляются в той же транзакции, что и системы
+        self.summary_delta.apply(self.session)
+    
+    def load_systems_from_json(self, file_path: str):
+        """
+        Загружает системы из JSON файла. Уже известные системы обновляются
+        upsert по естественному ключу (как при пакетной загрузке)
+        """
+        if self.bulk:
+            return self._load_file('systems', file_path, "Загрузка систем")
+        
+        if not os.path.exists(file_path):
+            logging.error(f"Файл не найден: {file_path}")
+            return
+        
+        data = self._iter_records(file_path)
+        system_ids = self._get_system_index()
+        loaded = 0
         for item in tqdm(data, desc="Загрузка систем"):
             try:
-                # Создаем систему
-                system_data = {
-                    'название': item.get('model_name', ''),
-                    'разработчик': item.get('author_organization', ''),
-                    'описание': item.get('description', ''),
-                    'ссылка_на_источник': item.get('model_url', ''),
-                    'тип_лицензии': item.get('license', ''),
-                    'архитектура': item.get('architecture', ''),
-                    'поддерживаемые_языки': ', '.join(item.get('languages', [])),
-                    'количество_скачиваний': item.get('downloads', 0)
-                }
-                
-                # Парсим дату создания
-                created_date = item.get('created_date', '')
-                if created_date:
-                    try:
-                        system_data['год_первого_релиза'] = int(created_date[:4])
-                    except:
-                        pass
+                system_data = system_row(item)
+                loaded += 1
+                if system_data['нормализованное_название'] in system_ids:
+                    # Поля обновляются, связи заменяются - как в _write_systems
+                    self._write_systems([system_record(item)])
+                    continue
                 
+                # Создаем систему
                 system = System(**system_data)
                 self.session.add(system)
                 self.session.flush()  # Получаем ID
+                self._remember_system(system)
+                self.summary_delta.add(summary_values(system))
                 
                 # Добавляем типы словарей
                 self._add_vocabulary_types(system, item)
@@ -116,6 +243,9 @@ class DataLoader:
                 # Добавляем функциональные назначения
                 self._add_functional_purposes(system, item)
                 
+                # Добавляем языки
+                self._add_languages(system, item)
+                
                 # Добавляем метрики
                 self._add_metrics(system, item)
                 
@@ -126,22 +256,89 @@ class DataLoader:
                 logging.error(f"Ошибка при загрузке системы {item.get('model_name', 'Unknown')}: {e}")
                 continue
         
+        invalidate_analysis_cache(self.session)
+        self.summary_delta.apply(self.session)
         self.session.commit()
         logging.info(f"Загружено систем из файла: {file_path}")
+        return loaded
+    
+    def _write_systems(self, batch: List[Dict]):
+        """
+        Пакетная запись систем: идентификаторы новых систем выделяются на порцию
+        сразу, новые системы, связи и статьи вставляются executemany (COPY в
+        PostgreSQL). У уже известных систем обновляются поля, а связи заменяются
+        """
+        now = datetime.now().replace(microsecond=0)
+        system_ids = self._get_system_index()
+        
+        # Повторы названия внутри порции: остается первая запись
+        records, batch_names = [], set()
+        for record in batch:
+            normalized = record['system']['нормализованное_название']
+            if normalized in batch_names:
+                continue
+            if normalized:
+                batch_names.add(normalized)
+            records.append(record)
+        
+        new_count = sum(1 for record in records
+                        if record['system']['нормализованное_название'] not in system_ids)
+        new_ids = iter(reserve_ids(self.session, System.__table__, new_count))
+        systems, existing_systems, vocabulary_links, purpose_links, language_links, papers = [], [], [], [], [], []
+        
+        for record in records:
+            system_data = record['system']
+            normalized = system_data['нормализованное_название']
+            if normalized in system_ids:
+                system_id = system_ids[normalized]
+                existing_systems.append(dict(system_data, id=system_id, дата_обновления=now))
+            else:
+                system_id = next(new_ids)
+                systems.append(dict(system_data, id=system_id, дата_создания=now, дата_обновления=now))
+                if normalized:
+                    system_ids[normalized] = system_id
+            
+            vocab_type = self.vocabulary_types.get(record['vocabulary_type'])
+            if vocab_type:
+                vocabulary_links.append({'system_id': system_id, 'vocabulary_type_id': vocab_type.id})
+            
+            for purpose_name in record['functional_purposes']:
+                purpose = self.functional_purposes.get(purpose_name)
+                if purpose:
+                    purpose_links.append({'system_id': system_id, 'functional_purpose_id': purpose.id})
+            
+            for language in record['languages']:
+                language_links.append({'system_id': system_id, 'язык': language})
+            
+            for paper_data in record['papers']:
+                papers.append(dict(paper_data, system_id=system_id, год_публикации=None))
+        
+        for system in systems:
+            self.summary_delta.add(system)
+        if existing_systems:
+            # Прежнее состояние обновляемых систем снимается со сводных таблиц
+            updated_ids = [system['id'] for system in existing_systems]
+            columns = [System.__table__.c[column] for column in SUMMARY_COLUMNS]
+            for row in self.session.execute(select(*columns).where(System.id.in_(updated_ids))):
+                self.summary_delta.add(row._mapping, sign=-1)
+            for system in existing_systems:
+                self.summary_delta.add(system)
+        
+        insert_rows(self.session, System.__table__, systems, self.batch_size)
+        upsert_rows(self.session, System.__table__, existing_systems, self.batch_size)
+        if existing_systems:
+            for link_table in (system_vocabulary_types, system_functional_purposes, system_languages):
+                self.session.execute(delete(link_table).where(link_table.c.system_id.in_(updated_ids)))
+        insert_rows(self.session, system_vocabulary_types, vocabulary_links, self.batch_size)
+        insert_rows(self.session, system_functional_purposes, purpose_links, self.batch_size)
+        insert_rows(self.session, system_languages, language_links, self.batch_size)
+        upsert_rows(self.session, SystemPaper.__table__, papers, self.batch_size, update=False)
     
     def _add_vocabulary_types(self, system: System, item: Dict):
         """
         Добавляет типы словарей к системе
         """
-        # Определяем тип словаря на основе архитектуры или других признаков
-        architecture = item.get('architecture', '').lower()
-        if 'whisper' in architecture or 'wav2vec' in architecture:
-            vocab_type = self.vocabulary_types.get('большой (LVCSR)')
-        elif 'tacotron' in architecture or 'fastspeech' in architecture:
-            vocab_type = self.vocabulary_types.get('средний')
-        else:
-            vocab_type = self.vocabulary_types.get('средний')  # По умолчанию
-        
+        vocab_type = self.vocabulary_types.get(vocabulary_type_name(item))
         if vocab_type:
             system.vocabulary_types.append(vocab_type)
     
@@ -149,19 +346,42 @@ class DataLoader:
         """
         Добавляет функциональные назначения к системе
         """
-        system_type = item.get('system_type', '').lower()
-        pipeline_tags = item.get('pipeline_tags', [])
-        
-        if 'asr' in system_type or 'automatic-speech-recognition' in pipeline_tags:
-            purpose = self.functional_purposes.get('диктовка')
-            if purpose:
-                system.functional_purposes.append(purpose)
-        
-        if 'tts' in system_type or 'text-to-speech' in pipeline_tags:
-            purpose = self.functional_purposes.get('диалоговая')
+        for purpose_name in functional_purpose_names(item):
+            purpose = self.functional_purposes.get(purpose_name)
             if purpose:
                 system.functional_purposes.append(purpose)
     
+    def _add_languages(self, system: System, item: Dict):
+        """
+        Добавляет поддерживаемые языки системы
+        """
+        links = [{'system_id': system.id, 'язык': language}
+                 for language in language_codes(item.get('languages', []))]
+        if links:
+            self.session.execute(system_languages.insert(), links)
+    
+    def backfill_system_languages(self):
+        """
+        Заполняет system_languages по строкам поддерживаемые_языки для баз,
+        загруженных до появления таблицы (файлы таких баз пропускаются по манифесту)
+        """
+        if self.session.execute(select(system_languages.c.id).limit(1)).first() is not None:
+            return
+        rows = self.session.execute(
+            select(System.id, System.поддерживаемые_языки)
+            .where(System.поддерживаемые_языки.isnot(None), System.поддерживаемые_языки != '')
+        )
+        links = [
+            {'system_id': system_id, 'язык': language}
+            for system_id, languages in rows
+            for language in language_codes(languages.split(','))
+        ]
+        if links:
+            invalidate_analysis_cache(self.session)
+            insert_rows(self.session, system_languages, links, self.batch_size)
+            self.session.commit()
+            logging.info(f"Заполнена таблица system_languages: {len(links)} связей")
+    
     def _add_metrics(self, system: System, item: Dict):
         """
         Добавляет метрики к системе
@@ -173,128 +393,111 @@ class DataLoader:
         """
         Добавляет статьи к системе
         """
-        papers = item.get('papers', [])
-        for paper in papers:
-            paper_data = {
-                'название_статьи': f"Paper for {system.название}",
-                'ссылка_arxiv': paper.get('arxiv_link', ''),
-                'авторы': 'Unknown'
-            }
-            paper_obj = SystemPaper(**paper_data)
-            system.papers.append(paper_obj)
+        for paper_data in model_paper_rows(system.название, item):
+            system.papers.append(SystemPaper(**paper_data))
     
     def load_datasets_from_json(self, file_path: str):
         """
         Загружает датасеты из JSON файла
         """
-        if not os.path.exists(file_path):
-            logging.error(f"Файл не найден: {file_path}")
-            return
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        for item in tqdm(data, desc="Загрузка датасетов"):
-            try:
-                dataset_data = {
-                    'название': item.get('dataset_name', ''),
-                    'описание': item.get('description', ''),
-                    'объем_часы': item.get('size_hours'),
-                    'объем_гигабайты': item.get('size_gb'),
-                    'язык': item.get('language', ''),
-                    'лицензия': item.get('license', ''),
-                    'источник': item.get('source', ''),
-                    'ссылка': item.get('url', '')
-                }
-                
-                dataset = Dataset(**dataset_data)
-                self.session.add(dataset)
-                
-            except Exception as e:
-                logging.error(f"Ошибка при загрузке датасета {item.get('dataset_name', 'Unknown')}: {e}")
-                continue
-        
-        self.session.commit()
-        logging.info(f"Загружено датасетов из файла: {file_path}")
+        return self._load_file('datasets', file_path, "Загрузка датасетов")
+    
+    def _write_datasets(self, batch: List[Dict]):
+        upsert_rows(self.session, Dataset.__table__, batch, self.batch_size)
     
     def load_benchmarks_from_json(self, file_path: str):
         """
         Загружает бенчмарки из JSON файла
         """
-        if not os.path.exists(file_path):
-            logging.error(f"Файл не найден: {file_path}")
-            return
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        for item in tqdm(data, desc="Загрузка бенчмарков"):
-            try:
-                # Создаем бенчмарк
-                benchmark_data = {
-                    'название': item.get('benchmark_name', ''),
-                    'задачи': ', '.join(item.get('tasks', [])),
-                    'датасет': item.get('dataset', ''),
-                    'описание': item.get('description', ''),
-                    'ссылка': item.get('url', ''),
-                    'источник': item.get('source', '')
-                }
-                
-                benchmark = Benchmark(**benchmark_data)
-                self.session.add(benchmark)
-                self.session.flush()  # Получаем ID
-                
-                # Добавляем результаты
-                results = item.get('results', [])
-                for result in results:
-                    self._add_benchmark_result(benchmark, result)
-                
-            except Exception as e:
-                logging.error(f"Ошибка при загрузке бенчмарка {item.get('benchmark_name', 'Unknown')}: {e}")
-                continue
-        
-        self.session.commit()
-        logging.info(f"Загружено бенчмарков из файла: {file_path}")
+        return self._load_file('benchmarks', file_path, "Загрузка бенчмарков")
     
-    def _add_benchmark_result(self, benchmark: Benchmark, result: Dict):
+    def _write_benchmarks(self, batch: List[Dict]):
         """
-        Добавляет результат бенчмарка
+        Создает или обновляет бенчмарки и их результаты
         """
-        # Находим систему по названию
-        model_name = result.get('model_name', '')
-        system = self.session.query(System).filter_by(название=model_name).first()
-        
-        if not system:
-            # Создаем систему если не найдена
-            system_data = {
-                'название': model_name,
-                'разработчик': 'Unknown',
-                'описание': f'System from benchmark {benchmark.название}'
-            }
-            system = System(**system_data)
-            self.session.add(system)
-            self.session.flush()
-        
-        # Добавляем метрики
-        metrics = result.get('metrics', [])
-        for metric in metrics:
-            result_data = {
-                'benchmark_id': benchmark.id,
-                'system_id': system.id,
-                'ранг': result.get('rank', 0),
-                'метрика_тип': metric.get('type', ''),
-                'значение': metric.get('value', 0),
-                'датасет_раздел': metric.get('dataset_split', 'test'),
-                'ссылка_на_статью': result.get('paper_link', ''),
-                'ссылка_на_код': result.get('code_link', '')
-            }
+        for record in batch:
+            benchmark_data = record['benchmark']
+            upsert_rows(self.session, Benchmark.__table__, [benchmark_data])
+            benchmark_id = self.session.execute(
+                select(Benchmark.id).where(Benchmark.название == benchmark_data['название'],
+                                           Benchmark.источник == benchmark_data['источник'])
+            ).scalar_one()
             
-            benchmark_result = BenchmarkResult(**result_data)
-            self.session.add(benchmark_result)
+            rows = []
+            for result in record['results']:
+                # Находим систему по названию (или создаем, если не найдена)
+                system_id = self._resolve_system(result['model_name'],
+                                                 f'System from benchmark {benchmark_data["название"]}')
+                rows.extend(dict(row, benchmark_id=benchmark_id, system_id=system_id) for row in result['rows'])
+            upsert_rows(self.session, BenchmarkResult.__table__, rows, self.batch_size)
+    
+    def load_papers_from_json(self, file_path: str):
+        """
+        Загружает статьи из JSON файла
+        """
+        return self._load_file('papers', file_path, "Загрузка статей")
+    
+    def _write_papers(self, batch: List[Dict]):
+        """
+        Записывает статьи и метрики из них, связывая их с системами по названию
+        """
+        papers, metrics = [], []
+        for record in batch:
+            # Находим систему по названию (или создаем, если не найдена)
+            system_id = self._resolve_system(record['model_name'], record['description'])
+            papers.append(dict(record['paper'], system_id=system_id))
+            metrics.extend(dict(metric, system_id=system_id) for metric in record['metrics'])
+        upsert_rows(self.session, SystemPaper.__table__, papers, self.batch_size)
+        upsert_rows(self.session, SystemMetric.__table__, metrics, self.batch_size)
+    
+    def _file_changed(self, key: str, file_path: str, manifest: Dict[str, LoadManifest]):
+        """
+        Проверяет файл по манифесту загрузки. Возвращает хэш содержимого, если
+        файл нужно загрузить, и None, если он уже загружен в этом виде.
+        Размер и время изменения сверяются первыми, хэш считается только при
+        их расхождении
+        """
+        stat = os.stat(file_path)
+        entry = manifest.get(key)
+        if entry and entry.размер_байты == stat.st_size and entry.время_изменения == stat.st_mtime:
+            return None
+        
+        content_hash = self._content_hash(file_path)
+        if entry and entry.хэш_содержимого == content_hash:
+            # Содержимое то же (файл скопирован или "тронут") - обновляем отметки
+            entry.размер_байты = stat.st_size
+            entry.время_изменения = stat.st_mtime
+            self.session.commit()
+            return None
+        return content_hash
+    
+    def _content_hash(self, file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _record_manifest(self, key: str, file_path: str, content_hash: str, count: int):
+        """
+        Записывает в манифест хэш, размер и число записей загруженного файла
+        """
+        stat = os.stat(file_path)
+        upsert_rows(self.session, LoadManifest.__table__, [{
+            'путь_файла': key,
+            'хэш_содержимого': content_hash,
+            'размер_байты': stat.st_size,
+            'время_изменения': stat.st_mtime,
+            'количество_записей': count or 0,
+            'дата_загрузки': datetime.now().replace(microsecond=0)
+        }])
+        self.session.commit()
     
     def load_all_data(self, data_dir: str = "../data_collection"):
         """
-        Загружает все данные из папки сбора данных
+        Загружает все данные из папки сбора данных. Файлы, уже загруженные
+        в неизменном виде (по манифесту load_manifest), пропускаются;
+        измененные применяются как upsert по естественным ключам
         """
         logging.info("Начинаем загрузку всех данных")
         
@@ -304,86 +507,174 @@ class DataLoader:
         # Загружаем справочные данные
         self.load_vocabulary_types()
         self.load_functional_purposes()
+        self.backfill_system_languages()
+        
+        manifest = {entry.путь_файла: entry for entry in self.session.query(LoadManifest)}
         
-        # Загружаем данные по группам
+        # Файлы групп (*.json и потоковые *.jsonl[.gz|.zst]) в порядке записи:
+        # системы раньше статей и бенчмарков, которые на них ссылаются
         groups = [
-            ("group1_huggingface_models", "models_data_*.json", self.load_systems_from_json),
-            ("group2_datasets", "datasets_data_*.json", self.load_datasets_from_json),
-            ("group3_papers", "papers_data_*.json", self.load_papers_from_json),
-            ("group4_benchmarks", "benchmarks_data_*.json", self.load_benchmarks_from_json)
+            ("group1_huggingface_models", "models_data_*.json*", 'systems'),
+            ("group2_datasets", "datasets_data_*.json*", 'datasets'),
+            ("group3_papers", "papers_data_*.json*", 'papers'),
+            ("group4_benchmarks", "benchmarks_data_*.json*", 'benchmarks')
         ]
         
-        for group_name, file_pattern, loader_func in groups:
+        pending = []
+        skipped = 0
+        for group_name, file_pattern, kind in groups:
             group_dir = os.path.join(data_dir, group_name)
             if os.path.exists(group_dir):
                 # Ищем файлы данных
-                import glob
-                files = glob.glob(os.path.join(group_dir, file_pattern))
+                files = sorted(glob.glob(os.path.join(group_dir, file_pattern)))
                 for file_path in files:
-                    logging.info(f"Загружаем данные из {file_path}")
-                    loader_func(file_path)
+                    key = os.path.relpath(file_path, data_dir)
+                    content_hash = self._file_changed(key, file_path, manifest)
+                    if content_hash is None:
+                        skipped += 1
+                    else:
+                        pending.append((kind, key, file_path, content_hash))
+        
+        if pending:
+            # Коммит возвращает соединение сессии в пул: следующее будет выдано
+            # уже с профилем загрузки
+            self.session.commit()
+            with bulk_load(self.session.get_bind()):
+                workers = min(self.workers or os.cpu_count() or 1, len(pending))
+                if workers > 1 and self.bulk:
+                    self._load_files_parallel(pending, workers)
+                else:
+                    # Построчный путь систем (bulk=False) есть только в последовательной загрузке
+                    loaders = {
+                        'systems': self.load_systems_from_json,
+                        'datasets': self.load_datasets_from_json,
+                        'papers': self.load_papers_from_json,
+                        'benchmarks': self.load_benchmarks_from_json
+                    }
+                    for kind, key, file_path, content_hash in pending:
+                        logging.info(f"Загружаем данные из {file_path}")
+                        count = loaders[kind](file_path)
+                        self._record_manifest(key, file_path, content_hash, count)
         
-        logging.info("Загрузка данных завершена")
+        self.load_leaderboard_history(os.path.join(data_dir, "group4_benchmarks"))
+        
+        logging.info(f"Загрузка данных завершена (без изменений пропущено файлов: {skipped})")
     
-    def load_papers_from_json(self, file_path: str):
+    def load_leaderboard_history(self, snapshots_dir: str):
         """
-        Загружает статьи из JSON файла
+        Загружает в историю лидербордов снимки huggingface_leaderboard_*,
+        которых еще нет в leaderboard_snapshots, по возрастанию даты: пишутся
+        только значения, изменившиеся относительно предыдущего снимка. Снимок
+        не новее последнего примененного пропускается - история дописывается
+        только в конец; снимок без результатов тоже пропускается. Пропущенные
+        снимки тоже записываются (без числа изменений), чтобы следующие
+        запуски не разбирали их и не предупреждали о них снова
         """
-        if not os.path.exists(file_path):
-            logging.error(f"Файл не найден: {file_path}")
+        loaded = {path for (path,) in self.session.query(LeaderboardSnapshot.путь_файла)}
+        pending = [(taken_at, path) for taken_at, path in find_snapshots(snapshots_dir)
+                   if os.path.basename(path) not in loaded]
+        if not pending:
             return
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        for item in tqdm(data, desc="Загрузка статей"):
-            try:
-                model_name = item.get('model_name', '')
-                system = self.session.query(System).filter_by(название=model_name).first()
-                
-                if not system:
-                    # Создаем систему если не найдена
-                    system_data = {
-                        'название': model_name,
-                        'разработчик': 'Unknown',
-                        'описание': f'System from paper {item.get("paper_title", "")}'
-                    }
-                    system = System(**system_data)
-                    self.session.add(system)
-                    self.session.flush()
-                
-                # Добавляем статью
-                paper_data = {
-                    'system_id': system.id,
-                    'название_статьи': item.get('paper_title', ''),
-                    'ссылка_arxiv': item.get('arxiv_link', ''),
-                    'год_публикации': item.get('publication_year'),
-                    'авторы': ', '.join(item.get('authors', []))
-                }
-                
-                paper = SystemPaper(**paper_data)
-                self.session.add(paper)
-                
-                # Добавляем метрики из статьи
-                metrics = item.get('metrics', [])
-                for metric in metrics:
-                    metric_data = {
-                        'system_id': system.id,
-                        'метрика_тип': metric.get('type', ''),
-                        'значение': metric.get('value', 0),
-                        'датасет': metric.get('dataset', ''),
-                        'язык': metric.get('language', '')
-                    }
-                    
-                    system_metric = SystemMetric(**metric_data)
-                    self.session.add(system_metric)
-                
-            except Exception as e:
-                logging.error(f"Ошибка при загрузке статьи {item.get('paper_title', 'Unknown')}: {e}")
+        latest = self.session.query(func.max(LeaderboardSnapshot.дата_снимка)).filter(
+            LeaderboardSnapshot.количество_изменений.isnot(None)).scalar()
+        applied_hashes = {content_hash for (content_hash,) in self.session.query(
+            LeaderboardSnapshot.хэш_содержимого).filter(LeaderboardSnapshot.количество_изменений.isnot(None))}
+        state = history_state(self.session)
+        benchmark_ids = {}
+        for taken_at, path in pending:
+            if latest is not None and taken_at <= latest:
+                content_hash = self._content_hash(path)
+                if content_hash in applied_hashes:
+                    # Копия уже примененного снимка под другим именем - история его уже содержит
+                    logging.debug(f"Снимок {path} совпадает с уже загруженным - пропущен")
+                else:
+                    logging.warning(f"Снимок {path} не новее загруженной истории ({latest}) - пропущен")
+                self._skip_snapshot(path, taken_at, content_hash)
                 continue
-        
+            
+            benchmarks = read_snapshot_file(path)
+            snapshot = snapshot_values(benchmarks)
+            if not snapshot:
+                # Пустой снимок (неудачный сбор) не означает, что все системы пропали
+                logging.warning(f"Снимок {path} без результатов - пропущен")
+                self._skip_snapshot(path, taken_at, self._content_hash(path))
+                continue
+            values = {}
+            for (benchmark_key, model_name, metric_type, dataset_split), value in snapshot.items():
+                if benchmark_key not in benchmark_ids:
+                    benchmark_ids[benchmark_key] = self._snapshot_benchmark_id(benchmark_key, benchmarks)
+                system_id = self._resolve_system(model_name, f'System from leaderboard {benchmark_key[0]}')
+                values[(benchmark_ids[benchmark_key], system_id, metric_type, dataset_split)] = value
+            
+            changes = diff_snapshot(state, values)
+            invalidate_analysis_cache(self.session)
+            insert_rows(self.session, LeaderboardHistory.__table__, [
+                {'benchmark_id': key[0], 'system_id': key[1], 'метрика_тип': key[2], 'датасет_раздел': key[3],
+                 'дата_начала': taken_at, 'значение': value[0] if value else None, 'лицензия': value[1] if value else None}
+                for key, value in changes.items()
+            ], self.batch_size)
+            self.summary_delta.apply(self.session)
+            self.session.add(LeaderboardSnapshot(
+                путь_файла=os.path.basename(path),
+                дата_снимка=taken_at,
+                хэш_содержимого=self._content_hash(path),
+                количество_результатов=sum(len(benchmark.get('results', [])) for benchmark in benchmarks),
+                количество_изменений=len(changes)
+            ))
+            self.session.commit()
+            latest = taken_at
+            logging.info(f"Снимок лидерборда {path}: значений {len(values)}, изменений {len(changes)}")
+    
+    def _skip_snapshot(self, path: str, taken_at: datetime, content_hash: str):
+        """
+        Отмечает снимок просмотренным, не применяя его к истории
+        """
+        self.session.add(LeaderboardSnapshot(
+            путь_файла=os.path.basename(path),
+            дата_снимка=taken_at,
+            хэш_содержимого=content_hash
+        ))
         self.session.commit()
-        logging.info(f"Загружено статей из файла: {file_path}")
+    
+    def _snapshot_benchmark_id(self, benchmark_key: tuple, benchmarks: List[Dict]) -> int:
+        """
+        id бенчмарка снимка; отсутствующий бенчмарк создается по данным снимка
+        """
+        name, source = benchmark_key
+        item = next(benchmark for benchmark in benchmarks
+                    if (benchmark.get('benchmark_name', ''), benchmark.get('source', '')) == benchmark_key)
+        upsert_rows(self.session, Benchmark.__table__, [benchmark_record(item)['benchmark']], update=False)
+        return self.session.execute(
+            select(Benchmark.id).where(Benchmark.название == name, Benchmark.источник == source)
+        ).scalar_one()
+    
+    def _load_files_parallel(self, pending: List[tuple], workers: int):
+        """
+        Конвейер загрузки: процессы пула разбирают файлы в порции строк, каждый
+        в свою ограниченную очередь, а единственный писатель (этот процесс)
+        забирает порции файл за файлом в исходном порядке и пишет их в БД,
+        одна транзакция на файл. Пока пишется один файл, следующие уже
+        разбираются; заполненная очередь приостанавливает свой разборщик
+        """
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = []
+            for kind, key, file_path, content_hash in pending:
+                queue = manager.Queue(maxsize=self.queue_size)
+                future = pool.submit(parse_file_to_queue, kind, file_path, self.batch_size, queue)
+                jobs.append((kind, key, file_path, content_hash, queue, future))
+            
+            for kind, key, file_path, content_hash, queue, future in jobs:
+                logging.info(f"Загружаем данные из {file_path}")
+                loaded = 0
+                with tqdm(desc=f"Загрузка ({kind})") as progress:
+                    for batch in iter_queue_batches(queue, future):
+                        self._write_batch(kind, batch)
+                        loaded += len(batch)
+                        progress.update(len(batch))
+                # Ошибка разбора файла пробрасывается здесь, до фиксации транзакции
+                future.result()
+                self._record_manifest(key, file_path, content_hash, loaded)
 
 def main():
     """
@@ -4,9 +4,16 @@
 """
 
 import os
-from sqlalchemy import create_engine
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool, StaticPool
 from dotenv import load_dotenv
 
 # Загружаем переменные окружения
@@ -40,40 +47,400 @@ def get_database_url():
         config = DATABASE_CONFIG['sqlite']
         return f"sqlite:///{config['database']}"
 
-def create_database_engine():
+# Настройки пула соединений (переопределяются переменными окружения)
+POOL_CONFIG = {
+    'postgresql': {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),  # секунды
+        'pool_pre_ping': True
+    },
+    'sqlite': {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    }
+}
+
+# Профили PRAGMA для SQLite, применяются к каждому новому соединению.
+# 'default' - стандартные настройки SQLite, 'performance' - WAL (читатели не
+# блокируют писателя), synchronous=NORMAL (без fsync на каждый коммит),
+# увеличенный кэш страниц, отображение файла в память и временные таблицы в памяти
+SQLITE_PROFILES = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -1024 * int(os.getenv('SQLITE_CACHE_MB', '64')),  # отрицательное значение - в КБ
+        'mmap_size': 1024 * 1024 * int(os.getenv('SQLITE_MMAP_MB', '256')),
+        'temp_store': 'MEMORY'
+    }
+}
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'performance')
+
+# Профиль массовой загрузки (bulk_load): без fsync вообще - при сбое питания
+# во время загрузки базу придется загрузить заново, манифест это допускает
+SQLITE_BULK_LOAD_PRAGMAS = {'synchronous': 'OFF'}
+SQLITE_BULK_LOAD = os.getenv('SQLITE_BULK_LOAD', '1') == '1'
+
+def _apply_pragmas(dbapi_connection, pragmas: dict):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+def _attach_sqlite_profile(engine):
+    """
+    Применяет профиль SQLITE_PROFILE при подключении и переключает
+    соединения в режим массовой загрузки и обратно при выдаче из пула
+    """
+    profile = SQLITE_PROFILES[SQLITE_PROFILE]
+    # Значения, которые профиль загрузки меняет, а после загрузки их нужно вернуть
+    restore = {name: profile.get(name, 'FULL') for name in SQLITE_BULK_LOAD_PRAGMAS}
+
+    def on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, profile)
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        bulk = engine in _bulk_load_engines
+        if connection_record.info.get('bulk_load', False) != bulk:
+            _apply_pragmas(dbapi_connection, SQLITE_BULK_LOAD_PRAGMAS if bulk else restore)
+            connection_record.info['bulk_load'] = bulk
+
+    event.listen(engine, 'connect', on_connect)
+    event.listen(engine, 'checkout', on_checkout)
+
+class PoolMetrics:
+    """
+    Счетчики пула соединений одного движка: новые физические соединения,
+    выдачи и возвраты соединений, время ожидания свободного соединения
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections_created = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self.lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def attach(self, engine):
+        def on_connect(dbapi_connection, connection_record):
+            with self.lock:
+                self.connections_created += 1
+
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self.lock:
+                self.checkouts += 1
+
+        def on_checkin(dbapi_connection, connection_record):
+            with self.lock:
+                self.checkins += 1
+
+        event.listen(engine, 'connect', on_connect)
+        event.listen(engine, 'checkout', on_checkout)
+        event.listen(engine, 'checkin', on_checkin)
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                'connections_created': self.connections_created,
+                'checkouts': self.checkouts,
+                'checked_out': self.checkouts - self.checkins,
+                'wait_total_s': round(self.wait_total, 6),
+                'wait_max_s': round(self.wait_max, 6),
+                'avg_wait_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0
+            }
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool, который измеряет время ожидания соединения при выдаче
+    """
+    def __init__(self, *args, metrics: PoolMetrics = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics:
+                self.metrics.record_wait(time.perf_counter() - started)
+
+# Реестр движков процесса: один движок и пул на URL базы данных
+_engines = {}
+_pool_metrics = {}
+_session_factories = {}
+_registry_lock = threading.Lock()
+# Движки SQLite в режиме массовой загрузки
+_bulk_load_engines = set()
+
+def create_database_engine(database_url: str = None):
+    """
+    Создает новый движок базы данных с настроенным пулом соединений.
+    Обычно нужен get_engine(), который переиспользует движок процесса
+    """
+    database_url = database_url or get_database_url()
+    metrics = PoolMetrics()
+    url = make_url(database_url)
+
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # База в памяти существует, пока открыто соединение - одно общее на все потоки
+            engine = create_engine(database_url, echo=False, poolclass=StaticPool,
+                                   connect_args={'check_same_thread': False})
+        else:
+            # Соединения переходят между потоками пула - отключаем проверку потока
+            engine = create_engine(database_url, echo=False, poolclass=TimedQueuePool,
+                                   connect_args={'check_same_thread': False},
+                                   **POOL_CONFIG['sqlite'])
+    else:
+        engine = create_engine(database_url, echo=False, poolclass=TimedQueuePool,
+                               **POOL_CONFIG['postgresql'])
+
+    if engine.dialect.name == 'sqlite':
+        _attach_sqlite_profile(engine)
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.metrics = metrics
+    metrics.attach(engine)
+    _pool_metrics[id(engine)] = metrics
+    return engine
+
+def get_engine(database_url: str = None):
+    """
+    Возвращает движок процесса для URL (по умолчанию - из настроек),
+    создавая его при первом обращении
+    """
+    database_url = database_url or get_database_url()
+    with _registry_lock:
+        engine = _engines.get(database_url)
+        if engine is None:
+            engine = _engines[database_url] = create_database_engine(database_url)
+        return engine
+
+def get_session_factory(database_url: str = None) -> sessionmaker:
+    """
+    Фабрика сессий, привязанная к движку процесса
+    """
+    engine = get_engine(database_url)
+    with _registry_lock:
+        factory = _session_factories.get(id(engine))
+        if factory is None:
+            factory = _session_factories[id(engine)] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        return factory
+
+def get_scoped_session(database_url: str = None) -> scoped_session:
     """
-    Создает движок базы данных
+    Потоколокальный реестр сессий: в каждом потоке своя сессия над общим пулом
     """
-    database_url = get_database_url()
-    return create_engine(database_url, echo=False)
+    return scoped_session(get_session_factory(database_url))
 
 def get_session():
     """
-    Создает сессию базы данных
+    Создает сессию базы данных над общим движком процесса
+    """
+    return get_session_factory()()
+
+def get_pool_metrics() -> dict:
     """
-    engine = create_database_engine()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return SessionLocal()
+    Метрики пулов всех движков процесса (по URL без пароля)
+    """
+    with _registry_lock:
+        engines = list(_engines.values())
+    return {
+        engine.url.render_as_string(hide_password=True): dict(
+            _pool_metrics[id(engine)].summary(), status=engine.pool.status()
+        )
+        for engine in engines
+    }
+
+def dispose_engines():
+    """
+    Закрывает пулы всех движков процесса (например, после fork)
+    """
+    with _registry_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _session_factories.clear()
 
 # Базовый класс для моделей
 Base = declarative_base()
 
-# Глобальные переменные
-engine = create_database_engine()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def __getattr__(name):
+    # Совместимость: database_config.engine - движок процесса
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def init_database():
     """
-    Инициализирует базу данных (создает таблицы)
+    Инициализирует базу данных (создает таблицы) и заполняет сводные
+    таблицы баз, загруженных до их появления
     """
-    Base.metadata.create_all(bind=engine)
+    # summary_tables импортирует этот модуль, поэтому импорт здесь
+    from summary_tables import ensure_summary_tables
+    Base.metadata.create_all(bind=get_engine())
+    sync_schema()
+    session = get_session()
+    try:
+        ensure_summary_tables(session)
+    finally:
+        session.close()
     print(f"База данных инициализирована: {DB_TYPE}")
 
+def sync_schema(bind=None):
+    """
+    Добавляет в уже существующие таблицы столбцы и индексы моделей,
+    которых в них нет (create_all создает только отсутствующие таблицы).
+    Индекс, столбцы которого изменились, пересоздается; если это сузившийся
+    уникальный ключ, перед созданием остается последняя строка каждого ключа
+    """
+    bind = bind or get_engine()
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+            indexes = {index['name']: index['column_names'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                columns = [column.name for column in index.columns]
+                if indexes.get(index.name) == columns:
+                    continue
+                if index.name in indexes:
+                    logging.info(f"Индекс {index.name} пересоздается по столбцам {columns}")
+                    index.drop(connection)
+                    if index.unique:
+                        _drop_duplicates(connection, table, columns)
+                try:
+                    index.create(connection)
+                except IntegrityError as e:
+                    raise RuntimeError(
+                        f"Не удалось создать уникальный индекс {index.name}: в таблице {table.name} "
+                        f"есть повторяющиеся строки. Удалите дубликаты или пересоздайте базу данных"
+                    ) from e
+
+def _drop_duplicates(connection, table, columns):
+    """
+    Удаляет повторы ключа columns, оставляя строку с наибольшим id (загруженную последней)
+    """
+    key = ', '.join(f'"{column}"' for column in columns)
+    deleted = connection.execute(text(
+        f'DELETE FROM "{table.name}" WHERE id NOT IN (SELECT MAX(id) FROM "{table.name}" GROUP BY {key})'
+    )).rowcount
+    if deleted:
+        logging.info(f"Из {table.name} удалено повторов ключа ({key}): {deleted}")
+
+@contextmanager
+def bulk_load(engine=None):
+    """
+    Профиль массовой загрузки SQLite: на время блока соединения работают
+    без fsync (SQLITE_BULK_LOAD_PRAGMAS), неуникальные индексы пустых таблиц
+    удаляются и строятся заново одним проходом после загрузки, затем выполняется
+    ANALYZE. Индексы заполненных таблиц остаются: при дозагрузке перестраивать
+    их целиком дороже, чем обновлять.
+    Уникальные индексы остаются - на них опирается upsert по естественному ключу.
+    Для других СУБД и при SQLITE_BULK_LOAD=0 блок выполняется как есть
+    """
+    engine = engine or get_engine()
+    if engine.dialect.name != 'sqlite' or not SQLITE_BULK_LOAD:
+        yield
+        return
+
+    inspector = inspect(engine)
+    deferred = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            if connection.execute(table.select().limit(1)).first() is not None:
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if not index.unique and index.name in existing:
+                    index.drop(connection)
+                    deferred.append(index)
+    _bulk_load_engines.add(engine)
+    try:
+        yield
+    finally:
+        _bulk_load_engines.discard(engine)
+        with engine.begin() as connection:
+            for index in deferred:
+                index.create(connection)
+            connection.execute(text('ANALYZE'))
+        logging.info(f"Массовая загрузка завершена: перестроено индексов {len(deferred)}, выполнен ANALYZE")
+
+@contextmanager
+def read_snapshot(count: int, engine=None):
+    """
+    Открывает count соединений из пула с транзакциями чтения, которые видят
+    один и тот же снимок данных, для параллельных запросов. PostgreSQL -
+    REPEATABLE READ и общий снимок pg_export_snapshot(). SQLite - на время
+    открытия читающих транзакций берется блокировка записи (BEGIN IMMEDIATE),
+    поэтому между их началом никто не успевает зафиксировать изменения.
+    База SQLite в памяти (одно общее соединение) дает одно соединение
+    """
+    engine = engine or get_engine()
+    if isinstance(engine.pool, StaticPool):
+        count = 1
+    connections = []
+    try:
+        if engine.dialect.name == 'postgresql':
+            for _ in range(count):
+                connection = engine.connect().execution_options(isolation_level='REPEATABLE READ')
+                connections.append(connection)
+                connection.begin()
+                if len(connections) == 1:
+                    snapshot = connection.exec_driver_sql('SELECT pg_export_snapshot()').scalar()
+                else:
+                    connection.exec_driver_sql(f"SET TRANSACTION SNAPSHOT '{snapshot}'")
+        elif engine.dialect.name == 'sqlite' and count == 1:
+            connections.append(engine.connect())
+            connections[0].exec_driver_sql('BEGIN')
+        elif engine.dialect.name == 'sqlite':
+            with engine.connect() as writer_lock:
+                writer_lock.exec_driver_sql('BEGIN IMMEDIATE')
+                try:
+                    for _ in range(count):
+                        connection = engine.connect()
+                        connections.append(connection)
+                        # Снимок фиксируется первым чтением внутри транзакции
+                        connection.exec_driver_sql('BEGIN')
+                        connection.exec_driver_sql('SELECT COUNT(*) FROM sqlite_master').scalar()
+                finally:
+                    writer_lock.exec_driver_sql('ROLLBACK')
+        else:
+            connections = [engine.connect() for _ in range(count)]
+        yield connections
+    finally:
+        for connection in connections:
+            connection.rollback()
+            connection.close()
+
 def get_db():
     """
     Генератор для получения сессии базы данных
     """
-    db = SessionLocal()
+    db = get_session()
     try:
         yield db
     finally:
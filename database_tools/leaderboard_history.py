@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+История снимков лидербордов: каждый запуск benchmarks_scraper.py сохраняет
+снимок huggingface_leaderboard_<дата>_<время>.json (и .csv). Снимки
+применяются по порядку дат, а в таблицу leaderboard_history пишутся только
+изменившиеся значения метрик (бенчмарк, система, метрика, раздел) вместе
+с лицензией модели в лидерборде (License: Open / Proprietary), поэтому
+объем истории растет с числом изменений, а не с числом снимков. Функции
+модуля не обращаются к БД, кроме history_state; запись выполняет DataLoader
+"""
+
+import os
+import re
+import glob
+import json
+import math
+import bisect
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from models import LeaderboardHistory
+
+SNAPSHOT_PATTERN = re.compile(r'huggingface_leaderboard_(\d{8}_\d{6})\.(json|csv)$')
+
+# Ранг в снимке считается по среднему WER (как сортирует лидерборд)
+# и хранится в истории как отдельная метрика
+RANK_METRIC = 'Rank'
+RANKED_METRIC = 'Average WER'
+AVERAGE_SPLIT = 'average'
+
+# Столбцы CSV-снимка, которые не являются метриками (<тип>_<раздел>)
+CSV_BASE_COLUMNS = {'benchmark_name', 'model_name', 'rank', 'license', 'code_link', 'submission_date'}
+
+def find_snapshots(directory: str) -> List[Tuple[datetime, str]]:
+    """
+    Снимки лидерборда в папке по возрастанию даты. Если за одну дату есть
+    и JSON, и CSV, берется JSON
+    """
+    snapshots = {}
+    for path in glob.glob(os.path.join(directory, 'huggingface_leaderboard_*')):
+        match = SNAPSHOT_PATTERN.search(os.path.basename(path))
+        if not match:
+            continue
+        taken_at = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+        if taken_at not in snapshots or match.group(2) == 'json':
+            snapshots[taken_at] = path
+    return sorted(snapshots.items())
+
+def read_snapshot_file(path: str) -> List[Dict]:
+    """
+    Бенчмарки снимка в формате benchmarks_scraper.py. CSV-снимок (строка на
+    модель, метрики в столбцах <тип>_<раздел>) преобразуется в тот же формат
+    """
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    try:
+        rows = pd.read_csv(path).to_dict('records')
+    except pd.errors.EmptyDataError:
+        return []
+    benchmarks = {}
+    for row in rows:
+        name = row.get('benchmark_name', '')
+        benchmark = benchmarks.setdefault(name, {'benchmark_name': name, 'source': 'huggingface', 'results': []})
+        metrics = []
+        for column, value in row.items():
+            if column in CSV_BASE_COLUMNS or '_' not in column or pd.isna(value):
+                continue
+            metric_type, dataset_split = column.split('_', 1)
+            metrics.append({'type': metric_type, 'value': value, 'dataset_split': dataset_split})
+        license = row.get('license')
+        benchmark['results'].append({'model_name': row.get('model_name', ''), 'metrics': metrics,
+                                     'license': '' if pd.isna(license) else license})
+    return list(benchmarks.values())
+
+def _metric_value(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    # Точность столбца значение - DECIMAL(10, 4)
+    return None if math.isnan(value) else round(value, 4)
+
+def snapshot_values(benchmarks: List[Dict]) -> Dict[tuple, Tuple[float, Optional[str]]]:
+    """
+    Значения метрик снимка: ((название, источник бенчмарка), модель, метрика, раздел) ->
+    (значение, лицензия модели или None). Добавляется ранг модели по среднему WER
+    (равные значения - равный ранг)
+    """
+    values = {}
+    for benchmark in benchmarks:
+        benchmark_key = (benchmark.get('benchmark_name', ''), benchmark.get('source', ''))
+        ranked = {}
+        licenses = {}
+        for result in benchmark.get('results', []):
+            model_name = result.get('model_name')
+            if not model_name:
+                continue
+            license = licenses[model_name] = result.get('license') or None
+            for metric in result.get('metrics', []):
+                value = _metric_value(metric.get('value'))
+                if value is None:
+                    continue
+                metric_type = metric.get('type', '')
+                dataset_split = metric.get('dataset_split') or AVERAGE_SPLIT
+                values[(benchmark_key, model_name, metric_type, dataset_split)] = (value, license)
+                # 0 пишет скрапер вместо нераспознанного значения - в ранг не идет
+                if metric_type == RANKED_METRIC and dataset_split == AVERAGE_SPLIT and value > 0:
+                    ranked[model_name] = value
+
+        ordered = sorted(ranked.values())
+        for model_name, value in ranked.items():
+            rank = bisect.bisect_left(ordered, value) + 1
+            values[(benchmark_key, model_name, RANK_METRIC, AVERAGE_SPLIT)] = (float(rank), licenses[model_name])
+    return values
+
+def diff_snapshot(state: Dict[tuple, tuple], values: Dict[tuple, tuple]) -> Dict[tuple, Optional[tuple]]:
+    """
+    Изменения снимка относительно текущего состояния истории: новые и
+    изменившиеся (значение, лицензия), а для пропавших ключей - None.
+    Пропавшими считаются только ключи бенчмарков, которые есть в снимке
+    (первый элемент ключа): бенчмарк, не попавший в снимок, не меняется.
+    state обновляется
+    """
+    benchmarks = {key[0] for key in values}
+    changes = {key: value for key, value in values.items() if state.get(key) != value}
+    changes.update({key: None for key in state if key[0] in benchmarks and key not in values})
+    for key, value in changes.items():
+        if value is None:
+            del state[key]
+        else:
+            state[key] = value
+    return changes
+
+def history_state(session: Session) -> Dict[tuple, Tuple[float, Optional[str]]]:
+    """
+    Последние значения истории: (benchmark_id, system_id, метрика, раздел) ->
+    (значение, лицензия), без метрик, пропавших из лидерборда
+    """
+    key_columns = [LeaderboardHistory.benchmark_id, LeaderboardHistory.system_id,
+                   LeaderboardHistory.метрика_тип, LeaderboardHistory.датасет_раздел]
+    latest = (select(*key_columns, func.max(LeaderboardHistory.дата_начала).label('дата_начала'))
+              .group_by(*key_columns).subquery())
+    rows = session.execute(
+        select(*key_columns, LeaderboardHistory.значение, LeaderboardHistory.лицензия)
+        .join(latest, and_(*[column == latest.c[column.key] for column in key_columns],
+                           LeaderboardHistory.дата_начала == latest.c.дата_начала))
+        .where(LeaderboardHistory.значение.isnot(None))
+    )
+    return {tuple(row[:4]): (round(float(row[4]), 4), row[5]) for row in rows}
@@ -3,18 +3,28 @@
 SQLAlchemy модели для ASR/TTS систем
 """
 
-from sqlalchemy import Column, Integer, String, Text, DECIMAL, TIMESTAMP, DATE, ForeignKey, Table
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, DECIMAL, TIMESTAMP, DATE, ForeignKey, Table, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database_config import Base
 
+def normalize_system_name(name: str):
+    """
+    Нормализованное название системы для поиска и уникального индекса:
+    нижний регистр, без лишних пробелов. Пустое название - None
+    """
+    normalized = ' '.join((name or '').split()).lower()
+    return normalized or None
+
 # Промежуточные таблицы для связей многие-ко-многим
 system_vocabulary_types = Table(
     'system_vocabulary_types',
     Base.metadata,
     Column('id', Integer, primary_key=True),
     Column('system_id', Integer, ForeignKey('systems.id', ondelete='CASCADE')),
-    Column('vocabulary_type_id', Integer, ForeignKey('vocabulary_types.id', ondelete='CASCADE'))
+    Column('vocabulary_type_id', Integer, ForeignKey('vocabulary_types.id', ondelete='CASCADE')),
+    Index('ux_system_vocabulary_types_natural', 'system_id', 'vocabulary_type_id', unique=True),
+    Index('idx_system_vocabulary_types_type', 'vocabulary_type_id')
 )
 
 system_functional_purposes = Table(
@@ -22,7 +32,20 @@ system_functional_purposes = Table(
     Base.metadata,
     Column('id', Integer, primary_key=True),
     Column('system_id', Integer, ForeignKey('systems.id', ondelete='CASCADE')),
-    Column('functional_purpose_id', Integer, ForeignKey('functional_purposes.id', ondelete='CASCADE'))
+    Column('functional_purpose_id', Integer, ForeignKey('functional_purposes.id', ondelete='CASCADE')),
+    Index('ux_system_functional_purposes_natural', 'system_id', 'functional_purpose_id', unique=True),
+    Index('idx_system_functional_purposes_purpose', 'functional_purpose_id')
+)
+
+system_languages = Table(
+    'system_languages',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('system_id', Integer, ForeignKey('systems.id', ondelete='CASCADE')),
+    Column('язык', String(50), nullable=False),
+    Index('ux_system_languages_natural', 'system_id', 'язык', unique=True),
+    # Распределение по языкам и выборка систем одного языка - по индексу
+    Index('idx_system_languages_language', 'язык', 'system_id')
 )
 
 class VocabularyType(Base):
@@ -48,16 +71,26 @@ class FunctionalPurpose(Base):
 
 class System(Base):
     __tablename__ = 'systems'
+    __table_args__ = (
+        Index('ux_systems_normalized_name', 'нормализованное_название', unique=True),
+        # Покрывающие индексы для агрегатов DataAnalyzer: группировка идет по индексу
+        # без чтения строк таблицы
+        Index('idx_systems_year_covering', 'год_первого_релиза', 'разработчик', 'количество_скачиваний'),
+        Index('idx_systems_developer_covering', 'разработчик', 'количество_скачиваний'),
+        Index('idx_systems_architecture_covering', 'архитектура', 'количество_скачиваний'),
+        Index('idx_systems_license_covering', 'тип_лицензии', 'количество_скачиваний'),
+    )
     
     id = Column(Integer, primary_key=True)
     название = Column(String(255), nullable=False)
+    нормализованное_название = Column(String(255))
     разработчик = Column(String(255))
     год_первого_релиза = Column(Integer)
     описание = Column(Text)
     ссылка_на_источник = Column(String(500))
     тип_лицензии = Column(String(100))
     архитектура = Column(String(100))
-    поддерживаемые_языки = Column(Text)
+    поддерживаемые_языки = Column(Text)  # для отображения; по языкам ищется через system_languages
     количество_скачиваний = Column(Integer, default=0)
     дата_создания = Column(TIMESTAMP, default=func.current_timestamp())
     дата_обновления = Column(TIMESTAMP, default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -71,6 +104,12 @@ class System(Base):
 
 class SystemMetric(Base):
     __tablename__ = 'system_metrics'
+    __table_args__ = (
+        # Одно значение метрики на (систему, тип, датасет, язык): новое значение заменяет прежнее
+        Index('ux_system_metrics_natural', 'system_id', 'метрика_тип', 'датасет', 'язык', unique=True),
+        # Выборка метрик одного типа (WER, MOS) с соединением по system_id без чтения строк
+        Index('idx_system_metrics_type_covering', 'метрика_тип', 'system_id', 'значение', 'датасет'),
+    )
     
     id = Column(Integer, primary_key=True)
     system_id = Column(Integer, ForeignKey('systems.id', ondelete='CASCADE'))
@@ -85,6 +124,9 @@ class SystemMetric(Base):
 
 class SystemPaper(Base):
     __tablename__ = 'system_papers'
+    __table_args__ = (
+        Index('ux_system_papers_natural', 'system_id', 'название_статьи', 'ссылка_arxiv', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     system_id = Column(Integer, ForeignKey('systems.id', ondelete='CASCADE'))
@@ -98,6 +140,10 @@ class SystemPaper(Base):
 
 class Dataset(Base):
     __tablename__ = 'datasets'
+    __table_args__ = (
+        Index('ux_datasets_natural', 'название', 'источник', unique=True),
+        Index('idx_datasets_hours', 'объем_часы'),
+    )
     
     id = Column(Integer, primary_key=True)
     название = Column(String(255), nullable=False)
@@ -112,6 +158,9 @@ class Dataset(Base):
 
 class Benchmark(Base):
     __tablename__ = 'benchmarks'
+    __table_args__ = (
+        Index('ux_benchmarks_natural', 'название', 'источник', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     название = Column(String(255), nullable=False)
@@ -127,6 +176,12 @@ class Benchmark(Base):
 
 class BenchmarkResult(Base):
     __tablename__ = 'benchmark_results'
+    __table_args__ = (
+        Index('ux_benchmark_results_natural', 'benchmark_id', 'system_id', 'метрика_тип', 'датасет_раздел', unique=True),
+        # Топ-N результатов бенчмарка: диапазон по рангу внутри benchmark_id
+        Index('idx_benchmark_results_rank_covering', 'benchmark_id', 'ранг', 'system_id', 'метрика_тип', 'значение'),
+        Index('idx_benchmark_results_system', 'system_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     benchmark_id = Column(Integer, ForeignKey('benchmarks.id', ondelete='CASCADE'))
@@ -142,3 +197,97 @@ class BenchmarkResult(Base):
     # Связи
     benchmark = relationship("Benchmark", back_populates="results")
     system = relationship("System", back_populates="benchmark_results")
+
+class LoadManifest(Base):
+    __tablename__ = 'load_manifest'
+    
+    id = Column(Integer, primary_key=True)
+    путь_файла = Column(String(500), unique=True, nullable=False)
+    хэш_содержимого = Column(String(64), nullable=False)
+    размер_байты = Column(BigInteger)
+    время_изменения = Column(Float)
+    количество_записей = Column(Integer)
+    дата_загрузки = Column(TIMESTAMP, default=func.current_timestamp())
+
+# Снимки лидербордов (huggingface_leaderboard_*.json/.csv), просмотренные при загрузке истории;
+# у пропущенных снимков (пустых или старее истории) количество_изменений - NULL
+class LeaderboardSnapshot(Base):
+    __tablename__ = 'leaderboard_snapshots'
+    
+    id = Column(Integer, primary_key=True)
+    путь_файла = Column(String(500), unique=True, nullable=False)
+    дата_снимка = Column(TIMESTAMP, nullable=False)
+    хэш_содержимого = Column(String(64))
+    количество_результатов = Column(Integer)
+    количество_изменений = Column(Integer)
+    дата_загрузки = Column(TIMESTAMP, default=func.current_timestamp())
+
+# История метрик лидербордов: строка пишется только при изменении значения
+# (системы, метрики, раздела) и действует до следующей строки того же ключа.
+# значение NULL - система или метрика пропала из лидерборда
+class LeaderboardHistory(Base):
+    __tablename__ = 'leaderboard_history'
+    __table_args__ = (
+        Index('ux_leaderboard_history_natural', 'benchmark_id', 'system_id', 'метрика_тип', 'датасет_раздел',
+              'дата_начала', unique=True),
+        Index('idx_leaderboard_history_system_time', 'system_id', 'дата_начала'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    benchmark_id = Column(Integer, ForeignKey('benchmarks.id', ondelete='CASCADE'), nullable=False)
+    system_id = Column(Integer, ForeignKey('systems.id', ondelete='CASCADE'), nullable=False)
+    метрика_тип = Column(String(50), nullable=False)
+    датасет_раздел = Column(String(50), nullable=False)
+    дата_начала = Column(TIMESTAMP, nullable=False)
+    значение = Column(DECIMAL(10, 4))
+    лицензия = Column(String(50))  # License модели в лидерборде (Open / Proprietary)
+
+# Сводные таблицы по systems: счетчики для групп, которые DataLoader
+# обновляет в транзакции каждой записи (summary_tables.py). ключ - JSON
+# значений группы, в том числе NULL, поэтому по нему работает ON CONFLICT
+class SummaryYearDeveloper(Base):
+    __tablename__ = 'summary_year_developer'
+    
+    id = Column(Integer, primary_key=True)
+    ключ = Column(String(600), unique=True, nullable=False)
+    год_первого_релиза = Column(Integer)
+    разработчик = Column(String(255))
+    количество_систем = Column(Integer, nullable=False, default=0)
+    количество_со_скачиваниями = Column(Integer, nullable=False, default=0)
+    сумма_скачиваний = Column(BigInteger, nullable=False, default=0)
+
+class SummaryLicense(Base):
+    __tablename__ = 'summary_license'
+    
+    id = Column(Integer, primary_key=True)
+    ключ = Column(String(600), unique=True, nullable=False)
+    тип_лицензии = Column(String(100))
+    количество_систем = Column(Integer, nullable=False, default=0)
+    количество_со_скачиваниями = Column(Integer, nullable=False, default=0)
+    сумма_скачиваний = Column(BigInteger, nullable=False, default=0)
+
+class SummaryArchitecture(Base):
+    __tablename__ = 'summary_architecture'
+    
+    id = Column(Integer, primary_key=True)
+    ключ = Column(String(600), unique=True, nullable=False)
+    архитектура = Column(String(100))
+    количество_систем = Column(Integer, nullable=False, default=0)
+    количество_со_скачиваниями = Column(Integer, nullable=False, default=0)
+    сумма_скачиваний = Column(BigInteger, nullable=False, default=0)
+
+class AnalysisCache(Base):
+    __tablename__ = 'analysis_cache'
+    
+    id = Column(Integer, primary_key=True)
+    название_запроса = Column(String(200), unique=True, nullable=False)
+    версия_данных = Column(String(64), nullable=False)
+    результат = Column(LargeBinary, nullable=False)  # JSON, сжатый zlib
+    дата_расчета = Column(TIMESTAMP, default=func.current_timestamp())
+
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+    
+    id = Column(Integer, primary_key=True)
+    название = Column(String(50), unique=True, nullable=False)
+    версия = Column(BigInteger, nullable=False, default=0)  # увеличивается DataLoader при каждой записи
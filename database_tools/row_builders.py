@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Преобразование записей файлов сбора данных в строки таблиц БД.
+Функции не обращаются к базе (идентификаторы систем, бенчмарков и справочников
+подставляет DataLoader при записи), поэтому файлы можно разбирать
+параллельно в пуле процессов
+"""
+
+import os
+import sys
+import logging
+from queue import Empty
+from typing import Any, Dict, Iterable, Iterator, List
+
+from models import normalize_system_name
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_collection'))
+
+from jsonl_io import iter_records
+
+def vocabulary_type_name(item: Dict) -> str:
+    """
+    Тип словаря системы на основе архитектуры
+    """
+    architecture = item.get('architecture', '').lower()
+    if 'whisper' in architecture or 'wav2vec' in architecture:
+        return 'большой (LVCSR)'
+    elif 'tacotron' in architecture or 'fastspeech' in architecture:
+        return 'средний'
+    return 'средний'  # По умолчанию
+
+def functional_purpose_names(item: Dict) -> List[str]:
+    """
+    Функциональные назначения системы
+    """
+    system_type = item.get('system_type', '').lower()
+    pipeline_tags = item.get('pipeline_tags', [])
+    purposes = []
+
+    if 'asr' in system_type or 'automatic-speech-recognition' in pipeline_tags:
+        purposes.append('диктовка')
+
+    if 'tts' in system_type or 'text-to-speech' in pipeline_tags:
+        purposes.append('диалоговая')
+    return purposes
+
+def language_codes(languages: Iterable[str]) -> List[str]:
+    """
+    Коды языков системы для system_languages: без пробелов, в нижнем
+    регистре, без пустых и повторов (порядок сохраняется)
+    """
+    codes = []
+    for language in languages:
+        code = (language or '').strip().lower()
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+def required_model_name(item: Dict) -> str:
+    """
+    Название модели записи. Запись без названия не сопоставить с системой
+    (NULL в уникальном индексе не повторяется), поэтому она отклоняется
+    """
+    model_name = item.get('model_name', '')
+    if normalize_system_name(model_name) is None:
+        raise ValueError("запись без названия модели")
+    return model_name
+
+def system_row(item: Dict) -> Dict[str, Any]:
+    """
+    Поля строки systems из записи файла моделей
+    """
+    system_data = {
+        'название': required_model_name(item),
+        'нормализованное_название': normalize_system_name(item['model_name']),
+        'разработчик': item.get('author_organization', ''),
+        'описание': item.get('description', ''),
+        'ссылка_на_источник': item.get('model_url', ''),
+        'тип_лицензии': item.get('license', ''),
+        'архитектура': item.get('architecture', ''),
+        'поддерживаемые_языки': ', '.join(item.get('languages', [])),
+        'количество_скачиваний': item.get('downloads', 0),
+        'год_первого_релиза': None
+    }
+
+    # Парсим дату создания
+    created_date = item.get('created_date', '')
+    if created_date:
+        try:
+            system_data['год_первого_релиза'] = int(created_date[:4])
+        except:
+            pass
+    return system_data
+
+def model_paper_rows(system_name: str, item: Dict) -> List[Dict[str, Any]]:
+    """
+    Поля строк system_papers для статей из записи модели
+    """
+    return [
+        {
+            'название_статьи': f"Paper for {system_name}",
+            'ссылка_arxiv': paper.get('arxiv_link', ''),
+            'авторы': 'Unknown'
+        }
+        for paper in item.get('papers', [])
+    ]
+
+def system_record(item: Dict) -> Dict[str, Any]:
+    system_data = system_row(item)
+    return {
+        'system': system_data,
+        'vocabulary_type': vocabulary_type_name(item),
+        'functional_purposes': functional_purpose_names(item),
+        'languages': language_codes(item.get('languages', [])),
+        'papers': model_paper_rows(system_data['название'], item)
+    }
+
+def dataset_record(item: Dict) -> Dict[str, Any]:
+    return {
+        'название': item.get('dataset_name', ''),
+        'описание': item.get('description', ''),
+        'объем_часы': item.get('size_hours'),
+        'объем_гигабайты': item.get('size_gb'),
+        'язык': item.get('language', ''),
+        'лицензия': item.get('license', ''),
+        'источник': item.get('source', ''),
+        'ссылка': item.get('url', '')
+    }
+
+def paper_record(item: Dict) -> Dict[str, Any]:
+    return {
+        'model_name': required_model_name(item),
+        'description': f'System from paper {item.get("paper_title", "")}',
+        'paper': {
+            'название_статьи': item.get('paper_title', ''),
+            'ссылка_arxiv': item.get('arxiv_link', ''),
+            'год_публикации': item.get('publication_year'),
+            'авторы': ', '.join(item.get('authors', []))
+        },
+        'metrics': [
+            {
+                'метрика_тип': metric.get('type', ''),
+                'значение': metric.get('value', 0),
+                'датасет': metric.get('dataset', ''),
+                'язык': metric.get('language', '')
+            }
+            for metric in item.get('metrics', [])
+        ]
+    }
+
+def benchmark_record(item: Dict) -> Dict[str, Any]:
+    results = [result for result in item.get('results', []) if normalize_system_name(result.get('model_name'))]
+    if len(results) < len(item.get('results', [])):
+        logging.warning(f"Бенчмарк {item.get('benchmark_name', '')}: пропущено результатов без названия модели: "
+                        f"{len(item.get('results', [])) - len(results)}")
+    return {
+        'benchmark': {
+            'название': item.get('benchmark_name', ''),
+            'задачи': ', '.join(item.get('tasks', [])),
+            'датасет': item.get('dataset', ''),
+            'описание': item.get('description', ''),
+            'ссылка': item.get('url', ''),
+            'источник': item.get('source', '')
+        },
+        'results': [
+            {
+                'model_name': result.get('model_name', ''),
+                'rows': [
+                    {
+                        'ранг': result.get('rank', 0),
+                        'метрика_тип': metric.get('type', ''),
+                        'значение': metric.get('value', 0),
+                        'датасет_раздел': metric.get('dataset_split', 'test'),
+                        'ссылка_на_статью': result.get('paper_link', ''),
+                        'ссылка_на_код': result.get('code_link', '')
+                    }
+                    for metric in result.get('metrics', [])
+                ]
+            }
+            for result in results
+        ]
+    }
+
+# Вид данных -> (функция преобразования записи, поле с названием записи для журнала)
+RECORD_BUILDERS = {
+    'systems': (system_record, 'model_name'),
+    'datasets': (dataset_record, 'dataset_name'),
+    'papers': (paper_record, 'paper_title'),
+    'benchmarks': (benchmark_record, 'benchmark_name')
+}
+
+def iter_record_batches(kind: str, records: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    """
+    Преобразует записи в строки таблиц и отдает их порциями по batch_size.
+    Записи, которые не удалось преобразовать, пропускаются с ошибкой в журнале
+    """
+    build, name_field = RECORD_BUILDERS[kind]
+    batch = []
+    for item in records:
+        try:
+            batch.append(build(item))
+        except Exception as e:
+            logging.error(f"Ошибка при разборе записи {item.get(name_field, 'Unknown')}: {e}")
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def parse_file_to_queue(kind: str, file_path: str, batch_size: int, queue) -> int:
+    """
+    Выполняется в процессе пула: разбирает файл и кладет порции строк
+    в очередь; в конце всегда кладет None. Возвращает число записей
+    """
+    count = 0
+    try:
+        for batch in iter_record_batches(kind, iter_records(file_path), batch_size):
+            queue.put(batch)
+            count += len(batch)
+    finally:
+        queue.put(None)
+    return count
+
+def iter_queue_batches(queue, future, poll_seconds: float = 1.0) -> Iterator[List[Dict]]:
+    """
+    Порции из очереди parse_file_to_queue до None. Очередь опрашивается с
+    таймаутом: если процесс разбора завершился с ошибкой или был убит (OOM,
+    SIGKILL) и None уже не придет, ошибка future пробрасывается вместо
+    бесконечного ожидания
+    """
+    while True:
+        try:
+            batch = queue.get(timeout=poll_seconds)
+        except Empty:
+            # Успешно завершившийся разбор уже положил None - он придет следующим
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+            continue
+        if batch is None:
+            return
+        yield batch
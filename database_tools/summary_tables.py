@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Сводные таблицы по systems: число систем, число систем с известным числом
+скачиваний и сумма скачиваний для групп (год, разработчик), лицензия и
+архитектура. DataLoader накапливает изменения в SummaryDelta и применяет их
+в транзакции записи; DataAnalyzer читает готовые группы вместо агрегатов
+по всей таблице systems. Запуск модуля пересобирает таблицы целиком
+"""
+
+import json
+import logging
+from typing import Dict, List, Mapping
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from database_config import get_session
+from models import System, SummaryYearDeveloper, SummaryLicense, SummaryArchitecture
+from bulk_insert import increment_rows, insert_rows
+from analysis_cache import invalidate_analysis_cache
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+
+# Сводная таблица -> столбцы systems, по которым она сгруппирована
+SUMMARY_TABLES = [
+    (SummaryYearDeveloper.__table__, ['год_первого_релиза', 'разработчик']),
+    (SummaryLicense.__table__, ['тип_лицензии']),
+    (SummaryArchitecture.__table__, ['архитектура'])
+]
+COUNTERS = ['количество_систем', 'количество_со_скачиваниями', 'сумма_скачиваний']
+
+# Поля системы, от которых зависят сводные таблицы
+SUMMARY_COLUMNS = ['год_первого_релиза', 'разработчик', 'тип_лицензии', 'архитектура', 'количество_скачиваний']
+
+def summary_key(values: List) -> str:
+    return json.dumps(values, ensure_ascii=False)
+
+def summary_values(system: System) -> Dict:
+    """
+    Поля ORM-объекта системы, нужные сводным таблицам
+    """
+    return {column: getattr(system, column) for column in SUMMARY_COLUMNS}
+
+def _summary_row(key_columns: List[str], key: tuple, counters: List[int]) -> Dict:
+    row = dict(zip(key_columns, key), ключ=summary_key(list(key)))
+    row.update(zip(COUNTERS, counters))
+    return row
+
+class SummaryDelta:
+    """
+    Изменения счетчиков сводных таблиц, накопленные за порцию записи
+    """
+    def __init__(self):
+        self.deltas = [{} for _ in SUMMARY_TABLES]
+
+    def add(self, system: Mapping, sign: int = 1):
+        """
+        Учитывает систему (sign=1) или снимает ее прежнее состояние (sign=-1)
+        """
+        downloads = system.get('количество_скачиваний')
+        for deltas, (table, key_columns) in zip(self.deltas, SUMMARY_TABLES):
+            counters = deltas.setdefault(tuple(system.get(column) for column in key_columns), [0, 0, 0])
+            counters[0] += sign
+            if downloads is not None:
+                counters[1] += sign
+                counters[2] += sign * downloads
+
+    def apply(self, session: Session):
+        """
+        Применяет изменения в текущей транзакции сессии; группы,
+        в которых не осталось систем, удаляются
+        """
+        for deltas, (table, key_columns) in zip(self.deltas, SUMMARY_TABLES):
+            rows = [_summary_row(key_columns, key, counters)
+                    for key, counters in deltas.items() if any(counters)]
+            increment_rows(session, table, rows, COUNTERS)
+            if any(counters[0] < 0 for counters in deltas.values()):
+                session.execute(delete(table).where(table.c.количество_систем <= 0))
+        self.deltas = [{} for _ in SUMMARY_TABLES]
+
+def rebuild_summary_tables(session: Session):
+    """
+    Пересчитывает сводные таблицы по systems целиком (один GROUP BY на таблицу).
+    Результаты анализа по прежним сводным таблицам устаревают
+    """
+    invalidate_analysis_cache(session)
+    for table, key_columns in SUMMARY_TABLES:
+        session.execute(delete(table))
+        group_columns = [System.__table__.c[column] for column in key_columns]
+        groups = session.execute(
+            select(*group_columns, func.count(), func.count(System.количество_скачиваний),
+                   func.coalesce(func.sum(System.количество_скачиваний), 0))
+            .group_by(*group_columns)
+        ).all()
+        insert_rows(session, table, [
+            _summary_row(key_columns, tuple(group[:len(key_columns)]), list(group[len(key_columns):]))
+            for group in groups
+        ])
+
+def ensure_summary_tables(session: Session):
+    """
+    Заполняет сводные таблицы для баз, загруженных до их появления
+    (вызывается из init_database после создания таблиц)
+    """
+    summary_empty = session.execute(select(SummaryYearDeveloper.id).limit(1)).first() is None
+    if summary_empty and session.execute(select(System.id).limit(1)).first() is not None:
+        rebuild_summary_tables(session)
+        session.commit()
+        logging.info("Сводные таблицы заполнены по таблице systems")
+
+def main():
+    """
+    Пересборка сводных таблиц (например, после изменений systems в обход DataLoader)
+    """
+    session = get_session()
+    for table, _ in SUMMARY_TABLES:
+        table.create(session.get_bind(), checkfirst=True)
+    rebuild_summary_tables(session)
+    session.commit()
+    for table, _ in SUMMARY_TABLES:
+        count = session.execute(select(func.count()).select_from(table)).scalar()
+        print(f"{table.name}: {count} групп")
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,8 @@ from database_tools.database_config import init_database
 from database_tools.data_loader import DataLoader
 from analysis.data_analysis import DataAnalyzer
 #from visualization.visualization import DataVisualizer
+# Тот же экземпляр модуля, что у загрузчика и анализатора (общий реестр движков)
+from database_config import get_pool_metrics
 
 # Настройка логирования
 logging.basicConfig(
@@ -59,6 +61,9 @@ def main():
         logging.info("Шаг 5: Вывод результатов")
         print_analysis_summary(results)
         
+        for url, metrics in get_pool_metrics().items():
+            logging.info(f"Пул соединений {url}: {metrics}")
+        
         logging.info("=== ФАЗА РЕАЛИЗАЦИИ И АНАЛИЗА ЗАВЕРШЕНА УСПЕШНО ===")
         
     except Exception as e:
@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import threading
+import importlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+from sqlalchemy import text
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+for path in ('data_collection', os.path.join('data_collection', 'group1_huggingface_models'),
+             os.path.join('data_collection', 'group3_papers'),
+             os.path.join('data_collection', 'group4_benchmarks'), 'database_tools', 'analysis'):
+    sys.path.append(os.path.join(ROOT, path))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """
+    Пустая база SQLite во временной папке вместо базы из настроек
+    """
+    import database_config
+    monkeypatch.setattr(database_config, 'DB_TYPE', 'sqlite')
+    monkeypatch.setitem(database_config.DATABASE_CONFIG['sqlite'], 'database', str(tmp_path / 'test.db'))
+    database_config.dispose_engines()
+    database_config.init_database()
+    yield database_config.get_engine()
+    database_config.dispose_engines()
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        stub = self.server.stub
+        stub.requests.append({'path': self.path, 'headers': dict(self.headers)})
+        route = stub.routes[urlsplit(self.path).path]
+        if callable(route):
+            status, headers, body = route(self.path, self.headers)
+        else:
+            status, headers, body = route.pop(0) if len(route) > 1 else route[0]
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer:
+    """
+    Локальный HTTP-сервер для тестов: routes - путь -> список ответов
+    (status, headers, body), которые отдаются по очереди (последний
+    повторяется), или функция (путь с запросом, заголовки) -> ответ
+    """
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self.server.stub = self
+
+    def url(self, path: str) -> str:
+        return f'http://127.0.0.1:{self.server.server_address[1]}{path}'
+
+@pytest.fixture
+def stub_server():
+    stub = StubServer()
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+def import_scraper(module_name: str, directory):
+    """
+    Импорт скрипта сбора, который при импорте открывает журнал в текущей папке
+    """
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        return importlib.import_module(module_name)
+    finally:
+        os.chdir(cwd)
+
+def write_jsonl(data_dir, group, file_name, records):
+    """
+    Пишет файл группы сбора данных в формате JSONL
+    """
+    group_dir = data_dir / group
+    group_dir.mkdir(parents=True, exist_ok=True)
+    with open(group_dir / file_name, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+SYSTEMS = 200
+
+@pytest.fixture
+def analysis_db(sqlite_db, tmp_path):
+    """
+    База с системами, статьями, датасетами и лидербордом, загруженная DataLoader,
+    со статистикой планировщика (ANALYZE)
+    """
+    from data_loader import DataLoader
+    data_dir = tmp_path / 'data'
+    write_jsonl(data_dir, 'group1_huggingface_models', 'models_data_1.jsonl', [
+        {'model_name': f'org{i % 20}/model-{i}', 'author_organization': f'org{i % 20}',
+         'license': ['mit', 'apache-2.0', 'cc-by-4.0'][i % 3],
+         'architecture': ['whisper', 'wav2vec2', 'tacotron'][i % 3], 'languages': ['en', 'ru'][:1 + i % 2],
+         'downloads': i * 10, 'created_date': f'{2015 + i % 10}-01-01', 'system_type': 'asr'}
+        for i in range(SYSTEMS)
+    ])
+    write_jsonl(data_dir, 'group2_datasets', 'datasets_data_1.jsonl', [
+        {'dataset_name': f'dataset-{i}', 'source': 'huggingface', 'size_hours': i} for i in range(20)
+    ])
+    write_jsonl(data_dir, 'group3_papers', 'papers_data_1.jsonl', [
+        {'model_name': f'org{i % 20}/model-{i}', 'paper_title': f'Paper {i}',
+         'arxiv_link': f'https://arxiv.org/abs/{i}', 'publication_year': 2020, 'authors': [],
+         'metrics': [{'type': 'MOS' if i % 3 == 0 else 'WER', 'value': 1 + i % 10, 'dataset': 'LibriSpeech',
+                      'language': 'en'}]}
+        for i in range(SYSTEMS)
+    ])
+    write_jsonl(data_dir, 'group4_benchmarks', 'benchmarks_data_1.jsonl', [
+        {'benchmark_name': 'Leaderboard', 'source': 'huggingface', 'results': [
+            {'model_name': f'org{i % 20}/model-{i}', 'rank': i + 1,
+             'metrics': [{'type': 'WER', 'value': 2 + i / 100, 'dataset_split': 'test'}]}
+            for i in range(50)
+        ]}
+    ])
+    DataLoader(workers=1).load_all_data(str(data_dir))
+    with sqlite_db.begin() as connection:
+        connection.execute(text('ANALYZE'))
+    return sqlite_db
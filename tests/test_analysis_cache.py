@@ -0,0 +1,53 @@
+import json
+import zlib
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy import select
+
+from conftest import write_jsonl
+
+def test_cached_analysis_matches_fresh_results(analysis_db):
+    from data_analysis import DataAnalyzer
+    from database_config import get_session
+    from models import AnalysisCache
+    fresh = DataAnalyzer(use_cache=False).run_full_analysis()
+    assert DataAnalyzer().run_full_analysis() == fresh
+    # Второй запуск читает все разделы из кэша
+    assert DataAnalyzer().run_full_analysis() == fresh
+
+    # В базе хранится JSON, а не pickle
+    payloads = get_session().execute(select(AnalysisCache.результат)).scalars().all()
+    assert len(payloads) == 10
+    for payload in payloads:
+        json.loads(zlib.decompress(payload))
+
+def test_result_codec_keeps_dates_and_numpy_numbers():
+    from analysis_cache import decode_result, encode_result
+    result = [{'date': datetime(2024, 5, 1, 12, 30), 'day': date(2024, 5, 1), 'rank': np.int64(3),
+               'wer': np.float64(5.5), 'model_name': 'модель'}]
+    decoded = decode_result(encode_result(result))
+    assert decoded == [{'date': datetime(2024, 5, 1, 12, 30), 'day': date(2024, 5, 1), 'rank': 3,
+                        'wer': 5.5, 'model_name': 'модель'}]
+    assert type(decoded[0]['rank']) is int
+
+def test_loader_write_bumps_version_and_clears_cache(analysis_db, tmp_path):
+    from analysis_cache import data_version
+    from data_analysis import DataAnalyzer
+    from data_loader import DataLoader
+    from database_config import get_session
+    from models import AnalysisCache
+    analyzer = DataAnalyzer()
+    analyzer.get_systems_overview()
+    version = data_version(analyzer.session)
+    assert analyzer.cached_result('get_systems_overview') is not None
+
+    data_dir = tmp_path / 'data'
+    write_jsonl(data_dir, 'group2_datasets', 'datasets_data_2.jsonl', [
+        {'dataset_name': 'new-dataset', 'source': 'huggingface', 'size_hours': 1}
+    ])
+    DataLoader(workers=1).load_all_data(str(data_dir))
+
+    session = get_session()
+    assert int(data_version(session)) > int(version)
+    assert session.execute(select(AnalysisCache.id)).first() is None
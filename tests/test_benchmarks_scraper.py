@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from conftest import FIXTURES, import_scraper
+
+@pytest.fixture(scope='module')
+def scraper_module(tmp_path_factory):
+    return import_scraper('benchmarks_scraper', tmp_path_factory.mktemp('scraper'))
+
+def make_scraper(module, path):
+    return module.HuggingFaceLeaderboardScraper(source=module.FileLeaderboardSource(path), cache_path=None)
+
+def test_source_is_abstract(scraper_module):
+    with pytest.raises(TypeError):
+        scraper_module.LeaderboardSource()
+
+def test_file_source_reads_csv(scraper_module):
+    rows, headers = scraper_module.FileLeaderboardSource(os.path.join(FIXTURES, 'leaderboard_results.csv')).fetch()
+    assert len(rows) == 3
+    assert 'Average WER ⬇️' in headers
+    assert rows[0]['model'] == 'openai/whisper-large-v3'
+
+def test_file_source_reads_gradio_json(scraper_module):
+    rows, headers = scraper_module.FileLeaderboardSource(os.path.join(FIXTURES, 'leaderboard_gradio.json')).fetch()
+    assert headers[0] == 'model'
+    assert rows[1] == {'model': 'nvidia/canary-qwen-2.5b', 'Average WER ⬇️': 5.63, 'RTFx ⬆️️': 418.28,
+                       'License': 'Open', 'AMI': 10.19, 'LS Clean': 1.61}
+
+def test_csv_results_are_ranked_by_average_wer(scraper_module):
+    results = make_scraper(scraper_module, os.path.join(FIXTURES, 'leaderboard_results.csv')).extract_benchmark_data()[0]['results']
+    assert [(result['rank'], result['model_name']) for result in results] == [
+        (1, 'nvidia/canary-qwen-2.5b'), (2, 'elevenlabs/scribe_v1'), (3, 'openai/whisper-large-v3')
+    ]
+    metrics = {(metric['type'], metric['dataset_split']): metric['value'] for metric in results[0]['metrics']}
+    assert metrics[('Average WER', 'average')] == 5.63
+    assert metrics[('RTFx', 'average')] == 418.28
+    assert metrics[('WER', 'ls_clean')] == 1.61
+    assert [result['license'] for result in results] == ['Open', 'Proprietary', 'Open']
+    # RTFx "-" не превращается в метрику
+    assert ('RTFx', 'average') not in {(m['type'], m['dataset_split']) for m in results[1]['metrics']}
+
+def test_gradio_json_results_are_ranked_by_average_wer(scraper_module):
+    results = make_scraper(scraper_module, os.path.join(FIXTURES, 'leaderboard_gradio.json')).extract_benchmark_data()[0]['results']
+    assert [result['model_name'] for result in results] == ['nvidia/canary-qwen-2.5b', 'openai/whisper-large-v3']
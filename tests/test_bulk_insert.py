@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, UniqueConstraint
+
+from bulk_insert import natural_key
+from models import Base
+
+def test_natural_key_prefers_natural_index_over_other_unique_keys():
+    table = Table('items', MetaData(),
+                  Column('id', Integer, primary_key=True),
+                  Column('код', String(50), unique=True),
+                  Column('название', String(50)),
+                  Column('источник', String(50)),
+                  Index('ux_items_code_name', 'код', 'название', unique=True),
+                  Index('ux_items_natural', 'название', 'источник', unique=True))
+    assert natural_key(table) == ['название', 'источник']
+
+def test_natural_key_rejects_ambiguous_unique_keys():
+    table = Table('items', MetaData(),
+                  Column('id', Integer, primary_key=True),
+                  Column('код', String(50)),
+                  Column('название', String(50)),
+                  UniqueConstraint('код'),
+                  Index('ux_items_name', 'название', unique=True))
+    with pytest.raises(ValueError, match='несколько уникальных ключей'):
+        natural_key(table)
+
+def test_natural_key_uses_single_unique_key():
+    table = Table('items', MetaData(),
+                  Column('id', Integer, primary_key=True),
+                  Column('ключ', String(50), unique=True))
+    assert natural_key(table) == ['ключ']
+
+def test_every_model_table_has_natural_key():
+    # Ни одна таблица схемы не должна давать неоднозначную цель ON CONFLICT
+    import summary_tables  # noqa: F401 - регистрирует сводные таблицы
+    for table in Base.metadata.sorted_tables:
+        assert natural_key(table)
@@ -0,0 +1,119 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from conftest import import_scraper
+from crawl_state import CrawlState
+
+PIPELINE = 'automatic-speech-recognition'
+MODELS = [f'org/model-{i}' for i in range(1, 6)]
+
+@pytest.fixture(scope='module')
+def scraper_module(tmp_path_factory):
+    return import_scraper('huggingface_scraper', tmp_path_factory.mktemp('huggingface'))
+
+class Paginator:
+    """
+    Список моделей по 2 на страницу со ссылкой на следующую в заголовке Link;
+    страницу с курсором из failing сервер отдает с ошибкой 404
+    """
+    def __init__(self, stub):
+        self.stub = stub
+        self.failing = set()
+        stub.routes['/api/models'] = self.page
+        for model_id in MODELS:
+            stub.routes[f'/api/models/{model_id}'] = [
+                (200, {'Content-Type': 'application/json'},
+                 json.dumps({'id': model_id, 'pipeline_tag': PIPELINE}).encode())
+            ]
+
+    def page(self, path, headers):
+        cursor = int(parse_qs(urlsplit(path).query).get('cursor', ['0'])[0])
+        if cursor in self.failing:
+            return 404, {}, b''
+        models = [{'id': model_id, 'lastModified': '2025-01-01T00:00:00.000Z'}
+                  for model_id in MODELS[cursor:cursor + 2]]
+        response_headers = {'Content-Type': 'application/json'}
+        if cursor + 2 < len(MODELS):
+            response_headers['Link'] = f'<{self.stub.url("/api/models")}?cursor={cursor + 2}>; rel="next"'
+        return 200, response_headers, json.dumps(models).encode()
+
+    def requested(self):
+        paths = [request['path'] for request in self.stub.requests]
+        self.stub.requests.clear()
+        return paths
+
+def make_scraper(module, stub, state_path):
+    scraper = module.HuggingFaceScraper(base_url=stub.url('/api/models'), cache_path=None,
+                                        state_path=str(state_path), page_size=2)
+    scraper.pipeline_tags = [PIPELINE]
+    scraper.http.rate_limiter = None
+    return scraper
+
+def run_ids(state):
+    return [record['id'] for record in state.iter_run_records(batch_size=2)]
+
+def test_interrupted_crawl_resumes_from_saved_cursor(scraper_module, stub_server, tmp_path):
+    paginator = Paginator(stub_server)
+    paginator.failing.add(4)
+    scraper = make_scraper(scraper_module, stub_server, tmp_path / 'state.sqlite')
+    scraper._collect_data_sequential()
+
+    assert not scraper.crawl_complete
+    position = scraper.state.get_position(PIPELINE)
+    assert position == {'next_url': stub_server.url('/api/models') + '?cursor=4', 'done': False, 'pages': 2}
+    assert run_ids(scraper.state) == MODELS[:4]
+    paginator.requested()
+    scraper.state.close()
+
+    # Перезапуск продолжает тот же обход с сохраненной страницы
+    paginator.failing.clear()
+    resumed = make_scraper(scraper_module, stub_server, tmp_path / 'state.sqlite')
+    resumed._collect_data_sequential()
+
+    assert resumed.crawl_complete
+    assert resumed.state.run_id == 1
+    assert paginator.requested() == ['/api/models?cursor=4', '/api/models/org/model-5']
+    assert resumed.state.get_position(PIPELINE) == {'next_url': None, 'done': True, 'pages': 3}
+    # Без повторов и пропусков, в порядке обхода
+    assert run_ids(resumed.state) == MODELS
+
+def test_new_run_skips_details_of_unchanged_models(scraper_module, stub_server, tmp_path):
+    paginator = Paginator(stub_server)
+    first = make_scraper(scraper_module, stub_server, tmp_path / 'state.sqlite')
+    first._collect_data_sequential()
+    first.state.close()
+    paginator.requested()
+
+    second = make_scraper(scraper_module, stub_server, tmp_path / 'state.sqlite')
+    second._collect_data_sequential()
+    assert second.state.run_id == 2
+    assert all(urlsplit(path).path == '/api/models' for path in paginator.requested())
+    assert second.crawl_stats['unchanged_models'] == len(MODELS)
+    assert run_ids(second.state) == MODELS
+
+def test_failed_details_are_requested_again(tmp_path):
+    state = CrawlState(str(tmp_path / 'state.sqlite'))
+    state.begin_run()
+    state.commit_page(PIPELINE, {'a': '2025-01-01', 'b': '2025-01-01'}, {'a': {'id': 'a'}}, None)
+    # У 'b' нет записи, поэтому дата изменения не сохранена
+    assert state.last_modified(['a', 'b']) == {'a': '2025-01-01'}
+    assert run_ids(state) == ['a']
+    state.finish_run()
+
+    state.begin_run()
+    state.commit_page(PIPELINE, {'a': '2025-01-01', 'b': '2025-01-01'}, {'b': {'id': 'b'}}, None)
+    assert run_ids(state) == ['a', 'b']
+
+def test_collect_data_is_async_by_default(scraper_module, stub_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Paginator(stub_server)
+    scraper = make_scraper(scraper_module, stub_server, tmp_path / 'state.sqlite')
+    scraper.enrich_workers = 1
+    scraper.collect_data()
+
+    # Метрики асинхронного клиента есть только после асинхронного сбора
+    assert scraper.async_metrics['total_requests'] == len(MODELS)
+    assert scraper.crawl_complete
+    assert len(list(tmp_path.glob('models_data_*.jsonl'))) == 1
@@ -0,0 +1,94 @@
+from sqlalchemy import func, select
+
+from conftest import write_jsonl
+
+def model(name, downloads=0):
+    return {'model_name': name, 'author_organization': 'org', 'license': 'mit', 'architecture': 'whisper',
+            'languages': ['en'], 'downloads': downloads, 'created_date': '2024-01-01', 'system_type': 'asr'}
+
+def paper(model_name, title, wer):
+    return {'model_name': model_name, 'paper_title': title, 'arxiv_link': f'https://arxiv.org/abs/{title}',
+            'publication_year': 2024, 'authors': ['A. Author'],
+            'metrics': [{'type': 'WER', 'value': wer, 'dataset': 'LibriSpeech', 'language': 'en'}]}
+
+def load(data_dir, bulk=True):
+    from data_loader import DataLoader
+    loader = DataLoader(bulk=bulk, workers=1)
+    loader.load_all_data(str(data_dir))
+    loader.session.close()
+
+def count_systems(engine):
+    from models import System
+    with engine.connect() as connection:
+        total = connection.execute(select(func.count()).select_from(System.__table__)).scalar()
+        nameless = connection.execute(
+            select(func.count()).select_from(System.__table__).where(System.нормализованное_название.is_(None))
+        ).scalar()
+    return total, nameless
+
+def test_records_without_model_name_are_skipped(sqlite_db, tmp_path):
+    data_dir = tmp_path / 'data'
+    write_jsonl(data_dir, 'group1_huggingface_models', 'models_data_1.jsonl', [model('org/a'), model(''), model('  ')])
+    write_jsonl(data_dir, 'group3_papers', 'papers_data_1.jsonl', [paper('', 'p1', 5.0), paper('org/b', 'p2', 6.0)])
+    load(data_dir)
+    assert count_systems(sqlite_db) == (2, 0)
+
+    # Измененный файл загружается повторно: безымянные системы не добавляются
+    write_jsonl(data_dir, 'group1_huggingface_models', 'models_data_1.jsonl', [model('org/a', 10), model('')])
+    load(data_dir)
+    assert count_systems(sqlite_db) == (2, 0)
+
+def metric_values(engine):
+    from models import SystemMetric
+    with engine.connect() as connection:
+        return [float(value) for (value,) in connection.execute(select(SystemMetric.значение))]
+
+def test_changed_metric_value_replaces_previous(sqlite_db, tmp_path):
+    data_dir = tmp_path / 'data'
+    write_jsonl(data_dir, 'group3_papers', 'papers_data_1.jsonl', [paper('org/a', 'p1', 5.0)])
+    load(data_dir)
+    write_jsonl(data_dir, 'group3_papers', 'papers_data_1.jsonl', [paper('org/a', 'p1', 4.0)])
+    load(data_dir)
+    assert metric_values(sqlite_db) == [4.0]
+
+def test_sync_schema_narrows_metric_key_keeping_latest_rows(sqlite_db):
+    from sqlalchemy import text
+    from database_config import sync_schema
+    # База со старым ключом, в который входило значение метрики
+    with sqlite_db.begin() as connection:
+        connection.execute(text('DROP INDEX ux_system_metrics_natural'))
+        connection.execute(text('CREATE UNIQUE INDEX ux_system_metrics_natural '
+                                'ON system_metrics (system_id, метрика_тип, датасет, язык, значение)'))
+        connection.execute(text("INSERT INTO systems (id, название, нормализованное_название) VALUES (1, 'a', 'a')"))
+        for value in (5.0, 4.0, 3.0):
+            connection.execute(text("INSERT INTO system_metrics (system_id, метрика_тип, значение, датасет, язык) "
+                                    "VALUES (1, 'WER', :value, 'LibriSpeech', 'en')"), {'value': value})
+    sync_schema(sqlite_db)
+    assert metric_values(sqlite_db) == [3.0]
+    with sqlite_db.connect() as connection:
+        columns = [row[2] for row in connection.execute(text("PRAGMA index_info('ux_system_metrics_natural')"))]
+    assert columns == ['system_id', 'метрика_тип', 'датасет', 'язык']
+
+def test_non_bulk_load_updates_existing_systems(sqlite_db, tmp_path):
+    from database_config import get_session
+    from models import System, system_languages
+    from summary_tables import SUMMARY_TABLES, rebuild_summary_tables
+    data_dir = tmp_path / 'data'
+    write_jsonl(data_dir, 'group1_huggingface_models', 'models_data_1.jsonl', [model('org/a', 5), model('org/b')])
+    load(data_dir, bulk=False)
+
+    changed = dict(model('org/a', 50), license='apache-2.0', languages=['ru', 'de'])
+    write_jsonl(data_dir, 'group1_huggingface_models', 'models_data_1.jsonl', [changed, model('org/b')])
+    load(data_dir, bulk=False)
+
+    session = get_session()
+    system = session.execute(select(System).where(System.нормализованное_название == 'org/a')).scalar_one()
+    assert (system.тип_лицензии, system.количество_скачиваний) == ('apache-2.0', 50)
+    languages = session.execute(select(system_languages.c.язык).where(system_languages.c.system_id == system.id))
+    assert sorted(languages.scalars()) == ['de', 'ru']
+    assert session.execute(select(func.count()).select_from(System)).scalar() == 2
+
+    # Счетчики сводных таблиц совпадают с пересборкой
+    summaries = [sorted(tuple(row[1:]) for row in session.execute(select(table))) for table, _ in SUMMARY_TABLES]
+    rebuild_summary_tables(session)
+    assert summaries == [sorted(tuple(row[1:]) for row in session.execute(select(table))) for table, _ in SUMMARY_TABLES]
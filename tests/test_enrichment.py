@@ -0,0 +1,33 @@
+import pytest
+
+from enrichment import enrich_records
+
+def square(record):
+    # Каждая седьмая запись отбрасывается, как запись без нужных полей
+    if record['n'] % 7 == 0:
+        return None
+    return {'n': record['n'], 'square': record['n'] ** 2}
+
+class CountingRecords:
+    def __init__(self, count):
+        self.count = count
+        self.consumed = 0
+
+    def __iter__(self):
+        for n in range(self.count):
+            self.consumed += 1
+            yield {'n': n}
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_order_and_records_are_kept_across_chunks(workers):
+    # 1003 записи не делятся на порции по 10 нацело
+    result = list(enrich_records(CountingRecords(1003), square, workers=workers, chunk_size=10))
+    assert result == [square({'n': n}) for n in range(1003) if n % 7]
+
+def test_input_is_consumed_lazily():
+    source = CountingRecords(10000)
+    results = enrich_records(source, square, workers=2, chunk_size=10)
+    next(results)
+    # В работе не больше 2 * workers порций
+    assert source.consumed <= 2 * 2 * 10 + 10
+    assert len(list(results)) == len([n for n in range(10000) if n % 7]) - 1
@@ -0,0 +1,101 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import http_cache
+from http_cache import ResponseCache
+from http_client import HttpClient, build_response
+
+LAST_MODIFIED = 'Wed, 01 Oct 2025 10:00:00 GMT'
+
+def cached_client(cache):
+    return HttpClient(cache=cache, max_retries=0)
+
+def response(url, body, headers=None):
+    return build_response(url, 200, headers or {}, body)
+
+def test_revalidation_sends_conditional_headers_and_serves_cached_body_on_304(stub_server, tmp_path):
+    def route(path, headers):
+        if headers.get('If-None-Match') == '"v1"':
+            return 304, {'ETag': '"v1"'}, b''
+        return 200, {'ETag': '"v1"', 'Last-Modified': LAST_MODIFIED}, b'{"models": 1}'
+    stub_server.routes['/api/models'] = route
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    client = cached_client(cache)
+
+    first = client.get(stub_server.url('/api/models'), params={'limit': 10})
+    second = client.get(stub_server.url('/api/models'), params={'limit': 10})
+
+    assert first.content == second.content == b'{"models": 1}'
+    assert second.status_code == 200
+    assert 'If-None-Match' not in stub_server.requests[0]['headers']
+    assert stub_server.requests[1]['headers']['If-None-Match'] == '"v1"'
+    assert stub_server.requests[1]['headers']['If-Modified-Since'] == LAST_MODIFIED
+    stats = cache.get_stats()
+    assert (stats['stored'], stats['hits'], stats['revalidated'], stats['misses']) == (1, 1, 1, 1)
+    assert stats['bytes_saved'] == len(b'{"models": 1}')
+
+def test_changed_response_replaces_entry(stub_server, tmp_path):
+    stub_server.routes['/data'] = [
+        (200, {'ETag': '"v1"'}, b'old body'),
+        (200, {'ETag': '"v2"'}, b'new, longer body')
+    ]
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    client = cached_client(cache)
+    client.get(stub_server.url('/data'))
+    assert client.get(stub_server.url('/data')).content == b'new, longer body'
+
+    entry = cache.get(stub_server.url('/data'))
+    assert (entry['etag'], entry['content']) == ('"v2"', b'new, longer body')
+    stats = cache.get_stats()
+    assert (stats['entries'], stats['size_bytes']) == (1, len(b'new, longer body'))
+
+def test_lru_eviction_by_size(tmp_path, monkeypatch):
+    # Монотонные часы: порядок обращений не зависит от разрешения time.time()
+    clock = itertools.count(1)
+    monkeypatch.setattr(http_cache, 'time', SimpleNamespace(time=lambda: next(clock)))
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_bytes=250)
+    for name in ('a', 'b'):
+        cache.store(f'http://host/{name}', None, response(f'http://host/{name}', b'x' * 100))
+    cache.hit(cache.get('http://host/a'))
+    cache.store('http://host/c', None, response('http://host/c', b'x' * 100))
+
+    assert cache.get('http://host/b') is None
+    assert cache.get('http://host/a') is not None and cache.get('http://host/c') is not None
+    stats = cache.get_stats()
+    assert (stats['evicted'], stats['entries'], stats['size_bytes']) == (1, 2, 200)
+
+    # Повторное сохранение той же записи не увеличивает учтенный размер
+    cache.store('http://host/c', None, response('http://host/c', b'x' * 100))
+    assert cache.get_stats()['evicted'] == 1
+    assert cache._size == cache.get_stats()['size_bytes'] == 200
+
+def test_eviction_accounts_for_entries_written_by_another_process(tmp_path, monkeypatch):
+    clock = itertools.count(1)
+    monkeypatch.setattr(http_cache, 'time', SimpleNamespace(time=lambda: next(clock)))
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ResponseCache(path, max_bytes=250)
+    ResponseCache(path, max_bytes=250).store('http://host/a', None, response('http://host/a', b'x' * 200))
+    for name in ('b', 'c', 'd'):
+        cache.store(f'http://host/{name}', None, response(f'http://host/{name}', b'x' * 100))
+    # Размер пересчитан перед вытеснением: ушли чужая запись и самая старая своя
+    assert cache.get('http://host/a') is None and cache.get('http://host/b') is None
+    stats = cache.get_stats()
+    assert (stats['evicted'], stats['size_bytes']) == (2, 200)
+
+def test_offline_mode_serves_cache_without_network(stub_server, tmp_path):
+    stub_server.routes['/data'] = [(200, {}, b'cached')]
+    path = str(tmp_path / 'cache.sqlite')
+    cached_client(ResponseCache(path)).get(stub_server.url('/data'), params={'b': 2, 'a': 1})
+
+    offline = ResponseCache(path, offline=True)
+    client = cached_client(offline)
+    # Порядок параметров не влияет на ключ кэша
+    assert client.get(stub_server.url('/data'), params={'a': 1, 'b': 2}).content == b'cached'
+    with pytest.raises(requests.ConnectionError):
+        client.get(stub_server.url('/missing'))
+    assert len(stub_server.requests) == 1
+    stats = offline.get_stats()
+    assert (stats['hits'], stats['misses'], stats['offline']) == (1, 1, True)
@@ -0,0 +1,96 @@
+import random
+import socket
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+import http_client
+from http_client import HttpClient, TokenBucket, parse_retry_after
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Задержки повторов записываются вместо реального ожидания
+    """
+    delays = []
+    monkeypatch.setattr(http_client.time, 'sleep', delays.append)
+    return delays
+
+def test_retry_after_seconds_take_priority_over_backoff(stub_server, sleeps):
+    stub_server.routes['/limited'] = [(429, {'Retry-After': '7'}, b''), (200, {}, b'ok')]
+    client = HttpClient(backoff_factor=0.5)
+    response = client.get(stub_server.url('/limited'))
+
+    assert (response.status_code, response.content) == (200, b'ok')
+    assert sleeps == [7.0]
+    assert len(stub_server.requests) == 2
+    assert client.metrics[0]['attempts'] == 2 and client.metrics[0]['status'] == 200
+
+def test_503_retries_with_exponential_backoff(stub_server, sleeps, monkeypatch):
+    # Верхняя граница jitter - чистая экспонента backoff_factor * 2^attempt
+    monkeypatch.setattr(http_client.random, 'uniform', lambda low, high: high)
+    stub_server.routes['/flaky'] = [(503, {}, b''), (503, {}, b''), (503, {}, b''), (200, {}, b'ok')]
+    client = HttpClient(backoff_factor=0.5, max_backoff=1.5)
+    assert client.get(stub_server.url('/flaky')).status_code == 200
+    assert sleeps == [0.5, 1.0, 1.5]
+    host = f'127.0.0.1:{stub_server.server.server_address[1]}'
+    assert client.get_metrics_summary()['hosts'][host]['retries'] == 3
+
+def test_exhausted_retries_return_last_response(stub_server, sleeps):
+    stub_server.routes['/down'] = [(503, {'Retry-After': '1'}, b'busy')]
+    client = HttpClient(max_retries=2)
+    response = client.get(stub_server.url('/down'))
+
+    assert (response.status_code, response.content) == (503, b'busy')
+    assert len(stub_server.requests) == 3
+    assert sleeps == [1.0, 1.0]
+    assert client.metrics[0]['attempts'] == 3
+
+def test_connection_errors_are_retried_then_raised(sleeps):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    client = HttpClient(max_retries=2, timeout=1)
+    with pytest.raises(requests.ConnectionError):
+        client.get(f'http://127.0.0.1:{port}/')
+    assert len(sleeps) == 2
+    assert client.metrics[0]['attempts'] == 3 and client.metrics[0]['error']
+
+def test_full_jitter_spreads_delays_within_cap():
+    random.seed(0)
+    client = HttpClient(backoff_factor=0.5, max_backoff=4.0)
+    delays = [client._retry_delay(10) for _ in range(200)]
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    # Задержки не совпадают, а покрывают весь интервал
+    assert min(delays) < 0.5 and max(delays) > 3.5
+    assert client._retry_delay(10, '3') == 3.0
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('-5') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 30
+
+def test_token_bucket_allows_burst_then_limits_rate(sleeps, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(http_client.time, 'monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert sleeps == []
+
+    # Четвертый и пятый запросы ждут токены, которые появятся через 0.5 и 1 с
+    bucket.acquire()
+    bucket.acquire()
+    assert sleeps == [0.5, 1.0]
+
+    # За 10 с простоя накапливается не больше capacity токенов
+    now[0] += 10
+    for _ in range(3):
+        bucket.acquire()
+    bucket.acquire()
+    assert sleeps == [0.5, 1.0, 0.5]
@@ -0,0 +1,56 @@
+import os
+import json
+
+import pytest
+
+from jsonl_io import JsonlWriter, iter_records, iter_json_array
+
+MAGIC = {None: b'{"', 'gzip': b'\x1f\x8b', 'zstd': b'\x28\xb5\x2f\xfd'}
+
+def records(count):
+    return [{'id': i, 'name': f'модель-{i}', 'metrics': [{'WER': i / 10}], 'license': None}
+            for i in range(count)]
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zstd'])
+def test_round_trip(tmp_path, compression):
+    with JsonlWriter(str(tmp_path / 'data.jsonl'), compression=compression, fsync_every=7) as writer:
+        for record in records(50):
+            writer.write(record)
+
+    assert writer.count == 50
+    assert writer.path == str(tmp_path / 'data.jsonl') + {None: '', 'gzip': '.gz', 'zstd': '.zst'}[compression]
+    assert os.listdir(tmp_path) == [os.path.basename(writer.path)]
+    with open(writer.path, 'rb') as f:
+        assert f.read(len(MAGIC[compression])) == MAGIC[compression]
+    assert list(iter_records(writer.path)) == records(50)
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zstd'])
+def test_exception_leaves_no_partial_output(tmp_path, compression):
+    path = str(tmp_path / 'data.jsonl')
+    with JsonlWriter(path, compression=compression) as writer:
+        writer.write({'id': 0})
+    published = writer.path
+
+    with pytest.raises(RuntimeError):
+        with JsonlWriter(path, compression=compression, fsync_every=2) as writer:
+            for record in records(5):
+                writer.write(record)
+            raise RuntimeError("сбор прерван")
+
+    # Итоговый файл остался от прошлой записи, а записанное до ошибки - во временном
+    assert list(iter_records(published)) == [{'id': 0}]
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(published),
+                                                   os.path.basename(writer.tmp_path)])
+    assert writer.tmp_path.endswith('.part')
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        JsonlWriter(str(tmp_path / 'data.jsonl'), compression='lz4')
+    assert os.listdir(tmp_path) == []
+
+def test_json_array_read_in_small_chunks(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps(records(20), ensure_ascii=False, indent=2), encoding='utf-8')
+    # Порции по 5 символов режут числа, строки и вложенные объекты
+    assert list(iter_json_array(str(path), chunk_size=5)) == records(20)
+    assert list(iter_records(str(path))) == records(20)
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+def result(model_name, wer, rtfx, license='Open'):
+    return {'model_name': model_name, 'license': license, 'metrics': [
+        {'type': 'Average WER', 'value': wer, 'dataset_split': 'average'},
+        {'type': 'RTFx', 'value': rtfx, 'dataset_split': 'average'},
+        {'type': 'WER', 'value': wer + 1, 'dataset_split': 'ami'}
+    ]}
+
+def write_snapshot(snapshots_dir, taken_at, results):
+    snapshots_dir.mkdir(parents=True, exist_ok=True)
+    with open(snapshots_dir / f'huggingface_leaderboard_{taken_at}.json', 'w', encoding='utf-8') as f:
+        json.dump([{'benchmark_name': 'ASR Leaderboard', 'source': 'huggingface', 'results': results}], f)
+
+@pytest.fixture
+def history_db(sqlite_db, tmp_path):
+    """
+    Два снимка лидерборда без файлов benchmarks_data_*: во втором
+    система org/c обгоняет остальные по обеим метрикам
+    """
+    from data_loader import DataLoader
+    snapshots_dir = tmp_path / 'data' / 'group4_benchmarks'
+    write_snapshot(snapshots_dir, '20250101_060000',
+                   [result('org/a', 5.0, 100.0), result('org/b', 6.0, 200.0), result('org/c', 7.0, 50.0)])
+    write_snapshot(snapshots_dir, '20250201_060000',
+                   [result('org/a', 5.0, 100.0), result('org/b', 6.0, 200.0),
+                    result('org/c', 4.0, 300.0, license='Proprietary')])
+    DataLoader(workers=1).load_all_data(str(tmp_path / 'data'))
+    return sqlite_db
+
+def test_frontier_reads_latest_or_as_of_history_state(history_db):
+    from data_analysis import DataAnalyzer
+    analyzer = DataAnalyzer(use_cache=False)
+    assert [row['model_name'] for row in analyzer.get_leaderboard_frontier()] == ['org/c']
+    earlier = analyzer.get_leaderboard_frontier(as_of='2025-01-15')
+    assert [(row['model_name'], row['wer'], row['rtfx']) for row in earlier] == \
+           [('org/a', 5.0, 100.0), ('org/b', 6.0, 200.0)]
+    assert [row['model_name'] for row in analyzer.get_leaderboard_frontier(dataset_split='ami')] == ['org/c']
+
+def test_top_k_reads_latest_or_as_of_history_state(history_db):
+    from data_analysis import DataAnalyzer
+    analyzer = DataAnalyzer(use_cache=False)
+    latest = analyzer.get_leaderboard_top_k(k=1)
+    assert [(row['dataset_split'], row['model_name'], row['wer']) for row in latest] == \
+           [('ami', 'org/c', 5.0), ('average', 'org/c', 4.0)]
+    earlier = analyzer.get_leaderboard_top_k(k=2, dataset_split='average', as_of='2025-01-15')
+    assert [(row['model_name'], row['rank']) for row in earlier] == [('org/a', 1), ('org/b', 2)]
+
+def test_license_filter_uses_leaderboard_license(history_db):
+    from data_analysis import DataAnalyzer
+    analyzer = DataAnalyzer(use_cache=False)
+    assert [(row['model_name'], row['license']) for row in analyzer.get_leaderboard_frontier(license='Open')] == \
+           [('org/a', 'Open'), ('org/b', 'Open')]
+    assert [row['model_name'] for row in analyzer.get_leaderboard_frontier(license='Proprietary')] == ['org/c']
+    # До второго снимка org/c была открытой
+    top = analyzer.get_leaderboard_top_k(k=1, dataset_split='ami', license='Open', as_of='2025-01-15')
+    assert [(row['model_name'], row['license']) for row in top] == [('org/a', 'Open')]
+    assert analyzer.get_leaderboard_top_k(license='Proprietary', as_of='2025-01-15') == []
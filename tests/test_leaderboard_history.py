@@ -0,0 +1,72 @@
+import json
+import logging
+
+from sqlalchemy import func, select
+
+RESULTS = [{'model_name': 'org/a', 'metrics': [{'type': 'Average WER', 'value': 5.0, 'dataset_split': 'average'}]}]
+
+def write_snapshots(snapshots_dir, snapshots):
+    snapshots_dir.mkdir(parents=True, exist_ok=True)
+    for name, benchmarks in snapshots.items():
+        (snapshots_dir / f'huggingface_leaderboard_{name}').write_text(json.dumps(benchmarks), encoding='utf-8')
+
+def load(data_dir):
+    from data_loader import DataLoader
+    loader = DataLoader(workers=1)
+    loader.load_all_data(str(data_dir))
+    loader.session.close()
+
+def test_diff_drops_keys_only_for_benchmarks_in_snapshot():
+    from leaderboard_history import diff_snapshot
+    state = {(1, 10, 'WER', 'average'): (5.0, 'Open'), (1, 11, 'WER', 'average'): (6.0, 'Open'),
+             (2, 10, 'WER', 'average'): (7.0, 'Open')}
+    changes = diff_snapshot(state, {(1, 10, 'WER', 'average'): (4.5, 'Open')})
+    assert changes == {(1, 10, 'WER', 'average'): (4.5, 'Open'), (1, 11, 'WER', 'average'): None}
+    assert state == {(1, 10, 'WER', 'average'): (4.5, 'Open'), (2, 10, 'WER', 'average'): (7.0, 'Open')}
+
+def test_empty_snapshots_are_skipped(sqlite_db, tmp_path):
+    from data_analysis import DataAnalyzer
+    from data_loader import DataLoader
+    from models import LeaderboardHistory, LeaderboardSnapshot
+    snapshots_dir = tmp_path / 'data' / 'group4_benchmarks'
+    write_snapshots(snapshots_dir, {
+        '20250101_060000.json': [{'benchmark_name': 'ASR', 'source': 'huggingface', 'results': RESULTS}],
+        '20250102_060000.json': [],
+        '20250103_060000.json': [{'benchmark_name': 'ASR', 'source': 'huggingface', 'results': []}],
+    })
+    (snapshots_dir / 'huggingface_leaderboard_20250104_060000.csv').write_text('', encoding='utf-8')
+
+    loader = DataLoader(workers=1)
+    loader.load_all_data(str(tmp_path / 'data'))
+    session = loader.session
+    applied = LeaderboardSnapshot.количество_изменений.isnot(None)
+    assert session.execute(select(func.count()).select_from(LeaderboardSnapshot).where(applied)).scalar() == 1
+    assert session.execute(select(func.count()).select_from(LeaderboardSnapshot)).scalar() == 4
+    assert session.execute(
+        select(func.count()).select_from(LeaderboardHistory).where(LeaderboardHistory.значение.is_(None))
+    ).scalar() == 0
+    leaderboard = DataAnalyzer(use_cache=False).get_leaderboard_as_of('2025-01-04')
+    assert [(row['model_name'], row['rank'], row['average_wer']) for row in leaderboard] == [('org/a', 1, 5.0)]
+
+def test_skipped_snapshots_warn_only_once(sqlite_db, tmp_path, caplog):
+    snapshots_dir = tmp_path / 'data' / 'group4_benchmarks'
+    first = [{'benchmark_name': 'ASR', 'source': 'huggingface', 'results': RESULTS}]
+    write_snapshots(snapshots_dir, {'20250105_060000.json': first})
+    load(tmp_path / 'data')
+
+    # Появились снимки старее истории: точная копия загруженного и другой снимок
+    write_snapshots(snapshots_dir, {
+        '20250101_060000.json': first,
+        '20250102_060000.json': [{'benchmark_name': 'ASR', 'source': 'huggingface', 'results': [
+            {'model_name': 'org/b', 'metrics': RESULTS[0]['metrics']}]}],
+    })
+    with caplog.at_level(logging.DEBUG):
+        load(tmp_path / 'data')
+    warnings = [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING]
+    assert len(warnings) == 1 and '20250102_060000' in warnings[0]
+    assert any('20250101_060000' in record.getMessage() for record in caplog.records
+               if record.levelno == logging.DEBUG)
+
+    caplog.clear()
+    load(tmp_path / 'data')
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
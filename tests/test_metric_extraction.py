@@ -0,0 +1,33 @@
+from metric_extraction import extract_metrics
+
+def summary(text):
+    return [(metric['type'], metric['value'], metric['dataset']) for metric in extract_metrics(text)]
+
+def test_extracts_type_value_and_dataset():
+    text = "We evaluate on Common Voice and report CER 3.4 and word error rate: 7.5 for English."
+    assert summary(text) == [('CER', 3.4, 'Common Voice'), ('WER', 7.5, 'Common Voice')]
+    assert {metric['language'] for metric in extract_metrics(text)} == {'en'}
+
+def test_links_metric_to_nearest_dataset_not_first_mentioned():
+    text = ("The model is pretrained on LibriSpeech and Common Voice. "
+            "Fine-tuned on conversational telephone speech, it reaches 5.2% WER on Switchboard, "
+            "while on the WSJ eval92 set we measure WER 3.1.")
+    assert summary(text) == [('WER', 5.2, 'Switchboard'), ('WER', 3.1, 'Wsj')]
+
+def test_value_before_keyword_only_for_wer():
+    assert summary("Ablation on TED-LIUM: 8.4 % WER") == [('WER', 8.4, 'Ted Lium')]
+    # Для MOS значение перед словом не берется
+    assert summary("Listeners gave 4.2 MOS") == []
+
+def test_longest_keyword_wins():
+    assert summary("Translation quality: bleu score: 31.5 on VoxForge") == [('BLEU', 31.5, 'Voxforge')]
+    assert summary("mean opinion score 4.3") == [('MOS', 4.3, 'unknown')]
+
+def test_keywords_match_whole_words_only():
+    text = ("The lower 3.5 bound holds for almost 4.0 hours of cancer 2.0 screening "
+            "recordings with a cerebral 1.5 model and bleus 7.0 on LibriSpeech.")
+    assert summary(text) == []
+    assert summary(text + " Final WER 6.1.") == [('WER', 6.1, 'Librispeech')]
+
+def test_text_without_metrics():
+    assert extract_metrics("A survey of speech synthesis evaluated on LibriSpeech.") == []
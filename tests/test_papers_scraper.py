@@ -0,0 +1,62 @@
+import os
+import gzip
+
+import pytest
+
+from conftest import FIXTURES, import_scraper
+
+@pytest.fixture(scope='module')
+def scraper_module(tmp_path_factory):
+    return import_scraper('papers_scraper', tmp_path_factory.mktemp('papers'))
+
+class ChunkedReader:
+    """
+    Тело ответа, которое отдается мелкими порциями, как из сокета
+    """
+    def __init__(self, content, chunk_size):
+        self.content = content
+        self.chunk_size = chunk_size
+        self.reads = 0
+
+    def read(self, size=-1):
+        size = self.chunk_size if size is None or size < 0 else min(size, self.chunk_size)
+        chunk, self.content = self.content[:size], self.content[size:]
+        self.reads += 1
+        return chunk
+
+def feed_content():
+    with open(os.path.join(FIXTURES, 'arxiv_feed.xml'), 'rb') as f:
+        return f.read()
+
+def test_feed_parses_the_same_in_small_chunks(scraper_module):
+    scraper = scraper_module.PapersScraper(cache_path=None)
+    expected = scraper.parse_arxiv_response(feed_content().decode('utf-8'))
+    assert [paper['arxiv_id'] for paper in expected] == ['2401.00001v1', '2401.00002v2', '2401.00003v1']
+    assert expected[1]['authors'] == ['Третий Автор']
+
+    # Порции по 7 байт режут теги и многобайтовые символы UTF-8
+    reader = ChunkedReader(feed_content(), 7)
+    feed_info = {}
+    assert list(scraper.iter_arxiv_entries(reader, feed_info)) == expected
+    assert feed_info == {'total_results': 3}
+    assert reader.reads > len(feed_content()) // 7
+
+def test_query_streams_gzip_body_and_caches_it(scraper_module, stub_server, tmp_path):
+    stub_server.routes['/api/query'] = [
+        (200, {'Content-Type': 'application/atom+xml', 'Content-Encoding': 'gzip'}, gzip.compress(feed_content()))
+    ]
+    cache_path = str(tmp_path / 'cache.sqlite')
+    scraper = scraper_module.PapersScraper(cache_path=cache_path)
+    scraper.arxiv_base_url = stub_server.url('/api/query')
+    scraper.http.rate_limiter = None
+    papers, feed_info = scraper._query_arxiv({'search_query': 'all:speech'}, 'тест')
+    assert [paper['arxiv_id'] for paper in papers] == ['2401.00001v1', '2401.00002v2', '2401.00003v1']
+    assert feed_info == {'total_results': 3}
+    assert scraper.cache.get_stats()['stored'] == 1
+
+    # Тело из кэша (распакованное) разбирается тем же потоковым парсером
+    offline = scraper_module.PapersScraper(cache_path=cache_path, offline=True)
+    offline.arxiv_base_url = scraper.arxiv_base_url
+    papers, _ = offline._query_arxiv({'search_query': 'all:speech'}, 'тест')
+    assert len(list(papers)) == 3
+    assert len(stub_server.requests) == 1
@@ -0,0 +1,12 @@
+def test_analysis_queries_use_indexes(analysis_db):
+    from query_plans import explain_query_plans, scanned_tables, FULL_SCAN_TABLES
+    plans = explain_query_plans()
+    assert len(plans) == 10
+    for entry in plans:
+        assert entry['full_scans'] == [], (entry['query'], entry['plan'])
+
+    # Целиком читаются только сводные таблицы: ими пользуются пять обзорных запросов
+    summary_queries = [entry for entry in plans if scanned_tables(entry['plan'])]
+    assert len(summary_queries) == 5
+    for entry in summary_queries:
+        assert set(scanned_tables(entry['plan'])) <= FULL_SCAN_TABLES, entry['plan']
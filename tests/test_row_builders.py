@@ -0,0 +1,39 @@
+import os
+import signal
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from row_builders import iter_record_batches, iter_queue_batches, benchmark_record
+
+def put_and_die(queue):
+    # Процесс разбора убит до того, как положил признак конца (None)
+    queue.put([{'n': 1}])
+    os.kill(os.getpid(), signal.SIGKILL)
+
+def put_and_finish(queue):
+    queue.put([{'n': 1}])
+    queue.put(None)
+
+def test_iter_queue_batches_raises_when_parser_is_killed():
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=1) as pool:
+        queue = manager.Queue()
+        future = pool.submit(put_and_die, queue)
+        batches = iter_queue_batches(queue, future, poll_seconds=0.1)
+        assert next(batches) == [{'n': 1}]
+        with pytest.raises(BrokenProcessPool):
+            next(batches)
+
+def test_iter_queue_batches_stops_at_end_marker():
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=1) as pool:
+        queue = manager.Queue()
+        future = pool.submit(put_and_finish, queue)
+        assert list(iter_queue_batches(queue, future, poll_seconds=0.1)) == [[{'n': 1}]]
+
+def test_records_without_model_name_are_dropped():
+    batches = list(iter_record_batches('systems', [{'model_name': 'org/a'}, {'model_name': ''}, {}], 10))
+    assert [record['system']['название'] for record in batches[0]] == ['org/a']
+    benchmark = benchmark_record({'benchmark_name': 'b', 'results': [{'model_name': 'org/a'}, {'model_name': None}]})
+    assert [result['model_name'] for result in benchmark['results']] == ['org/a']
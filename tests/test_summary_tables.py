@@ -0,0 +1,32 @@
+from sqlalchemy import delete, func, select
+
+def summary_counts(session):
+    from summary_tables import SUMMARY_TABLES
+    # Без id: после пересборки строки получают новые id
+    return [
+        sorted(tuple(row[1:]) for row in session.execute(select(table)).all())
+        for table, _ in SUMMARY_TABLES
+    ]
+
+def test_analyzer_does_not_write_and_init_database_backfills(analysis_db):
+    from data_analysis import DataAnalyzer
+    from database_config import get_session, init_database
+    from models import SummaryYearDeveloper
+    from summary_tables import SUMMARY_TABLES, rebuild_summary_tables
+    session = get_session()
+    expected = summary_counts(session)
+    assert expected[0]
+    for table, _ in SUMMARY_TABLES:
+        session.execute(delete(table))
+    session.commit()
+
+    # Анализатор не заполняет сводные таблицы на пути чтения
+    DataAnalyzer(use_cache=False).get_systems_overview()
+    assert session.execute(select(func.count()).select_from(SummaryYearDeveloper)).scalar() == 0
+
+    init_database()
+    session.rollback()
+    backfilled = summary_counts(session)
+    rebuild_summary_tables(session)
+    assert backfilled == expected
+    assert summary_counts(session) == expected